@@ -2,7 +2,13 @@
 # exit on error
 set -o errexit
 
+# collectstatic and migrate run with the same settings profile the web process uses
+export DJANGO_ENV=production
+
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# SQLite only: WAL is a one-time switch stored in the database file
+if [[ -z "$DATABASE_URL" || "$DATABASE_URL" == sqlite* ]]; then python manage.py enable_wal; fi
\ No newline at end of file
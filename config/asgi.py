@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Each ASGI request runs with its own connection objects, so a "persistent" connection is
+# never reused and only lingers until garbage collection; close them when the request ends.
+# Only the live board's events process (Procfile) runs this; the web workers serve
+# config.wsgi and keep DB_CONN_MAX_AGE.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
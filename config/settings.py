@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+import dj_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -22,8 +26,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-hr&^(ut4)8r^6gkhh-n#i=&u)dcube=+zl+zsu5g)7rjm*_eq%'
 
+# DJANGO_ENV=production (set by gunicorn.conf.py) switches the defaults below from
+# development to production values; each can still be overridden by its own variable.
+PRODUCTION = os.environ.get('DJANGO_ENV', 'development') == 'production'
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DEBUG', '0' if PRODUCTION else '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
@@ -41,12 +49,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.tenancy.TenantMiddleware',
+    'core.db.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,6 +78,11 @@ TEMPLATES = [
         },
     },
 ]
+if PRODUCTION:
+    # compiled templates are kept for the life of the worker (gunicorn.conf.py compiles them all before forking)
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader'])]
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
@@ -74,12 +90,33 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# DATABASE_URL (any dj-database-url URL) falls back to the local SQLite file. Connections
+# persist for DB_CONN_MAX_AGE seconds and are health-checked before reuse. Behind PgBouncer
+# in transaction mode set DB_POOLER=transaction (server-side cursors don't survive it).
+# DATABASE_REPLICA_URL adds a read replica used by views marked @replica_reads (core.db).
+# Under ASGI every request gets fresh connection objects, so config/asgi.py defaults the
+# age to 0 there; only the live board's events process runs it, the web workers serve
+# config.wsgi and keep their connections.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600 if PRODUCTION else 60))
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+
+def database(url):
+    db = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if db['ENGINE'] == 'django.db.backends.sqlite3':
+        db['OPTIONS'] = {'timeout': 20}  # seconds to wait for the write lock; pragmas in core.db
+    elif os.environ.get('DB_POOLER') == 'transaction':
+        db['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return db
+
+
+DATABASES = {'default': database(os.environ.get('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}"))}
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = {**database(os.environ['DATABASE_REPLICA_URL']), 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 # Password validation
@@ -118,9 +155,45 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
-import os
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Internal location the front proxy maps to MEDIA_ROOT (e.g. '/protected-media/'); when set,
+# core.media answers authorised downloads with X-Accel-Redirect instead of streaming them.
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+
+# Tenant snapshots, HQ stats and template fragments (core.fragments) live here. Local
+# memory is per process; CACHE_DIR switches to one file-based cache shared by every process
+# on the host. Production always uses one, so the clock process's invalidations (expired
+# subscriptions, core.sweeper) reach the web workers; point it at shared storage when the
+# processes run on different machines.
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'dispatch-nexus-cache') if PRODUCTION else '')
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': {'MAX_ENTRIES': 5000}}}
+if CACHE_DIR:
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_DIR,
+                         'OPTIONS': {'MAX_ENTRIES': 20000}}
+
+# Pub/sub behind the live load board (core.events). In production the web workers and the
+# clock hand events to the separate events process (Procfile) over a Unix socket on the
+# host; the in-process broker suits runserver and tests.
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', 'core.events.SocketBroker' if PRODUCTION else 'core.events.LocalBroker')
+EVENTS_SOCKET = os.environ.get('EVENTS_SOCKET', os.path.join(tempfile.gettempdir(), 'dispatch-nexus-events.sock'))
+
+# Per-request SQL profiling (core.profiling): a Server-Timing header on staff responses (on
+# every response with SERVER_TIMING_PUBLIC=1), and requests slower than SLOW_REQUEST_MS
+# written with their costliest SQL to a rotating log, whose directory is made on first write.
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', '1') == '1'
+SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC', '0') == '1'
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG', os.path.join(BASE_DIR, 'logs', 'slow_requests.log'))
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {'class': 'core.profiling.SlowRequestFileHandler', 'filename': SLOW_REQUEST_LOG,
+                          'maxBytes': 5 * 1024 * 1024, 'backupCount': 5, 'delay': True},
+    },
+    'loggers': {'core.profiling': {'handlers': ['slow_requests'], 'level': 'WARNING', 'propagate': False}},
+}
 
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
@@ -128,6 +201,10 @@ LOGOUT_REDIRECT_URL = 'home'
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Hashed names from the manifest are served with a one-year immutable Cache-Control; this
+# covers the rest. Only hashed copies are kept in production, so stale names can't be served.
+WHITENOISE_MAX_AGE = int(os.environ.get('WHITENOISE_MAX_AGE', 3600 if PRODUCTION else 0))
+WHITENOISE_KEEP_ONLY_HASHED_FILES = PRODUCTION
 
 # SECURITY SETTINGS FOR RENDER
 CSRF_TRUSTED_ORIGINS = [
@@ -2,7 +2,6 @@ from django.contrib import admin
 from django.urls import path, include
 from core import views
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -24,6 +23,7 @@ urlpatterns = [
     
     # --- HQ ADMIN CONTROL ---
     path('nexus-hq-control/', views.super_admin_desk, name='super_admin_desk'),
+    path('nexus-hq-control/performance/', views.hq_performance, name='hq_performance'),
     path('hq/approve/<int:company_id>/', views.approve_company, name='approve_company'),
     path('hq/pause/<int:company_id>/', views.pause_company, name='pause_company'),
     path('hq/delete/<int:company_id>/', views.delete_company, name='delete_company'),
@@ -34,12 +34,24 @@ urlpatterns = [
     path('manage-loads/', views.manage_loads, name='manage_loads'),
     path('manage-fleet/', views.manage_fleet, name='manage_fleet'),
     path('add-load/', views.add_load, name='add_load'),
+    path('manage-loads/import/', views.import_loads, name='import_loads'),
+    path('api/token/', views.api_token, name='api_token'),
+    path('api/loads/', views.api_loads, name='api_loads'),
+    path('api/loads/<int:load_id>/', views.api_load, name='api_load'),
+    path('api/drivers/', views.api_drivers, name='api_drivers'),
+    path('api/drivers/<int:driver_id>/', views.api_driver, name='api_driver'),
+    path('analytics/lanes/', views.lane_analytics, name='lane_analytics'),
+    path('manage-loads/events/', views.load_events, name='load_events'),
+    path('manage-loads/transition/', views.transition_loads, name='transition_loads'),
+    path('loads/export/', views.export_loads, name='export_loads'),
     path('edit-load/<int:load_id>/', views.edit_load, name='edit_load'),
     path('complete-load/<int:load_id>/', views.complete_load, name='complete_load'),
     path('invoice/<int:load_id>/', views.generate_invoice, name='generate_invoice'),
+    path('invoice/<int:load_id>/pdf/', views.invoice_pdf, name='invoice_pdf'),
+    path('invoices/delivered.zip', views.invoice_batch, name='invoice_batch'),
     path('company-settings/', views.company_settings, name='company_settings'),
     path('documents/', views.document_center, name='document_center'),
     path('manage-clients/', views.manage_clients, name='manage_clients'),
     path('client-dashboard/', views.client_dashboard, name='client_dashboard'),
-
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", views.serve_media, name='media'),
+]
\ No newline at end of file
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import Company, UserProfile, Driver, Load
+from .models import ApiToken, Company, UserProfile, Driver, Load, Notification
 
 admin.site.register(Company)
 admin.site.register(UserProfile)
 admin.site.register(Driver)
-admin.site.register(Load)
\ No newline at end of file
+admin.site.register(Load)
+admin.site.register(Notification)
+admin.site.register(ApiToken)
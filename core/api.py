@@ -0,0 +1,218 @@
+import hashlib
+import io
+import json
+import secrets
+from functools import wraps
+
+from django import forms
+from django.db.models import F
+from django.forms.models import model_to_dict
+from django.http import JsonResponse, QueryDict
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import ApiToken, CompanyDataVersion, Driver, Load
+from .pagination import InvalidCursor, KeysetPaginator
+from .storage import dedup_storage
+from .tenancy import SAFE_METHODS, resolve
+
+# --- JSON API ---
+# Tenant-scoped JSON over Load and Driver. Every load/driver write bumps the
+# company's CompanyDataVersion row; GETs compare the client's validators with it
+# before touching the data tables, so an unchanged poll costs one primary-key read
+# and a 304. Lists are keyset-paginated and ?fields= narrows the SELECT itself.
+# Browsers use their session (and so CSRF); the mobile app and TMS integrations send
+# `Authorization: Bearer <key>` from POST /api/token/, which carries no ambient
+# credential and so skips the CSRF check.
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class Resource:
+    def __init__(self, model, fields, file_fields, ordering):
+        self.model = model
+        self.fields = fields
+        self.file_fields = file_fields
+        self.ordering = ordering
+
+
+LOADS = Resource(
+    Load,
+    fields=('id', 'load_ref', 'status', 'broker_name', 'broker_mc', 'origin', 'destination', 'pickup_date', 'delivery_date',
+            'driver', 'driver__name', 'driver__truck_number', 'rate', 'miles', 'expenses', 'rate_con_file', 'bol_file', 'pod_file'),
+    file_fields=('rate_con_file', 'bol_file', 'pod_file'),
+    ordering=('-pickup_date', '-id'),
+)
+DRIVERS = Resource(
+    Driver,
+    fields=('id', 'name', 'phone', 'truck_number', 'truck_type', 'status', 'cdl_file', 'medical_card_file', 'driver_w9_file',
+            'registration_file', 'insurance_file', 'ifta_sticker_file'),
+    file_fields=('cdl_file', 'medical_card_file', 'driver_w9_file', 'registration_file', 'insurance_file', 'ifta_sticker_file'),
+    ordering=('id',),
+)
+
+
+class BadRequest(ValueError):
+    status = 400
+
+
+class UnsupportedMediaType(BadRequest):
+    status = 415
+
+
+def error(status, message, **extra): return JsonResponse({'error': message, **extra}, status=status)
+
+
+def endpoint(view):
+    """Tenant-scoped JSON view, by bearer token or session: 401/403 instead of login redirects, BadRequest -> 400 (or its status)."""
+    @csrf_exempt  # enforced below for session requests only
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        key = bearer_key(request)
+        if key is not None:
+            token = ApiToken.objects.select_related('user').filter(digest=digest(key), user__is_active=True).first()
+            if token is None: return error(401, "Invalid API token.")
+            request.user = token.user
+            request.tenant = resolve(token.user, fresh=request.method not in SAFE_METHODS)
+        elif not request.user.is_authenticated: return error(401, "Authentication required.")
+        elif CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {}) is not None:
+            return error(403, "CSRF verification failed.")
+        if request.tenant is None or not request.tenant.is_active: return error(403, "Company is not active.")
+        try: return view(request, *args, **kwargs)
+        except BadRequest as e: return error(e.status, str(e))
+    return wrapped
+
+
+# --- tokens ---
+def digest(key): return hashlib.sha256(key.encode()).hexdigest()
+
+
+def bearer_key(request):
+    scheme, _, key = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return key.strip() if scheme.lower() == 'bearer' else None
+
+
+def issue_token(user, name=''):
+    """A new API key for the user; returned once, only its digest is kept."""
+    key = secrets.token_urlsafe(32)
+    ApiToken.objects.create(user=user, name=name[:100], digest=digest(key))
+    return key
+
+
+# --- change stamps ---
+def touch(company_id, create=True):
+    """Record that the company's loads or drivers changed, creating its row on the first write."""
+    bump = lambda: CompanyDataVersion.objects.filter(company_id=company_id).update(version=F('version') + 1, changed_at=timezone.now())
+    # deletes pass create=False: a company delete cascade has already removed the row by then
+    if bump() or not create: return
+    _, created = CompanyDataVersion.objects.get_or_create(company_id=company_id, defaults={'version': 1})
+    if not created: bump()  # a concurrent stamp() or touch() made it first
+
+
+def stamp(company_id):
+    # the row is created by the first read or write, whichever comes first
+    row = CompanyDataVersion.objects.filter(company_id=company_id).values_list('version', 'changed_at').first()
+    if row is None:
+        obj, _ = CompanyDataVersion.objects.get_or_create(company_id=company_id)
+        row = obj.version, obj.changed_at
+    return row
+
+
+def conditional_get(request, company_id, build):
+    """304 when the client's copy of this URL is current, otherwise build()'s response, with validators."""
+    version, changed_at = stamp(company_id)
+    key = hashlib.md5(request.get_full_path().encode()).hexdigest()[:12]
+    etag, last_modified = quote_etag(f"{company_id}-{version}-{key}"), int(changed_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified) or build()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)  # always revalidate; a 304 is the cheap path
+    patch_vary_headers(response, ('Cookie', 'Authorization'))
+    return response
+
+
+# --- reads ---
+def selected_fields(request, resource):
+    raw = request.GET.get('fields')
+    if not raw: return resource.fields
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in resource.fields]
+    if unknown: raise BadRequest(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(resource.fields)}.")
+    return fields
+
+
+def serialize(row, fields, resource):
+    out = {}
+    for f in fields:
+        value = row[f]
+        if f in resource.file_fields: value = dedup_storage.url(value) if value else None
+        out[f] = value
+    return out
+
+
+def page_size(request):
+    try: size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError: raise BadRequest("limit must be an integer.")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def listing(request, resource, queryset):
+    fields = selected_fields(request, resource)
+    keys = [o.lstrip('-') for o in resource.ordering]
+    paginator = KeysetPaginator(queryset.values(*dict.fromkeys(fields + tuple(keys))), resource.ordering, per_page=page_size(request))
+    try: page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor: raise BadRequest("Invalid cursor.")
+    link = lambda cursor: cursor and request.build_absolute_uri(f"{request.path}?{_with_cursor(request, cursor)}")
+    return {'results': [serialize(row, fields, resource) for row in page],
+            'next': link(page.next_cursor), 'previous': link(page.prev_cursor)}
+
+
+def _with_cursor(request, cursor):
+    q = request.GET.copy()
+    q['cursor'] = cursor
+    return q.urlencode()
+
+
+def detail(request, resource, queryset, pk):
+    fields = selected_fields(request, resource)
+    row = queryset.filter(pk=pk).values(*fields).first()
+    return serialize(row, fields, resource) if row else None
+
+
+# --- writes ---
+FORM_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+
+def payload(request):
+    """Submitted fields and files: a JSON object body, or form/multipart data (which Django only parses for POST)."""
+    if request.content_type == 'application/json':
+        try: data = json.loads(request.body or b'{}')
+        except ValueError: raise BadRequest("Body is not valid JSON.")
+        if not isinstance(data, dict): raise BadRequest("Body must be a JSON object.")
+        return data, None
+    if request.content_type not in FORM_TYPES:
+        raise UnsupportedMediaType(f"Send application/json or form data, not {request.content_type or 'an untyped body'}.")
+    if request.method == 'POST': return request.POST, request.FILES
+    if request.content_type == 'multipart/form-data': return request.parse_file_upload(request.META, io.BytesIO(request.body))
+    return QueryDict(request.body, encoding=request.encoding), None
+
+
+def bind(form_class, request, *form_args, instance=None):
+    """A bound form; for an update, fields the client left out keep their current values."""
+    data, files = payload(request)
+    if instance is not None:
+        kept = [f for f in form_class._meta.fields if not isinstance(form_class.base_fields[f], forms.FileField)]
+        data = {**model_to_dict(instance, fields=kept), **(data.dict() if hasattr(data, 'dict') else data)}
+    return form_class(*form_args, data, files, instance=instance)
+
+
+def invalid(form): return error(400, "Validation failed.", fields=form.errors.get_json_data())
+
+
+def saved(request, resource, obj, status=200):
+    return JsonResponse(detail(request, resource, resource.model.objects.all(), obj.pk), status=status)
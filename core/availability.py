@@ -0,0 +1,109 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import compress
+
+from django.utils import timezone
+
+from . import fragments
+from .models import Load
+
+# --- DRIVER AVAILABILITY ---
+# A truck is busy from pickup to delivery of each of its booked or in-transit loads.
+# IntervalIndex keeps one company's open loads sorted by pickup with a max-delivery
+# segment tree on top, so "what overlaps [start, end)" costs O(log n + k) instead of
+# a scan. Indexes are rebuilt lazily when the company's fragment generation changes
+# (every Load/Driver write bumps it). The dropdown reads the index; saves re-check
+# against the database, which stays the authority.
+
+BLOCKING_STATUSES = ('booked', 'active')
+MAX_INDEXES = 256
+
+
+class IntervalIndex:
+    LEAF = 32  # below this many intervals a slice scan beats descending further
+
+    def __init__(self, rows):
+        """rows: (load_id, driver_id, start, end) with start/end as POSIX timestamps."""
+        rows = sorted(rows, key=lambda r: r[2])
+        self.load_ids = [r[0] for r in rows]
+        self.driver_ids = [r[1] for r in rows]
+        self.starts = [r[2] for r in rows]
+        self.ends = [r[3] for r in rows]
+        self.pairs = [(r[1], r[3]) for r in rows]
+        # implicit tree over positions: node (lo, span) holds max/min end of ends[lo:lo + span]
+        self.size = self.LEAF
+        while self.size < len(rows): self.size *= 2
+        self.max_end, self.min_end = {}, {}
+        self._build(0, self.size)
+
+    def _build(self, lo, span):
+        part = self.ends[lo:lo + span]
+        self.max_end[lo, span] = max(part, default=float('-inf'))
+        self.min_end[lo, span] = min(part, default=float('inf'))
+        if span > self.LEAF and lo < len(self.ends):  # a right half past the data stays an empty leaf
+            self._build(lo, span // 2); self._build(lo + span // 2, span // 2)
+
+    def __len__(self): return len(self.starts)
+
+    def overlapping(self, start, end):
+        """Positions of intervals with start_i < end and end_i > start."""
+        hi = bisect_left(self.starts, end)  # every candidate starts before the window ends
+        found, stack, ends = [], [(0, self.size)], self.ends
+        while stack:
+            lo, span = stack.pop()
+            if lo >= hi or self.max_end[lo, span] <= start: continue  # nothing here reaches the window
+            stop = min(lo + span, hi)
+            if self.min_end[lo, span] > start: found.extend(range(lo, stop))  # everything here does
+            elif span <= self.LEAF: found.extend(compress(range(lo, stop), [e > start for e in ends[lo:stop]]))
+            else: stack += [(lo + span // 2, span // 2), (lo, span // 2)]
+        return found
+
+    def busy(self, start, end, exclude_load=None):
+        """{driver_id: latest end (timestamp) among that driver's loads overlapping the window}."""
+        busy, pairs, load_ids = {}, self.pairs, self.load_ids
+        for i in self.overlapping(start, end):
+            driver, until = pairs[i]
+            if until > busy.get(driver, until - 1) and load_ids[i] != exclude_load: busy[driver] = until
+        return busy
+
+
+def build(company_id):
+    rows = (Load.objects.filter(company_id=company_id, status__in=BLOCKING_STATUSES, driver__isnull=False)
+            .values_list('id', 'driver_id', 'pickup_date', 'delivery_date'))
+    return IntervalIndex((i, d, s.timestamp(), e.timestamp()) for i, d, s, e in rows.iterator() if e > s)
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def for_company(company_id):
+    """The company's index, rebuilt if any load or driver changed since it was built."""
+    gen = fragments.generation(company_id)
+    with _lock:
+        cached = _indexes.get(company_id)
+        if cached and cached[0] == gen:
+            _indexes.move_to_end(company_id)
+            return cached[1]
+    index = build(company_id)
+    with _lock:
+        _indexes[company_id] = (gen, index)
+        _indexes.move_to_end(company_id)
+        while len(_indexes) > MAX_INDEXES: _indexes.popitem(last=False)
+    return index
+
+
+def open_loads(driver):
+    """Loads that keep `driver` (instance or id) busy."""
+    return Load.objects.filter(driver=driver, status__in=BLOCKING_STATUSES)
+
+
+def conflicts(driver, start, end, exclude_load=None):
+    """Open loads of `driver` that overlap [start, end), straight from the database."""
+    return open_loads(driver).filter(pickup_date__lt=end, delivery_date__gt=start).exclude(pk=exclude_load).order_by('pickup_date')
+
+
+def clash_message(truck_number, load_ref, start, end):
+    return (f"Unit {truck_number} is already booked on load {load_ref} "
+            f"({timezone.localtime(start):%b %d, %H:%M} - {timezone.localtime(end):%b %d, %H:%M}).")
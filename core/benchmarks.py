@@ -0,0 +1,105 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Load, UserProfile
+
+# --- VIEW BENCHMARKS ---
+# Drives the core pages through the test client against whatever database is
+# configured (seed one with manage.py seed_demo). Latency comes from plain timed
+# requests; query count and peak Python memory from one extra instrumented request,
+# so tracing never skews the timings. Results are compared with a saved JSON
+# baseline: latency and memory may drift by `threshold`, query counts may not grow.
+
+VIEWS = (
+    ('dashboard', 'tenant'), ('manage_loads', 'tenant'), ('manage_fleet', 'tenant'), ('document_center', 'tenant'),
+    ('lane_analytics', 'tenant'), ('api_loads', 'tenant'), ('super_admin_desk', 'hq'),
+)
+THRESHOLD = 0.25
+SLACK_MS = 5  # absolute allowance so sub-10ms pages don't fail on timer noise
+SLACK_KB = 256
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def busiest_tenant():
+    """Owner-side user of the active company with the most loads."""
+    top = (Load.objects.filter(company__is_active=True).values('company').annotate(n=Count('id')).order_by('-n').first())
+    if top is None: raise BenchmarkError("No active company has any loads; seed the database first (manage.py seed_demo).")
+    return UserProfile.objects.filter(company_id=top['company']).select_related('user').first().user
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+def measure(client, url, iterations, cold=False):
+    """p50/p95 latency over `iterations` requests, plus queries and peak traced memory of one more."""
+    def get():
+        if cold: cache.clear()
+        response = client.get(url)
+        if response.status_code != 200: raise BenchmarkError(f"GET {url} returned {response.status_code}")
+        return response
+
+    get()  # warm-up: imports, template loading, first cache fill
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter(); get(); timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries: get()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'p50_ms': round(statistics.median(timings), 2), 'p95_ms': round(percentile(timings, 95), 2),
+            'queries': len(queries), 'peak_kb': round(peak / 1024)}
+
+
+def run(views=None, iterations=20, cold=False, tenant=None, hq=None):
+    tenant = tenant or busiest_tenant()
+    hq = hq or User.objects.filter(is_superuser=True).order_by('id').first()
+    clients = {}
+    for role, user in (('tenant', tenant), ('hq', hq)):
+        if user is None: continue
+        clients[role] = Client(); clients[role].force_login(user)
+    results = {}
+    for name, role in VIEWS:
+        if views and name not in views: continue
+        if role not in clients: raise BenchmarkError(f"{name} needs a superuser account; none exists.")
+        results[name] = measure(clients[role], reverse(name), iterations, cold)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Human-readable regressions of `results` against `baseline` (views missing from either side are skipped)."""
+    problems = []
+    for name, now in results.items():
+        was = baseline.get(name)
+        if was is None: continue
+        if now['p95_ms'] > was['p95_ms'] * (1 + threshold) + SLACK_MS:
+            problems.append(f"{name}: p95 {now['p95_ms']}ms vs baseline {was['p95_ms']}ms")
+        if now['queries'] > was['queries']:
+            problems.append(f"{name}: {now['queries']} queries vs baseline {was['queries']}")
+        if now['peak_kb'] > was['peak_kb'] * (1 + threshold) + SLACK_KB:
+            problems.append(f"{name}: peak memory {now['peak_kb']}KB vs baseline {was['peak_kb']}KB")
+    return problems
+
+
+def load_baseline(path):
+    with open(path) as f: return json.load(f)['views']
+
+
+def save_baseline(path, results, **meta):
+    with open(path, 'w') as f: json.dump({**meta, 'views': results}, f, indent=2, sort_keys=True)
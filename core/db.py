@@ -0,0 +1,90 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# --- DATABASE ROUTING ---
+# Reads go to the primary unless a view opted in with @replica_reads. Inside such a
+# view they go to the 'replica' alias (when one is configured) until the first write
+# or transaction, after which the rest of the request sticks to the primary. A
+# client that has just written (any unsafe request) carries a short-lived cookie
+# that keeps its reads on the primary, so a POST -> redirect -> GET sees its own
+# write even while the replica lags.
+
+REPLICA = 'replica'
+PIN_COOKIE = 'db_primary_until'
+
+_reads = ContextVar('db_reads', default=None)
+
+
+def replica_configured(): return REPLICA in settings.DATABASES
+
+
+def recently_wrote(request):
+    try: return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError: return False
+
+
+def replica_reads(view):
+    """Route the view's reads to the replica, unless the client has just written."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not replica_configured() or recently_wrote(request):
+            return view(request, *args, **kwargs)
+        token = _reads.set(REPLICA)
+        try: return view(request, *args, **kwargs)
+        finally: _reads.reset(token)
+    return wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reads.get() != REPLICA or connections[DEFAULT_DB_ALIAS].in_atomic_block: return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        if _reads.get() == REPLICA: _reads.set(None)  # read-after-write: stay on the primary from here on
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints): return True
+
+    def allow_migrate(self, db, app_label, **hints): return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinMiddleware:
+    """After an unsafe request, keep the client's reads on the primary for REPLICA_PIN_SECONDS."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and replica_configured():
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+            response.set_cookie(PIN_COOKIE, f"{time.time() + seconds:.3f}", max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
+
+# --- SQLITE TUNING ---
+# WAL (readers no longer block the writer) is a property of the database file, so it is
+# switched on once at deploy time (`manage.py enable_wal`, run by build.sh) rather than by
+# every connection: running tests or any other command never rewrites a local database.
+# The connection hook only sets what SQLite forgets between connections.
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',     # durable at checkpoints; safe with WAL
+    'PRAGMA busy_timeout=20000',     # wait for the write lock instead of failing with "database is locked"
+)
+
+
+def configure_sqlite(connection):
+    if connection.vendor != 'sqlite': return
+    with connection.cursor() as cursor:
+        for pragma in CONNECTION_PRAGMAS: cursor.execute(pragma)
+
+
+def enable_wal(connection):
+    """Switch the database file to WAL; returns the journal mode now in effect (in-memory databases stay 'memory')."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        return cursor.fetchone()[0]
@@ -0,0 +1,70 @@
+import mimetypes
+from datetime import timezone as dt_timezone
+
+from django.db import models
+from django.utils import timezone
+
+from .models import Company, Driver, Load, Document
+
+# --- DOCUMENT INDEX ---
+# Every FileField on Company/Driver/Load maps to at most one Document row, keyed by
+# (owner_type, owner_id, kind). sync() is called from post_save and only touches
+# storage (for the file size) when a slot's file name actually changed.
+
+OWNER_TYPES = {Company: 'company', Driver: 'driver', Load: 'load'}
+
+
+def file_fields(model):
+    return [f for f in model._meta.get_fields() if isinstance(f, models.FileField)]
+
+
+def owner_of(instance):
+    """(company_id, owner_type, label) for a Company, Driver or Load."""
+    if isinstance(instance, Company): return instance.pk, 'company', instance.name
+    if isinstance(instance, Driver): return instance.company_id, 'driver', f"{instance.name} (Unit {instance.truck_number})"
+    return instance.company_id, 'load', f"Load #{instance.load_ref}"
+
+
+def describe(fieldfile, use_mtime=False):
+    """Size, content type and upload time of a stored file, or None if it is missing from storage."""
+    storage, name = fieldfile.storage, fieldfile.name
+    try:
+        size = storage.size(name)
+        uploaded = storage.get_modified_time(name) if use_mtime else timezone.now()
+    except (OSError, NotImplementedError):
+        return None
+    if timezone.is_naive(uploaded): uploaded = timezone.make_aware(uploaded, dt_timezone.utc)
+    return {'size': size, 'content_type': mimetypes.guess_type(name)[0] or '', 'uploaded_at': uploaded}
+
+
+def sync(instance, use_mtime=False):
+    """Bring the Document rows of one owner in line with its FileFields. Returns the number of rows written."""
+    company_id, owner_type, label = owner_of(instance)
+    existing = {d.kind: d for d in Document.objects.filter(owner_type=owner_type, owner_id=instance.pk)}
+    written = 0
+
+    for field in file_fields(type(instance)):
+        fieldfile = getattr(instance, field.name)
+        doc = existing.pop(field.name, None)
+        if not fieldfile:
+            if doc: doc.delete(); written += 1
+            continue
+        if doc and doc.name == fieldfile.name:
+            if doc.owner_label != label:
+                Document.objects.filter(pk=doc.pk).update(owner_label=label); written += 1
+            continue
+        meta = describe(fieldfile, use_mtime)
+        if meta is None: continue
+        Document.objects.update_or_create(
+            owner_type=owner_type, owner_id=instance.pk, kind=field.name,
+            defaults=dict(company_id=company_id, owner_label=label, name=fieldfile.name, **meta),
+        )
+        written += 1
+
+    for stale in existing.values(): stale.delete(); written += 1
+    return written
+
+
+def forget(instance):
+    _, owner_type, _ = owner_of(instance)
+    Document.objects.filter(owner_type=owner_type, owner_id=instance.pk).delete()
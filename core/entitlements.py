@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import CompanyUsage, Driver, UserProfile
+
+# --- PLAN ENTITLEMENTS ---
+# Single source of truth for what each plan costs and allows. Quotas are enforced
+# against CompanyUsage counters with one conditional UPDATE, so two workers racing
+# for the last slot cannot both win.
+
+
+class Plan:
+    def __init__(self, key, label, price, fleet_limit, owner_logins, show_profit):
+        self.key = key
+        self.label = label
+        self.price = price
+        self.fleet_limit = fleet_limit
+        self.owner_logins = owner_logins
+        self.show_profit = show_profit
+
+    def limit(self, resource): return {'drivers': self.fleet_limit, 'owner_logins': self.owner_logins}[resource]
+
+    def __repr__(self): return f"<Plan {self.key}>"
+
+
+PLANS = {
+    'starter': Plan('starter', 'Starter', price=99, fleet_limit=3, owner_logins=0, show_profit=False),
+    'pro': Plan('pro', 'Pro', price=199, fleet_limit=10, owner_logins=3, show_profit=True),
+    'enterprise': Plan('enterprise', 'Enterprise', price=499, fleet_limit=9999, owner_logins=999, show_profit=True),
+}
+
+
+def plan_for(plan_type):
+    """Plan for a Company.plan_type value; billing-period suffixes such as 'pro_annual' map to their tier."""
+    plan = str(plan_type).lower()
+    if 'enterprise' in plan: return PLANS['enterprise']
+    if 'pro' in plan: return PLANS['pro']
+    return PLANS['starter']
+
+
+def price_expression(field='plan_type'):
+    """SQL CASE mapping a plan_type column to its monthly price, mirroring plan_for()."""
+    return Case(
+        When(**{f'{field}__icontains': 'enterprise'}, then=Value(PLANS['enterprise'].price)),
+        When(**{f'{field}__icontains': 'pro'}, then=Value(PLANS['pro'].price)),
+        default=Value(PLANS['starter'].price), output_field=IntegerField(),
+    )
+
+
+# --- USAGE COUNTERS ---
+class QuotaExceeded(Exception):
+    def __init__(self, resource, limit):
+        super().__init__(f"{resource} limit of {limit} reached")
+        self.resource = resource
+        self.limit = limit
+
+
+def live_usage(company_id):
+    return {
+        'drivers': Driver.objects.filter(company_id=company_id).count(),
+        'owner_logins': UserProfile.objects.filter(company_id=company_id, role='owner').count(),
+    }
+
+
+def usage_for(company_id):
+    usage = CompanyUsage.objects.filter(company_id=company_id).first()
+    if usage is None: usage, _ = CompanyUsage.objects.get_or_create(company_id=company_id, defaults=live_usage(company_id))
+    return usage
+
+
+def sync_usage(company_id):
+    CompanyUsage.objects.update_or_create(company_id=company_id, defaults=live_usage(company_id))
+
+
+def bump(company_id, resource, delta):
+    """Unconditional +/- for writes that are not quota-checked (admin, bulk tools, deletes)."""
+    updated = CompanyUsage.objects.filter(company_id=company_id).update(**{resource: F(resource) + delta})
+    # first touch: live counts already include this change. Decrements never create the row,
+    # which a company delete cascade has already removed by the time its drivers go.
+    if not updated and delta > 0: usage_for(company_id)
+
+
+def acquire(company_id, resource, limit):
+    """Take one unit of `resource` if the company is under `limit`. Returns False when the quota is full."""
+    take = lambda: CompanyUsage.objects.filter(company_id=company_id, **{f'{resource}__lt': limit}).update(**{resource: F(resource) + 1}) == 1
+    if take(): return True
+    if CompanyUsage.objects.filter(company_id=company_id).exists(): return False
+    usage_for(company_id)  # counters not initialised yet
+    return take()
+
+
+@contextmanager
+def reserve(company, resource):
+    """Hold a quota slot for the duration of the block; the slot is returned if the block raises.
+
+    Objects created inside the block should be tagged with ``_quota_reserved = True`` so the
+    post_save counter hook does not count them a second time.
+    """
+    limit = plan_for(company.plan_type).limit(resource)
+    with transaction.atomic():
+        if not acquire(company.pk, resource, limit): raise QuotaExceeded(resource, limit)
+        yield limit
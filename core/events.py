@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# --- LIVE BOARD EVENTS ---
+# Writes publish small JSON events on a per-company channel once their transaction
+# commits; the SSE view (views.load_events) relays them to every open board of that
+# company. LocalBroker fans out inside one process. SocketBroker (the production
+# default) carries events from every process on the host (sync web workers, the clock)
+# over a Unix datagram socket to the one events process that holds the boards.
+# EVENTS_BROKER can name any class with the same publish()/subscribe() pair; one whose
+# subscribers may sit in several processes (e.g. Redis pub/sub) sets `shared = True`,
+# which lets gunicorn.conf.py run more than one async worker.
+
+QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+MAX_DATAGRAM = 256 * 1024
+
+
+def channel(company_id): return f"company:{company_id}"
+
+
+class Subscription:
+    """Event queue for one open board connection."""
+    def __init__(self, broker, name):
+        self.broker, self.name = broker, name
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        # runs on the subscriber's loop; a board that can't keep up is told to reload instead
+        if self.queue.full():
+            while not self.queue.empty(): self.queue.get_nowait()
+            event = {'type': 'resync'}
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self): self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub. publish() is thread-safe; subscribers live on the ASGI event loop."""
+    shared = False  # subscribers in other processes never hear this process's events
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, name):
+        sub = Subscription(self, name)
+        with self.lock: self.subscribers.setdefault(name, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            subs = self.subscribers.get(sub.name, set())
+            subs.discard(sub)
+            if not subs: self.subscribers.pop(sub.name, None)
+
+    def publish(self, name, event):
+        with self.lock: subs = list(self.subscribers.get(name, ()))
+        for sub in subs:
+            try: sub.loop.call_soon_threadsafe(sub.deliver, event)
+            except RuntimeError: self.unsubscribe(sub)  # loop already closed
+
+
+class SocketBroker(LocalBroker):
+    """LocalBroker across the processes of one host: publish() sends a datagram to EVENTS_SOCKET,
+    bound by the first process to open a board, which relays it to its own subscribers."""
+    def __init__(self):
+        super().__init__()
+        self.path = settings.EVENTS_SOCKET
+        self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sender.setblocking(False)  # a write never waits on the boards
+        self.receiver = None
+
+    def subscribe(self, name):
+        with self.lock:
+            if self.receiver is None: self.listen()
+        return super().subscribe(name)
+
+    def listen(self):
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try: os.unlink(self.path)  # left over from a previous events process
+        except FileNotFoundError: pass
+        receiver.bind(self.path)
+        receiver.setblocking(False)
+        asyncio.get_running_loop().add_reader(receiver.fileno(), self.receive, receiver)
+        self.receiver = receiver
+
+    def receive(self, receiver):
+        while True:
+            try: name, event = json.loads(receiver.recv(MAX_DATAGRAM))
+            except BlockingIOError: return
+            super().publish(name, event)
+
+    def publish(self, name, event):
+        try: self.sender.sendto(json.dumps([name, event], separators=(',', ':')).encode(), self.path)
+        except OSError: pass  # no events process yet (so no open boards), or its queue is full: the event is dropped
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None: _broker = import_string(getattr(settings, 'EVENTS_BROKER', 'core.events.LocalBroker'))()
+        return _broker
+
+
+def publish(company_id, event):
+    """Send `event` to the company's open boards after the current transaction commits."""
+    transaction.on_commit(lambda: broker().publish(channel(company_id), event))
+
+
+def load_event(load, deleted=False):
+    if deleted: return {'type': 'load', 'id': load.pk, 'deleted': True}
+    driver = load.driver if load.driver_id else None
+    return {
+        'type': 'load', 'id': load.pk, 'status': load.status, 'status_label': load.get_status_display(),
+        'driver_id': load.driver_id, 'driver': driver.name if driver else None, 'truck': driver.truck_number if driver else None,
+    }
+
+
+def status_event(ids, status):
+    from .models import Load
+    return {'type': 'status', 'ids': sorted(ids), 'status': status, 'status_label': dict(Load._meta.get_field('status').choices)[status]}
+
+
+def driver_event(driver, deleted=False):
+    if deleted: return {'type': 'driver', 'id': driver.pk, 'deleted': True}
+    return {'type': 'driver', 'id': driver.pk, 'name': driver.name, 'truck': driver.truck_number}
+
+
+async def stream(name):
+    """SSE body for one connection: events as they arrive, a comment line while idle."""
+    sub = broker().subscribe(name)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try: event = await sub.get(HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError: yield ': ping\n\n'; continue
+            yield format_sse(event)
+    finally:
+        sub.close()
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
@@ -0,0 +1,46 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Load
+
+# --- ACCOUNTING EXPORT ---
+# Full load history (paid included) as CSV or NDJSON. Rows come from a values()
+# queryset read with .iterator(), so only one chunk is ever in memory and each
+# line is yielded as soon as it is formatted.
+
+CHUNK_SIZE = 2000
+FIELDS = ('id', 'load_ref', 'status', 'broker_name', 'broker_mc', 'origin', 'destination',
+          'pickup_date', 'delivery_date', 'driver__truck_number', 'driver__name', 'miles', 'rate', 'expenses')
+COLUMNS = tuple(f.replace('driver__', 'driver_') for f in FIELDS) + ('net_profit',)
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def loads_for(company):
+    return Load.objects.filter(company=company).order_by('pickup_date', 'id')
+
+
+def rows(loads, chunk_size=CHUNK_SIZE):
+    for values in loads.values_list(*FIELDS).iterator(chunk_size=chunk_size):
+        rate, expenses = values[-2], values[-1]
+        yield values + (rate - expenses,)
+
+
+class _Line:
+    """File-like target for csv.writer that hands back each formatted line."""
+    def write(self, value): return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS)
+    for row in rows: yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows: yield encoder.encode(dict(zip(COLUMNS, row))) + '\n'
+
+
+def stream(loads, fmt='csv'):
+    return (csv_lines if fmt == 'csv' else ndjson_lines)(rows(loads))
@@ -1,5 +1,15 @@
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
 from django import forms
-from .models import Load, Driver, Company
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from . import availability
+from .models import Load, Driver, Company, Document
+
+
+def day_start(d):
+    return timezone.make_aware(datetime.combine(d, time.min))
 
 # --- 1. REGISTRATION ---
 class RegistrationForm(forms.Form):
@@ -62,6 +72,24 @@ class DriverForm(forms.ModelForm):
                 self.fields[field].widget.attrs.update({'class': 'form-control'})
 
 # --- 4. LOAD FORM (The Fix) ---
+def _until(ts): return timezone.localtime(datetime.fromtimestamp(ts, tz=dt_timezone.utc)).strftime('%b %d, %H:%M')
+
+
+class DriverSelect(forms.Select):
+    """Driver dropdown that flags (and disables) trucks already booked in the load's window."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.busy = {}
+
+    def create_option(self, name, value, label, selected, index, subindex=None, attrs=None):
+        option = super().create_option(name, value, label, selected, index, subindex, attrs)
+        until = self.busy.get(getattr(value, 'value', value))
+        if until is not None:
+            option['label'] = f"{label} (booked until {_until(until)})"
+            if not selected: option['attrs']['disabled'] = True
+        return option
+
+
 class LoadForm(forms.ModelForm):
     # Explicitly define optional fields so they don't crash the form if empty
     broker_name = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
@@ -83,13 +111,114 @@ class LoadForm(forms.ModelForm):
         widgets = {
             'pickup_date': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'}),
             'delivery_date': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'}),
-            'driver': forms.Select(attrs={'class': 'form-control'}),
+            'driver': DriverSelect(attrs={'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
         }
 
     def __init__(self, company, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['driver'].queryset = Driver.objects.filter(company=company)
+        if 'driver' in self.fields:
+            self.fields['driver'].queryset = Driver.objects.filter(company=company)
+            window = self._window()
+            if window: self.fields['driver'].widget.busy = availability.for_company(company.pk).busy(*window, exclude_load=self.instance.pk)
         for field in self.fields:
              if 'class' not in self.fields[field].widget.attrs:
-                self.fields[field].widget.attrs.update({'class': 'form-control'})
\ No newline at end of file
+                self.fields[field].widget.attrs.update({'class': 'form-control'})
+
+    def _window(self):
+        """(pickup, delivery) timestamps currently in the form, or None if either is missing or invalid."""
+        try:
+            start, end = (self.fields[f].clean(self[f].value()) for f in ('pickup_date', 'delivery_date'))
+        except ValidationError:
+            return None
+        return (start.timestamp(), end.timestamp()) if start and end and end > start else None
+
+    def clean(self):
+        cleaned = super().clean()
+        driver, start, end = cleaned.get('driver'), cleaned.get('pickup_date'), cleaned.get('delivery_date')
+        if driver and start and end and cleaned.get('status', self.instance.status) in availability.BLOCKING_STATUSES:
+            clash = availability.conflicts(driver, start, end, exclude_load=self.instance.pk).first()
+            if clash:
+                self.add_error('driver', availability.clash_message(driver.truck_number, clash.load_ref, clash.pickup_date, clash.delivery_date))
+        return cleaned
+
+# --- 4b. BULK IMPORT (same rules as LoadForm; no rate con, driver resolved by truck number) ---
+class LoadImportForm(LoadForm):
+    rate_con_file = None
+
+    class Meta(LoadForm.Meta):
+        fields = [f for f in LoadForm.Meta.fields if f not in ('driver', 'rate_con_file')]
+
+
+# --- 4c. JSON API (same rules as LoadForm; the rate con is optional and kept when an update omits it) ---
+class LoadApiForm(LoadForm):
+    rate_con_file = forms.FileField(required=False)
+
+
+class LoadImportUploadForm(forms.Form):
+    # imports run inside the request; ~100k rows fit well within the worker timeout, larger files go through the command
+    MAX_BYTES = 10 * 1024 * 1024
+    csv_file = forms.FileField(widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv'}))
+
+    def clean_csv_file(self):
+        f = self.cleaned_data['csv_file']
+        if f.size > self.MAX_BYTES:
+            raise ValidationError(f"The file is over {self.MAX_BYTES // (1024 * 1024)} MB; split it into smaller files.")
+        return f
+
+
+# --- 5. LOAD BOARD FILTERS ---
+class LoadBoardFilterForm(forms.Form):
+    status = forms.ChoiceField(required=False, choices=[('', 'All open')] + [c for c in Load._meta.get_field('status').choices if c[0] != 'paid'])
+    driver = forms.ModelChoiceField(required=False, queryset=Driver.objects.none(), empty_label='All drivers')
+    pickup_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    pickup_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def __init__(self, company, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['driver'].queryset = Driver.objects.filter(company=company).order_by('truck_number')
+        for field in self.fields: self.fields[field].widget.attrs.update({'class': 'form-control form-control-sm'})
+
+    def apply(self, loads):
+        if not self.is_valid(): return loads
+        f = self.cleaned_data
+        if f['status']: loads = loads.filter(status=f['status'])
+        if f['driver']: loads = loads.filter(driver=f['driver'])
+        # Compare against day boundaries rather than pickup_date__date so the index range still applies
+        if f['pickup_from']: loads = loads.filter(pickup_date__gte=day_start(f['pickup_from']))
+        if f['pickup_to']: loads = loads.filter(pickup_date__lt=day_start(f['pickup_to'] + timedelta(days=1)))
+        return loads
+
+
+# --- 6. DOCUMENT CENTER FILTERS ---
+class DocumentFilterForm(forms.Form):
+    owner_type = forms.ChoiceField(required=False, choices=[('', 'All owners')] + Document.OWNER_TYPES)
+    kind = forms.ChoiceField(required=False, choices=[('', 'All documents')] + Document.KINDS)
+    q = forms.CharField(required=False, max_length=100, widget=forms.TextInput(attrs={'placeholder': 'Search driver, load ref or file'}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields: self.fields[field].widget.attrs.update({'class': 'form-control form-control-sm'})
+
+    def apply(self, docs):
+        if not self.is_valid(): return docs
+        f = self.cleaned_data
+        if f['owner_type']: docs = docs.filter(owner_type=f['owner_type'])
+        if f['kind']: docs = docs.filter(kind=f['kind'])
+        if f['q']: docs = docs.filter(Q(owner_label__icontains=f['q']) | Q(name__icontains=f['q']))
+        return docs
+
+
+# --- 7. ACCOUNTING EXPORT ---
+class LoadExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], initial='csv', required=False)
+    status = forms.MultipleChoiceField(required=False, choices=Load._meta.get_field('status').choices)
+    pickup_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    pickup_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def apply(self, loads):
+        f = self.cleaned_data
+        if f['status']: loads = loads.filter(status__in=f['status'])
+        if f['pickup_from']: loads = loads.filter(pickup_date__gte=day_start(f['pickup_from']))
+        if f['pickup_to']: loads = loads.filter(pickup_date__lt=day_start(f['pickup_to'] + timedelta(days=1)))
+        return loads
@@ -0,0 +1,59 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+# --- TEMPLATE FRAGMENT CACHE ---
+# Each company has a generation token; every fragment key embeds it, so a Load,
+# Driver, Company or Document write invalidates all of the company's fragments by
+# replacing one cache entry. Stale fragments are never deleted, they just stop
+# being read and age out. Tokens are random rather than incremented so concurrent
+# bumps can't collapse into one (FileBasedCache has no atomic incr).
+
+GENERATION_TIMEOUT = None  # kept until evicted; a lost token just means one round of misses
+FRAGMENT_TIMEOUT = 3600
+STATS_KEYS = {'hit': 'fragments:hits', 'miss': 'fragments:misses'}
+
+
+def generation_key(company_id): return f"fragments:gen:{company_id}"
+
+
+def generation(company_id):
+    gen = cache.get(generation_key(company_id))
+    if gen is None:
+        cache.add(generation_key(company_id), uuid.uuid4().hex, GENERATION_TIMEOUT)
+        gen = cache.get(generation_key(company_id))
+    return gen
+
+
+def bump(company_id):
+    """Invalidate the company's fragments now and again once the current transaction commits.
+
+    The first bump keeps this request from re-reading what it just changed; the second
+    drops anything another request cached from pre-commit data in between.
+    """
+    renew = lambda: cache.set(generation_key(company_id), uuid.uuid4().hex, GENERATION_TIMEOUT)
+    renew()
+    transaction.on_commit(renew)
+
+
+def fragment_key(company_id, name, vary_on):
+    vary = hashlib.md5(repr(vary_on).encode()).hexdigest()
+    return f"fragments:{company_id}:{generation(company_id)}:{name}:{vary}"
+
+
+def count(outcome):
+    key = STATS_KEYS[outcome]
+    if not cache.add(key, 1, None):
+        try: cache.incr(key)
+        except ValueError: cache.add(key, 1, None)  # evicted between add() and incr()
+
+
+def stats():
+    hits, misses = (cache.get(STATS_KEYS[k]) or 0 for k in ('hit', 'miss'))
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': round(100 * hits / total, 1) if total else 0}
+
+
+def reset_stats(): cache.delete_many(list(STATS_KEYS.values()))
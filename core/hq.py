@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .entitlements import plan_for, price_expression
+from .models import Company
+
+# --- HQ ANALYTICS ---
+# Platform KPIs come from two aggregate queries and are cached as a short-lived
+# snapshot; any Company save drops it (see core.signals).
+
+SNAPSHOT_KEY = 'hq:snapshot'
+SNAPSHOT_TIMEOUT = 60
+EXPIRING_WINDOW = timedelta(days=7)
+CHURN_WINDOW = timedelta(days=30)
+
+
+def compute_snapshot(now=None):
+    now = now or timezone.now()
+    # The buckets are disjoint: a company whose end date has passed counts as churned even if the
+    # expiry sweep hasn't switched it off yet, and one awaiting payment approval only as pending.
+    active = Q(is_active=True) & (Q(subscription_end_date__isnull=True) | Q(subscription_end_date__gte=now))
+    pending = Q(is_active=False, payment_submitted_at__isnull=False)
+    churned = Q(subscription_end_date__gte=now - CHURN_WINDOW, subscription_end_date__lt=now) & ~pending  # lapsed in the window
+    stats = Company.objects.aggregate(
+        total_clients=Count('id', filter=active),
+        mrr=Sum(price_expression(), filter=active),
+        pending_count=Count('id', filter=pending),
+        expiring_soon=Count('id', filter=active & Q(subscription_end_date__gte=now, subscription_end_date__lt=now + EXPIRING_WINDOW)),
+        churned_30d=Count('id', filter=churned),
+    )
+    stats['mrr'] = stats['mrr'] or 0
+    base = stats['total_clients'] + stats['churned_30d']
+    stats['churn_rate'] = round(100 * stats['churned_30d'] / base, 1) if base else 0
+
+    mix = {}
+    for row in Company.objects.filter(active).values('plan_type').annotate(n=Count('id')).order_by():
+        label = plan_for(row['plan_type']).label
+        mix[label] = mix.get(label, 0) + row['n']
+    stats['plan_mix'] = sorted(mix.items(), key=lambda kv: -kv[1])
+    stats['computed_at'] = now
+    return stats
+
+
+def snapshot():
+    stats = cache.get(SNAPSHOT_KEY)
+    if stats is None:
+        stats = compute_snapshot()
+        cache.set(SNAPSHOT_KEY, stats, SNAPSHOT_TIMEOUT)
+    return stats
+
+
+def invalidate(): cache.delete(SNAPSHOT_KEY)
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .pdf import Canvas, PAGE_WIDTH, PAGE_HEIGHT
+
+# --- INVOICE PDFs ---
+# A PDF is cached in storage under invoices/<company>/<load>/<version>.pdf where the
+# version hashes every field printed on it, so editing a load (or the company's
+# letterhead) naturally produces a new file and repeat downloads are a file read.
+
+BATCH_WORKERS = 4
+AHEAD = 2  # loads queued per worker while streaming a batch
+LOAD_FIELDS = ('id', 'load_ref', 'broker_name', 'broker_mc', 'origin', 'destination', 'pickup_date', 'delivery_date', 'miles', 'rate')
+COMPANY_FIELDS = ('name', 'address', 'city', 'state', 'zip_code', 'phone')
+
+
+def content_version(load, company):
+    raw = '|'.join(str(getattr(load, f)) for f in LOAD_FIELDS) + '||' + '|'.join(str(getattr(company, f)) for f in COMPANY_FIELDS)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def filename(load): return f"INV-{load.id}.pdf"
+
+
+def _local(dt): return timezone.localtime(dt) if timezone.is_aware(dt) else dt
+
+
+def render(load, company):
+    c = Canvas()
+    left, right, top = 50, PAGE_WIDTH - 50, PAGE_HEIGHT - 60
+
+    c.text(left, top, company.name, size=20, bold=True)
+    y = top - 20
+    for line in (company.address, ' '.join(p for p in (company.city, company.state, company.zip_code) if p), company.phone):
+        if line: c.text(left, y, line, size=10, gray=0.4); y -= 14
+    c.text(right, top, 'INVOICE', size=30, bold=True, gray=0.8, align='right')
+    c.text(right, top - 28, f"Invoice #: INV-{load.id}", size=10, align='right')
+    c.text(right, top - 42, f"Date: {_local(load.delivery_date):%B %d, %Y}", size=10, align='right')
+    c.line(left, top - 70, right, top - 70, width=2)
+
+    y = top - 105
+    c.text(left, y, 'BILL TO:', size=9, bold=True, gray=0.4)
+    c.text(left, y - 20, load.broker_name or '-', size=14)
+    c.text(left, y - 38, f"MC #: {load.broker_mc}", size=10)
+    c.text(left, y - 52, f"Load Ref #: {load.load_ref}", size=10)
+    c.text(left, y - 66, 'Payment Terms: Net 30', size=10)
+
+    y -= 110
+    c.rect(left, y, right - left, 22)
+    c.text(left + 10, y + 7, 'DESCRIPTION', size=9, bold=True, gray=1)
+    c.text(400, y + 7, 'MILES', size=9, bold=True, gray=1, align='center')
+    c.text(right - 10, y + 7, 'AMOUNT', size=9, bold=True, gray=1, align='right')
+    c.text(left + 10, y - 20, 'Freight Charge', size=11, bold=True)
+    c.text(left + 10, y - 35, f"Route: {load.origin} -> {load.destination}", size=9, gray=0.4)
+    c.text(left + 10, y - 48, f"Pickup Date: {_local(load.pickup_date):%b %d, %Y %H:%M}", size=9, gray=0.4)
+    c.text(400, y - 20, load.miles, size=11, align='center')
+    c.text(right - 10, y - 20, f"${load.rate}", size=11, bold=True, align='right')
+    c.line(left, y - 62, right, y - 62, gray=0.7)
+
+    y -= 110
+    c.rect(right - 200, y - 8, 200, 30)
+    c.text(right - 10, y + 2, f"TOTAL: ${load.rate}", size=14, bold=True, gray=1, align='right')
+
+    c.text(PAGE_WIDTH / 2, y - 60, 'Thank you for your business!', size=10, gray=0.4, align='center')
+    c.text(PAGE_WIDTH / 2, y - 74, f"Please make checks payable to {company.name}", size=10, gray=0.4, align='center')
+    c.text(PAGE_WIDTH / 2, 40, 'Powered by DispatchNexus', size=8, gray=0.6, align='center')
+    return c.render(title=f"Invoice INV-{load.id}")
+
+
+def cached_path(load, company):
+    """Storage name of the load's current invoice PDF, rendering it on a cache miss.
+
+    Concurrent misses each render into their own temp file and os.replace() it over the
+    name, so a reader never sees a partial PDF and no request deletes the one another
+    is serving; cleanup removes only other versions and ignores ones already gone.
+    """
+    folder = f"invoices/{company.pk}/{load.pk}"
+    current = f"{content_version(load, company)}.pdf"
+    name = f"{folder}/{current}"
+    if default_storage.exists(name): return name
+    directory = default_storage.path(folder)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f: f.write(render(load, company))
+        if default_storage.file_permissions_mode is not None: os.chmod(tmp, default_storage.file_permissions_mode)
+        os.replace(tmp, os.path.join(directory, current))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    for old in os.listdir(directory):
+        if old.endswith('.pdf') and old != current:
+            try: os.remove(os.path.join(directory, old))
+            except FileNotFoundError: pass  # another request cleaned it up first
+    return name
+
+
+# --- BATCH ---
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer that zipfile streams into; drained after each member."""
+    def __init__(self): self.chunks = []
+    def writable(self): return True
+    def write(self, b): self.chunks.append(bytes(b)); return len(b)
+    def drain(self):
+        data = b''.join(self.chunks); self.chunks.clear(); return data
+
+
+def stream_zip(loads, company, workers=BATCH_WORKERS):
+    """Yield a ZIP of invoice PDFs for `loads`, rendering cache misses in a thread pool.
+
+    Only a window of AHEAD * workers loads is submitted ahead of the member being written
+    (Executor.map would drain the whole iterator first), so the first PDF goes out as soon
+    as it is ready and memory stays flat however large the batch.
+    """
+    sink = _Sink()
+    loads = iter(loads)
+    submit = lambda l: pool.submit(lambda: (l, cached_path(l, company)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        window = deque(submit(l) for l in islice(loads, AHEAD * workers))
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zf:
+            while window:
+                load, path = window.popleft().result()
+                window.extend(submit(l) for l in islice(loads, 1))
+                with default_storage.open(path) as f: zf.writestr(filename(load), f.read())
+                yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from . import fragments
+from .models import Load
+
+# --- LANE ANALYTICS ---
+# A company's loads are read once, as one values_list stream, into columnar NumPy
+# arrays; lanes (origin -> destination) and brokers are integer-coded and every
+# per-group figure is a bincount or a sort, never a Python loop over loads.
+# Results are cached under the company's fragment generation, which every load
+# write replaces (see core.fragments).
+
+HISTORY_DAYS = 365
+PERCENTILES = (25, 50, 75)
+CACHE_TIMEOUT = 24 * 3600
+
+
+class Columns:
+    """One company's loads as parallel arrays."""
+    def __init__(self, origin, destination, broker, rate, miles, expenses):
+        self.origin, self.destination, self.broker = origin, destination, broker
+        self.rate, self.miles, self.expenses = rate, miles, expenses
+
+    def __len__(self): return len(self.rate)
+
+
+def load_columns(company_id, since=None):
+    loads = Load.objects.filter(company_id=company_id)
+    if since is not None: loads = loads.filter(pickup_date__gte=since)
+    rows = list(loads.values_list('origin', 'destination', 'broker_name', Cast('rate', FloatField()), 'miles',
+                                  Cast('expenses', FloatField())).iterator(chunk_size=5000))
+    if not rows: return Columns(*(np.array([], dtype=t) for t in (str, str, str, float, float, float)))
+    origin, destination, broker, rate, miles, expenses = zip(*rows)
+    return Columns(np.array(origin, dtype=str), np.array(destination, dtype=str), np.array(broker, dtype=str),
+                   np.array(rate, dtype=float), np.array(miles, dtype=float), np.array(expenses, dtype=float))
+
+
+def group_stats(codes, n_groups, cols):
+    """Per-group volume, totals, weighted $/mile and per-load $/mile percentiles."""
+    count = np.bincount(codes, minlength=n_groups)
+    revenue = np.bincount(codes, weights=cols.rate, minlength=n_groups)
+    expenses = np.bincount(codes, weights=cols.expenses, minlength=n_groups)
+    miles = np.bincount(codes, weights=cols.miles, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rpm = np.where(miles > 0, revenue / miles, np.nan)
+        ppm = np.where(miles > 0, (revenue - expenses) / miles, np.nan)
+
+    # percentiles of each load's $/mile: sort by (group, value), then index into each group's run
+    has_miles = cols.miles > 0
+    g, v = codes[has_miles], cols.rate[has_miles] / cols.miles[has_miles]
+    order = np.lexsort((v, g))
+    g, v = g[order], v[order]
+    sizes = np.bincount(g, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    pct = {}
+    for q in PERCENTILES:
+        if not len(v): pct[q] = np.full(n_groups, np.nan); continue
+        pos = starts + (sizes - 1).clip(min=0) * (q / 100)
+        lo = np.floor(pos).astype(int).clip(max=len(v) - 1)
+        hi = np.ceil(pos).astype(int).clip(max=len(v) - 1)
+        pct[q] = np.where(sizes > 0, v[lo] + (v[hi] - v[lo]) * (pos - np.floor(pos)), np.nan)
+    return {'loads': count, 'revenue': revenue, 'expenses': expenses, 'miles': miles, 'rpm': rpm, 'ppm': ppm,
+            **{f'rpm_p{q}': pct[q] for q in PERCENTILES}}
+
+
+def _rows(labels, stats, order_by='loads'):
+    """One dict per group, largest `order_by` first, with NaN as None and money/ratios rounded to cents."""
+    order = np.argsort(-stats[order_by], kind='stable')
+    columns = {}
+    for k, v in stats.items():
+        v = v[order]
+        columns[k] = np.where(np.isnan(v), None, v.round(2)).tolist() if v.dtype.kind == 'f' else v.tolist()
+    labels = [labels[i] for i in order.tolist()]
+    return [dict(zip(columns, values), **label) for values, label in zip(zip(*columns.values()), labels)]
+
+
+def encode(*columns):
+    """Integer code per row for the combination of text columns (trimmed, case-insensitive), plus one row index per code."""
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for col in columns:
+        raw, inverse = np.unique(col, return_inverse=True)
+        keys, merged = np.unique(np.char.upper(np.char.strip(raw)), return_inverse=True)  # normalise distinct values only
+        codes = codes * len(keys) + merged[inverse]
+    keys, codes = np.unique(codes, return_inverse=True)
+    first = np.full(len(keys), len(codes))
+    np.minimum.at(first, codes, np.arange(len(codes)))  # first row of each group, for its display label
+    return codes, len(keys), first
+
+
+def analyze(cols):
+    if not len(cols): return {'lanes': [], 'brokers': [], 'loads': 0}
+    lane_codes, n_lanes, first = encode(cols.origin, cols.destination)
+    lane_labels = [{'origin': str(cols.origin[i]), 'destination': str(cols.destination[i])} for i in first]
+    broker_codes, n_brokers, first = encode(cols.broker)
+    broker_labels = [{'broker': str(cols.broker[i]) or '(no broker)'} for i in first]
+    return {
+        'lanes': _rows(lane_labels, group_stats(lane_codes, n_lanes, cols)),
+        'brokers': _rows(broker_labels, group_stats(broker_codes, n_brokers, cols)),
+        'loads': len(cols),
+    }
+
+
+def for_company(company_id, days=HISTORY_DAYS):
+    """Lane and broker analytics over the last `days` of pickups, cached until a load changes."""
+    key = f"lanes:{company_id}:{fragments.generation(company_id)}:{days}"
+    result = cache.get(key)
+    if result is None:
+        result = analyze(load_columns(company_id, since=timezone.now() - timedelta(days=days)))
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
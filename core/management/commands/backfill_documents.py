@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core import documents
+from core.models import Document
+from core.storage import dedup_storage
+
+
+class Command(BaseCommand):
+    help = "Build the Document index from files already stored on Company, Driver and Load rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **opts):
+        written = 0
+        for model, owner_type in documents.OWNER_TYPES.items():
+            has_file = Q()
+            for f in documents.file_fields(model): has_file |= ~Q(**{f.name: ''}) & Q(**{f'{f.name}__isnull': False})
+            for instance in model.objects.filter(has_file).iterator(chunk_size=opts['chunk_size']):
+                written += documents.sync(instance, use_mtime=True)
+            self.stdout.write(f"{owner_type}: indexed")
+
+        indexed = set(Document.objects.values_list('name', flat=True))
+        orphans = [p for p in dedup_storage.stored_names() if p not in indexed]
+        for path in orphans: self.stdout.write(f"unreferenced: {path}")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} document rows; {len(orphans)} media files are not referenced by any record."))
+
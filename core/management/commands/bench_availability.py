@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.availability import IntervalIndex
+
+HOUR = 3600
+
+
+class Command(BaseCommand):
+    help = "Time the driver availability index against a linear scan on synthetic trucks and loads (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trucks', type=int, default=5000)
+        parser.add_argument('--loads', type=int, default=50000)
+        parser.add_argument('--days', type=int, default=90, help="span the loads are spread over")
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts['seed'])
+        horizon = opts['days'] * 24 * HOUR
+        rows = []
+        for i in range(opts['loads']):
+            start = rng.uniform(0, horizon)
+            rows.append((i, rng.randrange(opts['trucks']), start, start + rng.uniform(4, 72) * HOUR))
+        windows = []
+        for _ in range(opts['queries']):
+            start = rng.uniform(0, horizon)
+            windows.append((start, start + rng.uniform(4, 72) * HOUR))
+
+        t = time.perf_counter()
+        index = IntervalIndex(rows)
+        built = time.perf_counter() - t
+
+        t = time.perf_counter()
+        indexed = [index.busy(s, e) for s, e in windows]
+        per_query = (time.perf_counter() - t) / len(windows)
+
+        t = time.perf_counter()
+        scanned = []
+        for s, e in windows:
+            busy = {}
+            for _, d, rs, re_ in rows:
+                if rs < e and re_ > s and re_ > busy.get(d, float('-inf')): busy[d] = re_
+            scanned.append(busy)
+        per_scan = (time.perf_counter() - t) / len(windows)
+
+        if indexed != scanned: raise AssertionError("index and scan disagree")
+        busy = sum(len(b) for b in indexed) / len(indexed)
+        self.stdout.write(f"{opts['trucks']} trucks, {opts['loads']} open loads, {opts['queries']} windows "
+                          f"over {opts['days']} days (avg {busy:.0f} trucks busy per window)")
+        self.stdout.write(f"build:  {built * 1000:.1f} ms")
+        self.stdout.write(f"index:  {per_query * 1e6:.0f} us/query")
+        self.stdout.write(f"scan:   {per_scan * 1e6:.0f} us/query")
+        self.stdout.write(self.style.SUCCESS(f"{per_scan / per_query:.0f}x faster than a scan; results identical."))
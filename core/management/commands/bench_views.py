@@ -0,0 +1,40 @@
+import os
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import benchmarks
+from core.models import Load
+
+
+class Command(BaseCommand):
+    help = "Time the core views on the current database and check them against a saved JSON baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', help="JSON file to compare with (or write, with --save).")
+        parser.add_argument('--save', action='store_true', help="Record this run as the new baseline.")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--threshold', type=float, default=benchmarks.THRESHOLD, help="allowed p95/memory growth, e.g. 0.25")
+        parser.add_argument('--cold', action='store_true', help="Clear the cache before every request.")
+        parser.add_argument('--view', action='append', dest='views', choices=[name for name, _ in benchmarks.VIEWS])
+
+    def handle(self, *args, **opts):
+        if opts['save'] and not opts['baseline']: raise CommandError("--save needs --baseline PATH.")
+        try: results = benchmarks.run(opts['views'], opts['iterations'], opts['cold'])
+        except benchmarks.BenchmarkError as e: raise CommandError(e)
+
+        self.stdout.write(f"{'view':<18}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'peak KB':>9}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<18}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['queries']:>9}{r['peak_kb']:>9}")
+
+        if opts['save']:
+            benchmarks.save_baseline(opts['baseline'], results, recorded_at=timezone.now().isoformat(), loads=Load.objects.count(),
+                                     iterations=opts['iterations'], cold=opts['cold'], django=django.get_version())
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {opts['baseline']}."))
+        elif opts['baseline']:
+            if not os.path.exists(opts['baseline']): raise CommandError(f"No baseline at {opts['baseline']}; record one with --save.")
+            problems = benchmarks.compare(results, benchmarks.load_baseline(opts['baseline']), opts['threshold'])
+            for p in problems: self.stdout.write(self.style.ERROR(p))
+            if problems: raise CommandError(f"{len(problems)} regressions against {opts['baseline']}.")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {opts['baseline']}."))
@@ -0,0 +1,22 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from core import thumbnails
+from core.models import Document
+from core.storage import dedup_storage
+
+
+class Command(BaseCommand):
+    help = "Build missing image previews for every indexed document (run backfill_documents first on old data)."
+
+    def handle(self, *args, **opts):
+        names = Document.objects.filter(content_type__startswith='image/').values_list('name', flat=True).distinct()
+        futures, skipped, failed = {}, 0, 0
+        for name in names.iterator():
+            if dedup_storage.exists(thumbnails.preview_name(name)): skipped += 1; continue
+            futures[thumbnails.schedule(name)] = name
+        for future in as_completed(futures):
+            if future.exception():
+                failed += 1; self.stderr.write(f"{futures[future]}: {future.exception()}")
+        self.stdout.write(self.style.SUCCESS(f"Built {len(futures) - failed} previews; {skipped} already existed; {failed} failed."))
@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.storage import dedup_storage, file_digest
+
+
+class Command(BaseCommand):
+    help = "Collapse duplicate files under MEDIA_ROOT into one content-addressed blob each (see core.storage)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be reclaimed.")
+
+    def handle(self, *args, **opts):
+        files = freed = 0
+        seen = {}
+        for name in dedup_storage.stored_names():
+            files += 1
+            if opts['dry_run']:
+                path = dedup_storage.path(name)
+                inodes = seen.setdefault(file_digest(path), set())
+                st = os.stat(path)
+                if inodes and st.st_ino not in inodes: freed += st.st_size
+                inodes.add(st.st_ino)
+                continue
+            freed += dedup_storage.adopt(name)
+
+        blobs, garbage = (0, 0) if opts['dry_run'] else dedup_storage.collect_garbage()
+        verb = "Would free" if opts['dry_run'] else "Freed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {files} files; {verb} {freed / 1024 / 1024:.1f} MB of duplicates; removed {blobs} unreferenced blobs ({garbage / 1024 / 1024:.1f} MB)."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import db
+
+
+class Command(BaseCommand):
+    help = "Switch a SQLite database to write-ahead logging (persistent; run once per database file, e.g. at deploy)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **opts):
+        connection = connections[opts['database']]
+        if connection.vendor != 'sqlite': raise CommandError(f"{opts['database']} is {connection.vendor}, not SQLite.")
+        mode = db.enable_wal(connection)
+        if mode != 'wal': raise CommandError(f"SQLite kept journal_mode={mode}.")
+        self.stdout.write(self.style.SUCCESS(f"{connection.settings_dict['NAME']} uses WAL."))
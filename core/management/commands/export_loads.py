@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+from core.forms import LoadExportForm
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = "Stream a company's loads (paid included) as CSV or NDJSON to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('company', type=int, help="Company id.")
+        parser.add_argument('--format', choices=sorted(exports.CONTENT_TYPES), default='csv')
+        parser.add_argument('--status', action='append', default=[], help="Only this status (repeatable).")
+        parser.add_argument('--from', dest='pickup_from', help="First pickup day, YYYY-MM-DD.")
+        parser.add_argument('--to', dest='pickup_to', help="Last pickup day, YYYY-MM-DD.")
+        parser.add_argument('--output', help="File to write; defaults to stdout.")
+
+    def handle(self, *args, **opts):
+        company = Company.objects.filter(pk=opts['company']).first()
+        if company is None: raise CommandError(f"Company {opts['company']} does not exist.")
+        form = LoadExportForm({'format': opts['format'], 'status': opts['status'],
+                               'pickup_from': opts['pickup_from'], 'pickup_to': opts['pickup_to']})
+        if not form.is_valid(): raise CommandError(form.errors.as_text())
+
+        lines = exports.stream(form.apply(exports.loads_for(company)), opts['format'])
+        if not opts['output']:
+            for line in lines: self.stdout.write(line, ending='')
+            return
+        with open(opts['output'], 'w', newline='', encoding='utf-8') as f:
+            f.writelines(lines)
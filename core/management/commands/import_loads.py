@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importer
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = "Import loads for a company from a CSV file (columns named like LoadForm fields, plus truck_number)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('company', type=int, help="Company id.")
+        parser.add_argument('path', help="CSV file to import.")
+        parser.add_argument('--chunk-size', type=int, default=importer.CHUNK_SIZE)
+
+    def handle(self, *args, **opts):
+        company = Company.objects.filter(pk=opts['company']).first()
+        if company is None: raise CommandError(f"Company {opts['company']} does not exist.")
+        with open(opts['path'], 'rb') as f:
+            result = importer.import_loads(company, importer.open_csv(f), chunk_size=opts['chunk_size'])
+
+        for line, errors in result.errors:
+            self.stdout.write(f"line {line}: " + "; ".join(f"{col}: {' '.join(msgs)}" for col, msgs in errors.items()))
+        if result.truncated: self.stdout.write(f"... {result.failed - len(result.errors)} more rejected rows not shown")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created} loads, rejected {result.failed}."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rollups
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = "Rebuild CompanyDailyStats from live Load rows, or verify them with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help="Only this company id.")
+        parser.add_argument('--check', action='store_true', help="Compare rollups against live data without writing.")
+
+    def handle(self, *args, **opts):
+        company = None
+        if opts['company']:
+            company = Company.objects.filter(pk=opts['company']).first()
+            if company is None: raise CommandError(f"Company {opts['company']} does not exist.")
+
+        if not opts['check']:
+            n = rollups.refresh(company)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {n} rollup rows."))
+
+        mismatches = rollups.drift(company)
+        for (cid, day, status), (stored, live) in sorted(mismatches.items(), key=str):
+            self.stdout.write(f"company={cid} day={day} status={status} stored={stored} live={live}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup rows disagree with live data.")
+        self.stdout.write(self.style.SUCCESS("Rollups match live data."))
@@ -0,0 +1,120 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import rollups
+from core.entitlements import plan_for
+from core.models import Company, CompanyUsage, Document, Driver, Load, UserProfile
+
+CITIES = [
+    'Dallas, TX', 'Houston, TX', 'Austin, TX', 'San Antonio, TX', 'El Paso, TX', 'Atlanta, GA', 'Savannah, GA', 'Chicago, IL',
+    'Indianapolis, IN', 'Columbus, OH', 'Memphis, TN', 'Nashville, TN', 'Charlotte, NC', 'Jacksonville, FL', 'Miami, FL',
+    'Orlando, FL', 'Phoenix, AZ', 'Los Angeles, CA', 'Oakland, CA', 'Fresno, CA', 'Denver, CO', 'Kansas City, MO',
+    'St. Louis, MO', 'Omaha, NE', 'Minneapolis, MN', 'Detroit, MI', 'Louisville, KY', 'Newark, NJ', 'Harrisburg, PA',
+    'Laredo, TX', 'Salt Lake City, UT', 'Seattle, WA', 'Portland, OR', 'Reno, NV', 'Oklahoma City, OK', 'Little Rock, AR',
+]
+BROKERS = [
+    'TQL', 'C.H. Robinson', 'Coyote Logistics', 'Echo Global', 'Uber Freight', 'Arrive Logistics', 'RXO', 'Schneider Brokerage',
+    'J.B. Hunt 360', 'Landstar', 'Convoy', 'GlobalTranz', 'Nolan Transportation', 'Redwood', 'Axle Logistics', 'Werner Logistics',
+]
+PLAN_MIX = (('starter', 50), ('pro', 25), ('pro_annual', 10), ('enterprise', 15))
+PLAN_WEIGHT = {'starter': 1, 'pro': 3, 'enterprise': 12}  # bigger plans run bigger fleets
+LOADS_PER_TRUCK = 100  # a year of loads for one truck
+BATCH = 5000
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic tenants, fleets, loads and documents for benchmarking (bulk inserts)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=2000)
+        parser.add_argument('--loads', type=int, default=300000, help="total across all companies")
+        parser.add_argument('--days', type=int, default=365, help="history the loads are spread over")
+        parser.add_argument('--prefix', default='seed', help="username prefix of the generated accounts")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **opts):
+        prefix, rng, now = opts['prefix'], random.Random(opts['seed']), timezone.now()
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Accounts named {prefix}-* already exist; pick another --prefix or use an empty database.")
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            hq = User(username=f'{prefix}-hq', is_staff=True, is_superuser=True); hq.set_unusable_password(); hq.save()
+            owners = User.objects.bulk_create([User(username=f'{prefix}-{i}', password='!') for i in range(opts['companies'])], batch_size=BATCH)
+
+            plans = rng.choices([p for p, _ in PLAN_MIX], weights=[w for _, w in PLAN_MIX], k=len(owners))
+            companies = Company.objects.bulk_create([self.company(rng, now, u, plan) for u, plan in zip(owners, plans)], batch_size=BATCH)
+            UserProfile.objects.bulk_create([UserProfile(user=u, company=c, role='admin') for u, c in zip(owners, companies)], batch_size=BATCH)
+
+            # heavy-tailed fleet sizes: most carriers run a truck or two, a few enterprise fleets run hundreds
+            weights = [rng.paretovariate(1.2) * PLAN_WEIGHT[plan_for(c.plan_type).key] for c in companies]
+            scale = opts['loads'] / sum(weights)
+            sizes = [round(w * scale) for w in weights]
+            fleets = {}
+            drivers = []
+            for c, n in zip(companies, sizes):
+                trucks = max(1, min(plan_for(c.plan_type).fleet_limit, round(n / LOADS_PER_TRUCK)))
+                fleets[c.pk] = [Driver(company=c, name=f'Driver {c.pk}-{j}', phone=f'555-{rng.randrange(10**7):07d}',
+                                       truck_number=f'T{c.pk}-{j:03d}', truck_type=rng.choice(('Dry Van', 'Reefer', 'Flatbed')))
+                                for j in range(trucks)]
+                drivers += fleets[c.pk]
+            Driver.objects.bulk_create(drivers, batch_size=BATCH)
+            CompanyUsage.objects.bulk_create([CompanyUsage(company_id=cid, drivers=len(f)) for cid, f in fleets.items()], batch_size=BATCH)
+
+            written = 0
+            batch = []
+            for c, n in zip(companies, sizes):
+                for _ in range(n):
+                    batch.append(self.load(rng, now, c, fleets[c.pk], opts['days'], f'{prefix}-{written + len(batch)}'))
+                    if len(batch) == BATCH: written += self.flush(batch); batch = []
+            written += self.flush(batch)
+            days = rollups.refresh()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(companies)} companies, {len(drivers)} drivers, {written} loads and {days} rollup rows "
+            f"in {time.perf_counter() - started:.1f}s. HQ login: {hq.username}; tenant logins: {prefix}-0..{len(owners) - 1}."))
+
+    def company(self, rng, now, owner, plan):
+        state = rng.choices(('active', 'pending', 'lapsed'), weights=(85, 5, 10))[0]
+        ends = now + timedelta(days=rng.randint(1, 365)) if state == 'active' else now - timedelta(days=rng.randint(1, 90))
+        return Company(
+            owner=owner, name=f'{owner.username.title()} Freight', dot_number=str(rng.randrange(10**6, 10**7)), plan_type=plan,
+            is_active=state == 'active', subscription_end_date=ends,
+            payment_submitted_at=now - timedelta(hours=rng.randint(1, 72)) if state == 'pending' else None,
+            mc_expiry=(now + timedelta(days=rng.randint(-30, 720))).date(), insurance_expiry=(now + timedelta(days=rng.randint(-30, 365))).date(),
+        )
+
+    def load(self, rng, now, company, fleet, days, ref):
+        pickup = now - timedelta(days=rng.uniform(-14, days))  # a couple of weeks of future bookings
+        delivery = pickup + timedelta(hours=rng.uniform(8, 96))
+        if pickup > now: status = 'booked'
+        elif delivery > now: status = 'active'
+        else: status = 'delivered' if now - delivery < timedelta(days=30) and rng.random() < 0.6 else 'paid'
+        origin, destination = rng.sample(CITIES, 2)
+        miles = rng.randint(120, 2400)
+        rate = Decimal(miles * rng.uniform(1.6, 3.4)).quantize(Decimal('0.01'))
+        broker = rng.choice(BROKERS)
+        return Load(
+            company=company, driver=rng.choice(fleet) if rng.random() < 0.95 else None, load_ref=ref.upper(),
+            broker_name=broker, broker_mc=f'MC{100003 + 7919 * BROKERS.index(broker)}', origin=origin, destination=destination,
+            pickup_date=pickup, delivery_date=delivery, miles=miles, rate=rate,
+            expenses=(rate * Decimal(rng.uniform(0.2, 0.45))).quantize(Decimal('0.01')), status=status,
+            rate_con_file=f'loads/ratecons/{ref}.pdf', pod_file=f'loads/pod/{ref}.jpg' if status in ('delivered', 'paid') else None,
+        )
+
+    def flush(self, batch):
+        Load.objects.bulk_create(batch)
+        Document.objects.bulk_create([
+            Document(company_id=load.company_id, owner_type='load', owner_id=load.pk, owner_label=f"Load #{load.load_ref}", kind=field,
+                     name=getattr(load, field).name, size=180_000 if field == 'rate_con_file' else 900_000,
+                     content_type='application/pdf' if field == 'rate_con_file' else 'image/jpeg', uploaded_at=load.pickup_date)
+            for load in batch for field in ('rate_con_file', 'pod_file') if getattr(load, field)
+        ], batch_size=BATCH)
+        return len(batch)
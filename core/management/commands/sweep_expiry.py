@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import sweeper
+
+
+class Command(BaseCommand):
+    help = "Deactivate lapsed subscriptions and queue subscription and compliance expiry notices."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, metavar='SECONDS', help="Keep running, sweeping at this interval.")
+
+    def handle(self, *args, **opts):
+        while True:
+            counts = sweeper.sweep()
+            self.stdout.write(self.style.SUCCESS(
+                f"Expired {counts['subscription_expired']} subscriptions; "
+                f"{counts['subscription_expiring']} ending soon, {counts['mc_expiring']} MC and "
+                f"{counts['insurance_expiring']} insurance certificates lapsing."))
+            if not opts['every']: return
+            close_old_connections()
+            time.sleep(opts['every'])
@@ -0,0 +1,105 @@
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import thumbnails
+from .models import Document
+from .storage import BLOB_DIR
+
+# --- AUTHORIZED MEDIA ---
+# Every file under MEDIA_URL goes through serve(): the owning company is looked up
+# (Document index, invoice folder, or the original behind a preview), then the file
+# is answered from its stat() alone when the client's copy is current, handed to the
+# front proxy via X-Accel-Redirect when MEDIA_ACCEL_REDIRECT is set, and otherwise
+# streamed with FileResponse (wsgi.file_wrapper / sendfile) or as a single byte range.
+
+RANGE_CHUNK = 64 * 1024
+INVOICE_PATH = re.compile(r'^invoices/(\d+)/')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def owner_company(name):
+    """Id of the company a stored name belongs to, or None if no record references it."""
+    name = thumbnails.original_name(name) or name
+    m = INVOICE_PATH.match(name)
+    if m: return int(m.group(1))
+    return Document.objects.filter(name=name).values_list('company_id', flat=True).first()
+
+
+def authorized(request, name):
+    if name.startswith(f"{BLOB_DIR}/"): return False
+    if request.user.is_superuser: return True
+    return request.tenant is not None and owner_company(name) == request.tenant.company_id
+
+
+def etag_for(st): return quote_etag(f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}")
+
+
+def byte_range(header, size):
+    """(start, end) inclusive for a single-range header, None to send the whole file, or False if unsatisfiable."""
+    m = RANGE.match(header.strip())
+    if not m or not (m.group(1) or m.group(2)): return None  # multi-range or malformed: ignore it
+    if m.group(1):
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+        if start > end: return False
+    else:
+        length = int(m.group(2))
+        if length == 0: return False
+        start, end = max(size - length, 0), size - 1
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(RANGE_CHUNK, length))
+            if not chunk: break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve(request, name, path, content_type):
+    st = os.stat(path)
+    etag, last_modified = etag_for(st), int(st.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _body(request, name, path, st, etag)
+        response['Content-Type'] = content_type
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=3600)
+    return response
+
+
+def _body(request, name, path, st, etag):
+    accel = getattr(settings, 'MEDIA_ACCEL_REDIRECT', '')
+    if accel:
+        # the proxy serves the bytes (and ranges); the worker is released immediately. It
+        # percent-decodes the URI, so spaces, '%', '?' and non-ASCII names must be encoded.
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = f"{accel.rstrip('/')}/{quote(name)}"
+        return response
+
+    header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    span = byte_range(header, st.st_size) if header and (not if_range or if_range == etag) else None
+    if span is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{st.st_size}"
+        return response
+    if span is None:
+        response = FileResponse(open(path, 'rb'))
+    else:
+        start, end = span
+        response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206)
+        response['Content-Range'] = f"bytes {start}-{end}/{st.st_size}"
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_rollups(apps, schema_editor):
+    Load = apps.get_model('core', 'Load')
+    CompanyDailyStats = apps.get_model('core', 'CompanyDailyStats')
+    rows = (Load.objects.annotate(day=TruncDate('pickup_date')).values('company_id', 'day', 'status')
+            .annotate(n=Count('id'), revenue=Sum('rate'), expenses=Sum('expenses'), miles=Sum('miles')).order_by())
+    CompanyDailyStats.objects.bulk_create([
+        CompanyDailyStats(company_id=r['company_id'], day=r['day'], status=r['status'], loads=r['n'],
+                          revenue=r['revenue'] or 0, expenses=r['expenses'] or 0, miles=r['miles'] or 0)
+        for r in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_load_broker_mc_load_broker_name_load_miles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('booked', 'Booked'), ('active', 'In Transit'), ('delivered', 'Delivered'), ('paid', 'Paid')], max_length=20)),
+                ('loads', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('miles', models.BigIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.company')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='companydailystats',
+            constraint=models.UniqueConstraint(fields=('company', 'day', 'status'), name='unique_company_day_status'),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
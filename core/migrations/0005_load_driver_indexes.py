@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_company_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['company', 'truck_number'], name='driver_company_truck_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(('status', 'paid'), _negated=True), fields=['company', '-pickup_date', '-id'], name='load_open_pickup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['company', 'status', '-pickup_date', '-id'], name='load_company_status_pickup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(('status', 'paid'), _negated=True), fields=['driver', '-delivery_date', '-id'], name='load_driver_open_delivery_idx'),
+        ),
+    ]
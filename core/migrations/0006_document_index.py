@@ -0,0 +1,68 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:34
+
+import mimetypes
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def index_existing_files(apps, schema_editor):
+    Document = apps.get_model('core', 'Document')
+    owners = {
+        'company': (apps.get_model('core', 'Company'), lambda o: (o.pk, o.name)),
+        'driver': (apps.get_model('core', 'Driver'), lambda o: (o.company_id, f"{o.name} (Unit {o.truck_number})")),
+        'load': (apps.get_model('core', 'Load'), lambda o: (o.company_id, f"Load #{o.load_ref}")),
+    }
+    docs = []
+    for owner_type, (model, describe) in owners.items():
+        fields = [f.name for f in model._meta.get_fields() if isinstance(f, models.FileField)]
+        for obj in model.objects.iterator():
+            company_id, label = describe(obj)
+            for name in fields:
+                fieldfile = getattr(obj, name)
+                if not fieldfile: continue
+                try:
+                    size = fieldfile.storage.size(fieldfile.name)
+                    uploaded = fieldfile.storage.get_modified_time(fieldfile.name)
+                except OSError:
+                    continue
+                if django.utils.timezone.is_naive(uploaded): uploaded = django.utils.timezone.make_aware(uploaded, dt_timezone.utc)
+                docs.append(Document(company_id=company_id, owner_type=owner_type, owner_id=obj.pk, owner_label=label, kind=name,
+                                     name=fieldfile.name, size=size, content_type=mimetypes.guess_type(fieldfile.name)[0] or '',
+                                     uploaded_at=uploaded))
+    Document.objects.bulk_create(docs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_load_driver_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Document',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_type', models.CharField(choices=[('company', 'Company'), ('driver', 'Driver'), ('load', 'Load')], max_length=10)),
+                ('owner_id', models.BigIntegerField()),
+                ('owner_label', models.CharField(blank=True, max_length=150)),
+                ('kind', models.CharField(choices=[('mc_cert', 'MC Certificate'), ('insurance_cert', 'Insurance Cert'), ('w9_cert', 'W9 Document'), ('payment_receipt', 'Payment Receipt'), ('cdl_file', 'CDL'), ('medical_card_file', 'Medical Card'), ('driver_w9_file', 'Driver W9'), ('registration_file', 'Truck Registration'), ('insurance_file', 'Truck Insurance'), ('ifta_sticker_file', 'IFTA Sticker'), ('rate_con_file', 'Rate Confirmation'), ('bol_file', 'BOL'), ('pod_file', 'POD')], max_length=30)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('uploaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='core.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', '-uploaded_at', '-id'], name='document_company_recent_idx'), models.Index(fields=['company', 'kind', '-uploaded_at', '-id'], name='document_company_kind_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(fields=('owner_type', 'owner_id', 'kind'), name='unique_document_slot'),
+        ),
+        migrations.RunPython(index_existing_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_usage(apps, schema_editor):
+    Company = apps.get_model('core', 'Company')
+    CompanyUsage = apps.get_model('core', 'CompanyUsage')
+    Driver = apps.get_model('core', 'Driver')
+    UserProfile = apps.get_model('core', 'UserProfile')
+    CompanyUsage.objects.bulk_create([
+        CompanyUsage(
+            company_id=company_id,
+            drivers=Driver.objects.filter(company_id=company_id).count(),
+            owner_logins=UserProfile.objects.filter(company_id=company_id, role='owner').count(),
+        )
+        for company_id in Company.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_document_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyUsage',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='usage', serialize=False, to='core.company')),
+                ('drivers', models.IntegerField(default=0)),
+                ('owner_logins', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.0.14 on 2026-10-18 10:00
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_company_usage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='insurance_cert',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='compliance/ins/'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='mc_cert',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='compliance/mc/'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='payment_receipt',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='receipts/'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='w9_cert',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='compliance/w9/'),
+        ),
+        migrations.AlterField(
+            model_name='driver',
+            name='cdl_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='drivers/cdl/'),
+        ),
+        migrations.AlterField(
+            model_name='driver',
+            name='driver_w9_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='drivers/w9/'),
+        ),
+        migrations.AlterField(
+            model_name='driver',
+            name='ifta_sticker_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='trucks/ifta/'),
+        ),
+        migrations.AlterField(
+            model_name='driver',
+            name='insurance_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='trucks/insurance/'),
+        ),
+        migrations.AlterField(
+            model_name='driver',
+            name='medical_card_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='drivers/medical/'),
+        ),
+        migrations.AlterField(
+            model_name='driver',
+            name='registration_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='trucks/registration/'),
+        ),
+        migrations.AlterField(
+            model_name='load',
+            name='bol_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='loads/bol/'),
+        ),
+        migrations.AlterField(
+            model_name='load',
+            name='pod_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='loads/pod/'),
+        ),
+        migrations.AlterField(
+            model_name='load',
+            name='rate_con_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.DedupStorage(), upload_to='loads/ratecons/'),
+        ),
+    ]
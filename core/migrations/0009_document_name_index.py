@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_dedup_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['name'], name='document_name_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-18 10:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_document_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyDataVersion',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_version', serialize=False, to='core.company')),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['company', '-pickup_date', '-id'], name='load_company_pickup_idx'),
+        ),
+    ]
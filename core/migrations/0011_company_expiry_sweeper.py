@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-18 10:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_company_data_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('subscription_expired', 'Subscription expired'), ('subscription_expiring', 'Subscription expiring'), ('mc_expiring', 'MC certificate expiring'), ('insurance_expiring', 'Insurance expiring')], max_length=30)),
+                ('due', models.DateField()),
+                ('message', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subscription_end_date'], name='company_active_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['mc_expiry'], name='company_mc_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['insurance_expiry'], name='company_insurance_expiry_idx'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='core.company'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['created_at', 'id'], name='notification_unsent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('company', 'kind', 'due'), name='unique_notification'),
+        ),
+    ]
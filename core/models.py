@@ -1,7 +1,10 @@
+from django.core.files.storage import default_storage
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+from .storage import dedup_storage
+from . import thumbnails
 
 # --- 1. COMPANY ---
 class Company(models.Model):
@@ -15,19 +18,27 @@ class Company(models.Model):
     zip_code = models.CharField(max_length=20, blank=True)
     
     # Compliance
-    mc_cert = models.FileField(upload_to='compliance/mc/', blank=True, null=True)
+    mc_cert = models.FileField(upload_to='compliance/mc/', storage=dedup_storage, blank=True, null=True)
     mc_expiry = models.DateField(null=True, blank=True)
-    insurance_cert = models.FileField(upload_to='compliance/ins/', blank=True, null=True)
+    insurance_cert = models.FileField(upload_to='compliance/ins/', storage=dedup_storage, blank=True, null=True)
     insurance_expiry = models.DateField(null=True, blank=True)
-    w9_cert = models.FileField(upload_to='compliance/w9/', blank=True, null=True)
+    w9_cert = models.FileField(upload_to='compliance/w9/', storage=dedup_storage, blank=True, null=True)
 
     # SaaS
     plan_type = models.CharField(max_length=20, choices=[('starter', 'Starter'), ('pro', 'Pro'), ('enterprise', 'Enterprise')], default='starter')
     is_active = models.BooleanField(default=False)
     subscription_end_date = models.DateTimeField(null=True, blank=True)
-    payment_receipt = models.ImageField(upload_to='receipts/', blank=True, null=True)
+    payment_receipt = models.ImageField(upload_to='receipts/', storage=dedup_storage, blank=True, null=True)
     payment_submitted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Expiry sweeper: active subscriptions by end date, compliance documents by expiry
+            models.Index(fields=['subscription_end_date'], condition=models.Q(is_active=True), name='company_active_end_idx'),
+            models.Index(fields=['mc_expiry'], name='company_mc_expiry_idx'),
+            models.Index(fields=['insurance_expiry'], name='company_insurance_expiry_idx'),
+        ]
+
     @property
     def days_remaining(self):
         if self.subscription_end_date and self.is_active:
@@ -37,6 +48,7 @@ class Company(models.Model):
 
     @property
     def has_access(self):
+        # core.sweeper switches lapsed subscriptions off hourly; the end date still counts until it runs
         if not self.is_active: return False
         if self.subscription_end_date and self.subscription_end_date < timezone.now(): return False
         return True
@@ -56,9 +68,9 @@ class Driver(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     
     # Driver Docs
-    cdl_file = models.FileField(upload_to='drivers/cdl/', blank=True, null=True)
-    medical_card_file = models.FileField(upload_to='drivers/medical/', blank=True, null=True)
-    driver_w9_file = models.FileField(upload_to='drivers/w9/', blank=True, null=True)
+    cdl_file = models.FileField(upload_to='drivers/cdl/', storage=dedup_storage, blank=True, null=True)
+    medical_card_file = models.FileField(upload_to='drivers/medical/', storage=dedup_storage, blank=True, null=True)
+    driver_w9_file = models.FileField(upload_to='drivers/w9/', storage=dedup_storage, blank=True, null=True)
 
     # Truck Info
     truck_number = models.CharField(max_length=50)
@@ -66,9 +78,12 @@ class Driver(models.Model):
     status = models.CharField(max_length=20, default='Active')
 
     # Truck Docs
-    registration_file = models.FileField(upload_to='trucks/registration/', blank=True, null=True)
-    insurance_file = models.FileField(upload_to='trucks/insurance/', blank=True, null=True)
-    ifta_sticker_file = models.FileField(upload_to='trucks/ifta/', blank=True, null=True)
+    registration_file = models.FileField(upload_to='trucks/registration/', storage=dedup_storage, blank=True, null=True)
+    insurance_file = models.FileField(upload_to='trucks/insurance/', storage=dedup_storage, blank=True, null=True)
+    ifta_sticker_file = models.FileField(upload_to='trucks/ifta/', storage=dedup_storage, blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['company', 'truck_number'], name='driver_company_truck_idx')]
     
     def __str__(self): return self.name
 
@@ -97,10 +112,134 @@ class Load(models.Model):
     ])
     
     # Docs
-    rate_con_file = models.FileField(upload_to='loads/ratecons/', blank=True, null=True)
-    bol_file = models.FileField(upload_to='loads/bol/', blank=True, null=True)
-    pod_file = models.FileField(upload_to='loads/pod/', blank=True, null=True)
+    rate_con_file = models.FileField(upload_to='loads/ratecons/', storage=dedup_storage, blank=True, null=True)
+    bol_file = models.FileField(upload_to='loads/bol/', storage=dedup_storage, blank=True, null=True)
+    pod_file = models.FileField(upload_to='loads/pod/', storage=dedup_storage, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Load board: open loads per company, newest pickup first
+            models.Index(fields=['company', '-pickup_date', '-id'], condition=~models.Q(status='paid'), name='load_open_pickup_idx'),
+            # JSON API: every load per company, newest pickup first
+            models.Index(fields=['company', '-pickup_date', '-id'], name='load_company_pickup_idx'),
+            # Load board filtered to one status
+            models.Index(fields=['company', 'status', '-pickup_date', '-id'], name='load_company_status_pickup_idx'),
+            # Fleet schedule: latest open load per driver
+            models.Index(fields=['driver', '-delivery_date', '-id'], condition=~models.Q(status='paid'), name='load_driver_open_delivery_idx'),
+        ]
 
     @property
     def net_profit(self):
-        return self.rate - self.expenses
\ No newline at end of file
+        return self.rate - self.expenses
+
+# --- 5. KPI ROLLUPS ---
+class CompanyDailyStats(models.Model):
+    """Per-company, per-pickup-day, per-status totals kept in step with Load writes (see core.rollups)."""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Load._meta.get_field('status').choices)
+    loads = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    miles = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['company', 'day', 'status'], name='unique_company_day_status')]
+
+    @property
+    def profit(self):
+        return self.revenue - self.expenses
+
+    def __str__(self): return f"{self.company} {self.day} {self.status}"
+
+
+# --- 6. DOCUMENT INDEX ---
+class Document(models.Model):
+    """One row per stored file on a Company, Driver or Load FileField (kept in sync by core.documents)."""
+    OWNER_TYPES = [('company', 'Company'), ('driver', 'Driver'), ('load', 'Load')]
+    KINDS = [
+        ('mc_cert', 'MC Certificate'), ('insurance_cert', 'Insurance Cert'), ('w9_cert', 'W9 Document'), ('payment_receipt', 'Payment Receipt'),
+        ('cdl_file', 'CDL'), ('medical_card_file', 'Medical Card'), ('driver_w9_file', 'Driver W9'),
+        ('registration_file', 'Truck Registration'), ('insurance_file', 'Truck Insurance'), ('ifta_sticker_file', 'IFTA Sticker'),
+        ('rate_con_file', 'Rate Confirmation'), ('bol_file', 'BOL'), ('pod_file', 'POD'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='documents')
+    owner_type = models.CharField(max_length=10, choices=OWNER_TYPES)
+    owner_id = models.BigIntegerField()
+    owner_label = models.CharField(max_length=150, blank=True)
+    kind = models.CharField(max_length=30, choices=KINDS)
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField(default=0)
+    content_type = models.CharField(max_length=100, blank=True)
+    uploaded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['owner_type', 'owner_id', 'kind'], name='unique_document_slot')]
+        indexes = [
+            models.Index(fields=['company', '-uploaded_at', '-id'], name='document_company_recent_idx'),
+            models.Index(fields=['company', 'kind', '-uploaded_at', '-id'], name='document_company_kind_idx'),
+            # Media downloads: stored name -> owning company
+            models.Index(fields=['name'], name='document_name_idx'),
+        ]
+
+    @property
+    def url(self): return default_storage.url(self.name)
+
+    @property
+    def preview_url(self): return thumbnails.preview_url(self.name) if thumbnails.is_image(self.content_type) else None
+
+    def __str__(self): return self.name
+
+
+# --- 7. PLAN USAGE ---
+class CompanyUsage(models.Model):
+    """Counters behind plan quotas (see core.entitlements); updated with conditional UPDATEs."""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True, related_name='usage')
+    drivers = models.IntegerField(default=0)
+    owner_logins = models.IntegerField(default=0)
+
+    def __str__(self): return f"{self.company} usage"
+
+
+# --- 8. API CHANGE STAMPS ---
+class CompanyDataVersion(models.Model):
+    """Bumped on every load/driver write; the JSON API derives ETag and Last-Modified from it (see core.api)."""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True, related_name='data_version')
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self): return f"{self.company} v{self.version}"
+
+
+# --- 9. NOTIFICATION OUTBOX ---
+class Notification(models.Model):
+    """A message waiting to go to a company, queued by the expiry sweeper (see core.sweeper)."""
+    KINDS = [
+        ('subscription_expired', 'Subscription expired'), ('subscription_expiring', 'Subscription expiring'),
+        ('mc_expiring', 'MC certificate expiring'), ('insurance_expiring', 'Insurance expiring'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=30, choices=KINDS)
+    due = models.DateField()  # the expiry date the notice is about
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['company', 'kind', 'due'], name='unique_notification')]
+        indexes = [models.Index(fields=['created_at', 'id'], condition=models.Q(sent_at__isnull=True), name='notification_unsent_idx')]
+
+    def __str__(self): return f"{self.company} {self.kind} {self.due}"
+
+
+# --- 10. API TOKENS ---
+class ApiToken(models.Model):
+    """A bearer key for the JSON API, for clients without a browser session (see core.api). Only its SHA-256 is stored."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)  # which app or integration holds it
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self): return f"{self.user} {self.name or self.digest[:8]}"
@@ -0,0 +1,111 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+# --- KEYSET (CURSOR) PAGINATION ---
+# Pages are addressed by the sort key of their edge row instead of an OFFSET, so
+# page N costs the same index range scan as page 1 and no COUNT(*) is needed.
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder truncates datetimes to milliseconds; cursors need the exact key.
+    def default(self, o):
+        if isinstance(o, datetime.datetime): return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self): return self.next_cursor is not None
+
+    @property
+    def has_previous(self): return self.prev_cursor is not None
+
+    def __iter__(self): return iter(self.object_list)
+
+    def __len__(self): return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Paginates a queryset on a unique ordering such as ('-pickup_date', '-id')."""
+
+    def __init__(self, queryset, ordering, per_page=50):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.fields = [o.lstrip('-') for o in self.ordering]
+        self.per_page = per_page
+
+    # cursor = urlsafe base64 of JSON ["n"|"p", key1, key2, ...]
+    def encode(self, obj, direction):
+        get = obj.get if isinstance(obj, dict) else lambda f: getattr(obj, f)
+        raw = json.dumps([direction] + [get(f) for f in self.fields], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """(direction, key values) from a cursor; anything that is not one we issued raises InvalidCursor."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if not isinstance(data, list) or not data: raise ValueError("not a cursor")
+            direction, values = data[0], data[1:]
+            if direction not in ('n', 'p') or len(values) != len(self.fields): raise ValueError("not a cursor")
+            return direction, [self._key(f, v) for f, v in zip(self.fields, values)]
+        except (ValueError, TypeError, KeyError, IndexError, FieldDoesNotExist, ValidationError) as e:
+            raise InvalidCursor(str(e))
+
+    def _key(self, name, value):
+        field = self.queryset.model._meta.get_field(name)
+        value = field.to_python(value)
+        # keyset comparisons need a value on every key (a NULL can't be ordered against)
+        if value is None: raise ValueError(f"{name} cannot be null")
+        field.run_validators(value)  # e.g. integer range, so the query itself cannot overflow
+        return value
+
+    def _after(self, values, reverse=False):
+        """Rows strictly after `values` in the ordering (or before it when reverse)."""
+        cond = Q()
+        for i, (order, value) in enumerate(zip(self.ordering, values)):
+            desc = order.startswith('-') != reverse
+            step = Q(**{f'{self.fields[i]}__{"lt" if desc else "gt"}': value})
+            for f, v in zip(self.fields[:i], values[:i]): step &= Q(**{f: v})
+            cond |= step
+        # Redundant bound on the leading key lets the planner seek the index instead of filtering from the top
+        lead_desc = self.ordering[0].startswith('-') != reverse
+        return Q(**{f'{self.fields[0]}__{"lte" if lead_desc else "gte"}': values[0]}) & cond
+
+    def page(self, cursor=None):
+        direction, values = self.decode(cursor) if cursor else ('n', None)
+        if direction == 'n':
+            qs = self.queryset.order_by(*self.ordering)
+            if values is not None: qs = qs.filter(self._after(values))
+        else:
+            flipped = [o[1:] if o.startswith('-') else '-' + o for o in self.ordering]
+            qs = self.queryset.order_by(*flipped).filter(self._after(values, reverse=True))
+
+        rows = list(qs[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'p': rows.reverse()
+        if not rows: return KeysetPage(rows)
+
+        # Going forward there is a previous page whenever we started from a cursor;
+        # going backward there is always a next page (the one we came from).
+        has_next = more if direction == 'n' else True
+        has_prev = values is not None if direction == 'n' else more
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode(rows[-1], 'n') if has_next else None,
+            prev_cursor=self.encode(rows[0], 'p') if has_prev else None,
+        )
@@ -0,0 +1,70 @@
+import zlib
+
+# --- MINIMAL PDF WRITER ---
+# Just enough PDF 1.4 for one-page text documents: the base-14 Helvetica fonts
+# (no embedding), lines and filled rectangles. Coordinates are points from the
+# bottom-left corner of a US Letter page.
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, used to right-align text
+_WIDTHS = {
+    False: [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278, 556, 556, 556, 556, 556, 556, 556, 556,
+            556, 556, 278, 278, 584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+            667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556, 333, 556, 556, 500, 556, 556, 278, 556,
+            556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    True: [278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278, 556, 556, 556, 556, 556, 556, 556, 556,
+           556, 556, 333, 333, 584, 584, 584, 611, 975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556, 333, 556, 611, 556, 611, 556, 333, 611,
+           611, 278, 278, 556, 278, 889, 611, 611, 611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+
+
+def text_width(s, size, bold=False):
+    widths = _WIDTHS[bold]
+    return sum(widths[ord(ch) - 32] if 32 <= ord(ch) < 127 else 556 for ch in s) * size / 1000
+
+
+def _escape(s):
+    s = s.encode('cp1252', 'replace').decode('latin-1')
+    return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+class Canvas:
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, s, size=10, bold=False, gray=0, align='left'):
+        s = str(s)
+        if align == 'right': x -= text_width(s, size, bold)
+        elif align == 'center': x -= text_width(s, size, bold) / 2
+        self.ops.append(f"BT {gray:.2f} g /{'F2' if bold else 'F1'} {size} Tf {x:.2f} {y:.2f} Td ({_escape(s)}) Tj ET")
+
+    def line(self, x1, y1, x2, y2, width=1, gray=0):
+        self.ops.append(f"{gray:.2f} G {width} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S")
+
+    def rect(self, x, y, w, h, gray=0):
+        self.ops.append(f"{gray:.2f} g {x:.2f} {y:.2f} {w:.2f} {h:.2f} re f")
+
+    def render(self, title=''):
+        stream = zlib.compress('\n'.join(self.ops).encode('latin-1'))
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> /Contents 4 0 R >>".encode(),
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+            f"<< /Title ({_escape(title)}) /Producer (DispatchNexus) >>".encode('latin-1'),
+        ]
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+        out += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+        return bytes(out)
@@ -0,0 +1,159 @@
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# --- REQUEST PROFILING ---
+# ProfilingMiddleware hooks every database connection's execute() for the length of a
+# request (Django's execute_wrapper, so it works with DEBUG off) and counts queries,
+# SQL time and statements repeated verbatim. Staff responses (every response with
+# SERVER_TIMING_PUBLIC) get a Server-Timing header; requests slower than SLOW_REQUEST_MS
+# go to the 'core.profiling' logger with their costliest statements, through a rotating
+# file handler that creates its directory on first use. Per-endpoint totals are kept in
+# process and published to the cache every PUBLISH_SECONDS, where the HQ performance
+# page merges all workers.
+
+logger = logging.getLogger(__name__)
+
+TOP_STATEMENTS = 5
+PUBLISH_SECONDS = 10
+WORKER_TIMEOUT = 7 * 24 * 3600
+WORKERS_KEY = 'profiling:workers'
+FIELDS = ('requests', 'total_ms', 'max_ms', 'sql_ms', 'queries', 'repeated', 'slow')
+
+_IN_LIST = re.compile(r'\((?:%s, )*%s\)')
+
+
+def fingerprint(sql):
+    """Statement shape: parameters are already placeholders, so only IN-lists of different lengths need folding."""
+    return _IN_LIST.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """execute_wrapper that times statements and groups them by SQL text."""
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}  # sql -> [executions, seconds]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try: return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            entry = self.statements.get(sql)
+            if entry is None: self.statements[sql] = [1, elapsed]
+            else: entry[0] += 1; entry[1] += elapsed
+
+    @property
+    def repeated(self): return self.count - len(self.statements)  # executions of a statement text already seen
+
+    def costliest(self, n=TOP_STATEMENTS):
+        """[(fingerprint, executions, seconds)] for the `n` statement shapes that took longest."""
+        groups = {}
+        for sql, (runs, seconds) in self.statements.items():
+            g = groups.setdefault(fingerprint(sql), [0, 0.0])
+            g[0] += runs; g[1] += seconds
+        return sorted(((sql, runs, seconds) for sql, (runs, seconds) in groups.items()), key=lambda r: -r[2])[:n]
+
+
+# --- per-endpoint totals ---
+_totals = {}
+_lock = threading.Lock()
+_published = 0.0
+
+
+def worker_key(): return f'profiling:worker:{os.getpid()}'
+
+
+def record(endpoint, total_ms, sql_ms, queries, repeated, slow):
+    global _published
+    with _lock:
+        row = _totals.get(endpoint)
+        if row is None: row = _totals[endpoint] = [0, 0.0, 0.0, 0.0, 0, 0, 0]
+        row[0] += 1; row[1] += total_ms; row[2] = max(row[2], total_ms); row[3] += sql_ms
+        row[4] += queries; row[5] += repeated; row[6] += slow
+        due = time.monotonic() - _published >= PUBLISH_SECONDS
+        if due: _published = time.monotonic()
+    if due: publish()
+
+
+def publish():
+    """Copy this worker's totals to the cache for the HQ page."""
+    with _lock: snapshot = {name: list(row) for name, row in _totals.items()}
+    key = worker_key()
+    cache.set(key, snapshot, WORKER_TIMEOUT)
+    workers = cache.get(WORKERS_KEY) or set()
+    if key not in workers: cache.set(WORKERS_KEY, workers | {key}, WORKER_TIMEOUT)
+
+
+def endpoints():
+    """Per-endpoint figures merged across workers, most total time first."""
+    publish()
+    merged = {}
+    for snapshot in cache.get_many(list(cache.get(WORKERS_KEY) or ())).values():
+        for name, row in snapshot.items():
+            m = merged.setdefault(name, [0, 0.0, 0.0, 0.0, 0, 0, 0])
+            for i, v in enumerate(row): m[i] = max(m[i], v) if FIELDS[i] == 'max_ms' else m[i] + v
+    rows = []
+    for name, row in merged.items():
+        r = dict(zip(FIELDS, row), endpoint=name)
+        n = r['requests']
+        r.update(avg_ms=r['total_ms'] / n, avg_sql_ms=r['sql_ms'] / n, avg_queries=r['queries'] / n, total_s=r['total_ms'] / 1000)
+        rows.append(r)
+    return sorted(rows, key=lambda r: -r['total_ms'])
+
+
+def reset():
+    with _lock: _totals.clear()
+    cache.delete_many([*(cache.get(WORKERS_KEY) or ()), WORKERS_KEY])
+
+
+# --- middleware ---
+class SlowRequestFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating log that creates its directory when the first record is written."""
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def log_slow(request, response, endpoint, total_ms, recorder):
+    statements = ''.join(f"\n  {runs}x {seconds * 1000:.1f}ms  {sql[:1000]}" for sql, runs, seconds in recorder.costliest())
+    logger.warning("Slow request %s %s -> %s [%s] %.0fms, %d queries (%d repeated), %.0fms SQL%s",
+                   request.method, request.get_full_path(), response.status_code, endpoint, total_ms,
+                   recorder.count, recorder.repeated, recorder.seconds * 1000, statements)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_PROFILING', True): return self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections: stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = recorder.seconds * 1000
+
+        user = getattr(request, 'user', None)
+        if getattr(settings, 'SERVER_TIMING_PUBLIC', False) or (user is not None and user.is_staff):
+            response['Server-Timing'] = (f'sql;dur={sql_ms:.1f};desc="{recorder.count} queries, {recorder.repeated} repeated", '
+                                         f'app;dur={total_ms - sql_ms:.1f}, total;dur={total_ms:.1f}')
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match else 'unmatched'
+        slow = total_ms >= getattr(settings, 'SLOW_REQUEST_MS', 500)
+        if slow: log_slow(request, response, endpoint, total_ms, recorder)
+        record(endpoint, total_ms, sql_ms, recorder.count, recorder.repeated, slow)
+        return response
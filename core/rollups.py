@@ -0,0 +1,143 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CompanyDailyStats, Load
+
+# --- KPI ROLLUPS ---
+# CompanyDailyStats holds one row per (company, pickup day, status). Single-load
+# writes apply +/- deltas through signals (core.signals); bulk writes that bypass
+# signals call add() with their summed contributions, or refresh() for the days they touched.
+
+CENTS = Decimal('0.01')
+TRACKED = ('company_id', 'pickup_date', 'status', 'rate', 'expenses', 'miles')
+
+
+def _money(v):
+    return Decimal(str(v or 0)).quantize(CENTS)
+
+
+def _day_start(d):
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+def contribution(values):
+    """(key, rate, expenses, miles) for a load given as an instance or a dict of TRACKED fields."""
+    get = values.get if isinstance(values, dict) else lambda f: getattr(values, f)
+    day = timezone.localtime(get('pickup_date')).date()
+    return (get('company_id'), day, get('status')), _money(get('rate')), _money(get('expenses')), int(get('miles') or 0)
+
+
+def apply(values, sign):
+    (company_id, day, status), rate, expenses, miles = contribution(values)
+    key = dict(company_id=company_id, day=day, status=status)
+    # removals never create rows: in a company delete cascade the stats are already gone
+    if sign > 0: CompanyDailyStats.objects.get_or_create(**key)
+    CompanyDailyStats.objects.filter(**key).update(
+        loads=F('loads') + sign, revenue=F('revenue') + sign * rate,
+        expenses=F('expenses') + sign * expenses, miles=F('miles') + sign * miles,
+    )
+
+
+def move(before, after):
+    """Shift a load's contribution from its previous values to its current ones."""
+    if before is not None and contribution(before) == contribution(after): return
+    with transaction.atomic():
+        if before is not None: apply(before, -1)
+        apply(after, +1)
+
+
+def accumulate(deltas, values, sign=1):
+    """Add one load's contribution (instance or dict of TRACKED fields) to a pending add() batch."""
+    key, rate, expenses, miles = contribution(values)
+    n, r, e, m = deltas.get(key, (0, 0, 0, 0))
+    deltas[key] = (n + sign, r + sign * rate, e + sign * expenses, m + sign * miles)
+
+
+def add(deltas):
+    """Fold precomputed {key: (loads, revenue, expenses, miles)} deltas into the stored rollups.
+
+    Touched rows are read under lock, merged in Python and rewritten with one delete and
+    one bulk insert, which stays a handful of queries however many days a bulk write spans.
+    """
+    if not deltas: return
+    with transaction.atomic():
+        existing = CompanyDailyStats.objects.select_for_update().filter(
+            company_id__in={k[0] for k in deltas}, day__range=(min(k[1] for k in deltas), max(k[1] for k in deltas)))
+        merged, stale = dict(deltas), []
+        for r in existing:
+            key = (r.company_id, r.day, r.status)
+            if key not in deltas: continue
+            n, rev, exp, miles = deltas[key]
+            merged[key] = (r.loads + n, r.revenue + rev, r.expenses + exp, r.miles + miles)
+            stale.append(r.pk)
+        for i in range(0, len(stale), 500): CompanyDailyStats.objects.filter(pk__in=stale[i:i + 500]).delete()
+        CompanyDailyStats.objects.bulk_create([
+            CompanyDailyStats(company_id=cid, day=day, status=status, loads=n, revenue=rev, expenses=exp, miles=miles)
+            for (cid, day, status), (n, rev, exp, miles) in merged.items()
+        ], batch_size=1000)
+
+
+# --- REBUILD & CHECK ---
+def live_totals(company=None, days=None):
+    qs = Load.objects.all()
+    if company is not None: qs = qs.filter(company=company)
+    qs = qs.annotate(day=TruncDate('pickup_date'))
+    if days is not None:
+        # the raw pickup_date range lets the index narrow the scan before TruncDate runs
+        first, last = min(days, default=None), max(days, default=None)
+        if first is not None:
+            qs = qs.filter(pickup_date__gte=_day_start(first), pickup_date__lt=_day_start(last + timedelta(days=1)))
+        qs = qs.filter(day__in=days)
+    rows = qs.values('company_id', 'day', 'status').annotate(
+        n=Count('id'), revenue=Sum('rate'), expenses=Sum('expenses'), miles=Sum('miles')
+    ).order_by()
+    return {
+        (r['company_id'], r['day'], r['status']): (r['n'], _money(r['revenue']), _money(r['expenses']), int(r['miles'] or 0))
+        for r in rows
+    }
+
+
+def stored_totals(company=None, days=None):
+    qs = CompanyDailyStats.objects.exclude(loads=0)
+    if company is not None: qs = qs.filter(company=company)
+    if days is not None: qs = qs.filter(day__in=days)
+    return {
+        (r.company_id, r.day, r.status): (r.loads, _money(r.revenue), _money(r.expenses), r.miles)
+        for r in qs
+    }
+
+
+def refresh(company=None, days=None):
+    """Recompute rollups from live Load rows, optionally limited to one company and/or a set of days."""
+    totals = live_totals(company, days)
+    with transaction.atomic():
+        stale = CompanyDailyStats.objects.all()
+        if company is not None: stale = stale.filter(company=company)
+        if days is not None: stale = stale.filter(day__in=days)
+        stale.delete()
+        CompanyDailyStats.objects.bulk_create([
+            CompanyDailyStats(company_id=cid, day=day, status=status, loads=n, revenue=rev, expenses=exp, miles=miles)
+            for (cid, day, status), (n, rev, exp, miles) in totals.items()
+        ], batch_size=1000)
+    return len(totals)
+
+
+def drift(company=None):
+    """Keys whose stored rollup disagrees with live data, mapped to (stored, live)."""
+    live, stored = live_totals(company), stored_totals(company)
+    return {k: (stored.get(k), live.get(k)) for k in live.keys() | stored.keys() if stored.get(k) != live.get(k)}
+
+
+# --- READERS ---
+def totals(company, statuses=None, exclude=None):
+    qs = CompanyDailyStats.objects.filter(company=company)
+    if statuses is not None: qs = qs.filter(status__in=statuses)
+    if exclude is not None: qs = qs.exclude(status__in=exclude)
+    agg = qs.aggregate(loads=Sum('loads'), revenue=Sum('revenue'), expenses=Sum('expenses'), miles=Sum('miles'))
+    revenue, expenses = _money(agg['revenue']), _money(agg['expenses'])
+    return {'loads': agg['loads'] or 0, 'revenue': revenue, 'expenses': expenses, 'profit': revenue - expenses, 'miles': agg['miles'] or 0}
@@ -0,0 +1,32 @@
+from django.db.models import OuterRef, Subquery
+from .models import Driver, Load
+
+# --- FLEET SCHEDULE ENGINE ---
+# One query for the whole fleet: every driver row carries the status, destination
+# and delivery date of its latest open (non-paid) load as correlated subqueries.
+
+def latest_open_loads():
+    return Load.objects.filter(driver=OuterRef('pk')).exclude(status='paid').order_by('-delivery_date', '-id')
+
+def schedule_rows(company):
+    latest = latest_open_loads()
+    return (
+        Driver.objects.filter(company=company)
+        .annotate(
+            open_status=Subquery(latest.values('status')[:1]),
+            open_destination=Subquery(latest.values('destination')[:1]),
+            open_delivery=Subquery(latest.values('delivery_date')[:1]),
+        )
+        .order_by('id')
+        .values('truck_number', 'name', 'open_status', 'open_destination', 'open_delivery')
+    )
+
+def fleet_schedule(company):
+    schedule = []
+    for d in schedule_rows(company):
+        status_label = "Available"; next_avail = "Ready Now"
+        if d['open_status']:
+            status_label = d['open_status'].title()
+            next_avail = f"{d['open_destination']} @ {d['open_delivery'].strftime('%b %d, %H:%M')}"
+        schedule.append({'unit': d['truck_number'], 'driver': d['name'], 'status_label': status_label, 'next_available': next_avail})
+    return schedule
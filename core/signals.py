@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import api, db, documents, entitlements, events, fragments, hq, rollups, tenancy, thumbnails
+from .models import Company, Document, Driver, Load, UserProfile
+
+
+# --- LOAD ROLLUPS ---
+@receiver(pre_save, sender=Load)
+def remember_load_totals(sender, instance, **kwargs):
+    instance._rollup_prev = Load.objects.filter(pk=instance.pk).values(*rollups.TRACKED).first() if instance.pk else None
+
+@receiver(post_save, sender=Load)
+def update_load_totals(sender, instance, **kwargs):
+    rollups.move(getattr(instance, '_rollup_prev', None), instance)
+    instance._rollup_prev = None
+
+@receiver(post_delete, sender=Load)
+def remove_load_totals(sender, instance, **kwargs):
+    with transaction.atomic(): rollups.apply(instance, -1)
+
+
+# --- DOCUMENT INDEX ---
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=Load)
+def index_documents(sender, instance, raw=False, **kwargs):
+    if raw: return
+    documents.sync(instance)
+
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=Load)
+def unindex_documents(sender, instance, **kwargs):
+    documents.forget(instance)
+
+@receiver(post_save, sender=Document)
+def queue_preview(sender, instance, raw=False, **kwargs):
+    if raw or not thumbnails.is_image(instance.content_type): return
+    name, company_id = instance.name, instance.company_id
+    # the document list links previews once they exist, so its cached fragment is dropped when one lands
+    transaction.on_commit(lambda: thumbnails.schedule(name).add_done_callback(lambda f: fragments.bump(company_id)))
+
+
+# --- TENANT & HQ CACHES ---
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def drop_cached_company(sender, instance, **kwargs):
+    tenancy.forget_company(instance.pk)
+    hq.invalidate()
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def drop_cached_membership(sender, instance, **kwargs):
+    tenancy.forget_user(instance.user_id)
+
+
+# --- PLAN USAGE COUNTERS ---
+# Quota-checked creates go through entitlements.reserve() and are tagged _quota_reserved.
+@receiver(post_save, sender=Driver)
+def count_driver(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not getattr(instance, '_quota_reserved', False): entitlements.bump(instance.company_id, 'drivers', +1)
+
+@receiver(post_delete, sender=Driver)
+def uncount_driver(sender, instance, **kwargs):
+    entitlements.bump(instance.company_id, 'drivers', -1)
+
+@receiver(post_save, sender=UserProfile)
+def count_owner_login(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.role == 'owner' and instance.company_id and not getattr(instance, '_quota_reserved', False):
+        entitlements.bump(instance.company_id, 'owner_logins', +1)
+
+@receiver(post_delete, sender=UserProfile)
+def uncount_owner_login(sender, instance, **kwargs):
+    if instance.role == 'owner' and instance.company_id: entitlements.bump(instance.company_id, 'owner_logins', -1)
+
+
+# --- LIVE BOARD EVENTS ---
+@receiver(post_save, sender=Load)
+@receiver(post_delete, sender=Load)
+def publish_load(sender, instance, raw=False, **kwargs):
+    if not raw: events.publish(instance.company_id, events.load_event(instance, deleted='created' not in kwargs))
+
+@receiver(post_save, sender=Driver)
+@receiver(post_delete, sender=Driver)
+def publish_driver(sender, instance, raw=False, **kwargs):
+    if not raw: events.publish(instance.company_id, events.driver_event(instance, deleted='created' not in kwargs))
+
+
+# --- API CHANGE STAMPS ---
+@receiver(post_save, sender=Load)
+@receiver(post_delete, sender=Load)
+@receiver(post_save, sender=Driver)
+@receiver(post_delete, sender=Driver)
+def touch_api_stamp(sender, instance, raw=False, **kwargs):
+    if not raw: api.touch(instance.company_id, create='created' in kwargs)
+
+
+
+# --- TEMPLATE FRAGMENT CACHE ---
+@receiver(post_save, sender=Load)
+@receiver(post_delete, sender=Load)
+@receiver(post_save, sender=Driver)
+@receiver(post_delete, sender=Driver)
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def bump_fragment_generation(sender, instance, raw=False, **kwargs):
+    if not raw: fragments.bump(instance.company_id)
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def bump_company_fragments(sender, instance, raw=False, **kwargs):
+    if not raw: fragments.bump(instance.pk)
+
+
+# --- SQLITE TUNING ---
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    db.configure_sqlite(connection)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+# --- CONTENT-ADDRESSED MEDIA ---
+# Uploads are hashed while they stream to disk and the content is kept once, under
+# blobs/<xx>/<sha256>. Every stored name is a hard link to its blob, so names, URLs
+# and the web server's view of MEDIA_ROOT stay exactly as before. The link count is
+# the reference count: a blob with no names left (st_nlink == 1) is garbage.
+
+BLOB_DIR = 'blobs'
+HASH_CHUNK = 64 * 1024
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DedupStorage(FileSystemStorage):
+    def blob_name(self, digest): return f"{BLOB_DIR}/{digest[:2]}/{digest}"
+
+    def references(self, name):
+        """How many stored names share this file's content."""
+        return os.stat(self.path(name)).st_nlink - 1
+
+    def _save(self, name, content):
+        tmp_dir = self.path(f"{BLOB_DIR}/tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str): chunk = chunk.encode()
+                    digest.update(chunk); f.write(chunk)
+            blob = self._store_blob(tmp, digest.hexdigest())
+        finally:
+            os.unlink(tmp)
+        return self._link(blob, name)
+
+    def _store_blob(self, path, digest):
+        blob = self.path(self.blob_name(digest))
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(path, blob)
+            if self.file_permissions_mode is not None: os.chmod(blob, self.file_permissions_mode)
+        except FileExistsError:
+            pass
+        return blob
+
+    def _link(self, blob, name):
+        while True:
+            full = self.path(name)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            try:
+                os.link(blob, full)
+                break
+            except FileExistsError:
+                name = self.get_available_name(name)
+            except OSError:  # filesystem without hard links: keep a plain copy
+                shutil.copyfile(blob, full)
+                break
+        return str(name).replace('\\', '/')
+
+    def delete(self, name):
+        if not name: raise ValueError("The name must be given to delete().")
+        full = self.path(name)
+        try: shared = os.stat(full).st_nlink > 1
+        except FileNotFoundError: return
+        digest = file_digest(full) if shared else None
+        super().delete(name)
+        if digest:
+            blob = self.path(self.blob_name(digest))
+            if os.path.exists(blob) and os.stat(blob).st_nlink == 1: os.remove(blob)
+
+    # --- migration of existing files ---
+    def adopt(self, name):
+        """Point an existing file at its blob (creating the blob if needed). Returns the bytes freed."""
+        full = self.path(name)
+        blob = self._store_blob(full, file_digest(full))
+        if os.path.samefile(blob, full): return 0
+        size = os.path.getsize(full)
+        tmp = f"{full}.dedup"
+        os.link(blob, tmp)
+        os.replace(tmp, full)
+        return size
+
+    def stored_names(self):
+        """Every stored name under MEDIA_ROOT, excluding the blob store itself."""
+        root = self.path('')
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == root and BLOB_DIR in dirnames: dirnames.remove(BLOB_DIR)
+            for filename in filenames:
+                yield os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/')
+
+    def collect_garbage(self):
+        """Delete blobs no stored name links to any more. Returns (blobs, bytes) removed."""
+        removed = freed = 0
+        for dirpath, dirnames, filenames in os.walk(self.path(BLOB_DIR)):
+            if 'tmp' in dirnames: dirnames.remove('tmp')  # uploads in flight
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                st = os.stat(path)
+                if st.st_nlink == 1:
+                    os.remove(path); removed += 1; freed += st.st_size
+        return removed, freed
+
+
+dedup_storage = DedupStorage()
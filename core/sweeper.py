@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import fragments, hq, tenancy
+from .models import Company, Notification
+
+# --- EXPIRY SWEEPER ---
+# Run on a schedule (manage.py sweep_expiry). Subscriptions whose end date has passed
+# are switched off in one UPDATE, so request-time access checks only read
+# Company.is_active. Subscriptions and compliance documents about to lapse are queued
+# in the Notification outbox; a notice is unique per (company, kind, expiry date), so
+# re-running a sweep queues nothing twice. Every lookup is a range scan on an index.
+
+REMINDER_WINDOW = timedelta(days=7)
+COMPLIANCE_WINDOW = timedelta(days=30)
+COMPLIANCE = (('mc_expiry', 'mc_expiring', "MC certificate"), ('insurance_expiry', 'insurance_expiring', "Insurance certificate"))
+
+
+def expire_subscriptions(now):
+    """Deactivate every active company whose subscription ended before `now`; returns [(id, end date)]."""
+    lapsed = Company.objects.filter(is_active=True, subscription_end_date__lt=now)
+    with transaction.atomic():
+        rows = list(lapsed.select_for_update().values_list('id', 'subscription_end_date'))
+        if not rows: return []
+        ids = [cid for cid, _ in rows]
+        # a lapsed company renews through the payment flow again, so it leaves the HQ review queue too
+        lapsed.filter(pk__in=ids).update(is_active=False, payment_submitted_at=None)
+        transaction.on_commit(lambda: (tenancy.forget_companies(ids), hq.invalidate()))
+        for cid in ids: fragments.bump(cid)
+    return rows
+
+
+def expiring_subscriptions(now):
+    return list(Company.objects.filter(is_active=True, subscription_end_date__gte=now, subscription_end_date__lt=now + REMINDER_WINDOW)
+                .values_list('id', 'subscription_end_date'))
+
+
+def expiring_compliance(today):
+    """{kind: [(company id, expiry date)]} for active companies whose documents lapse within the window (or already have)."""
+    return {kind: list(Company.objects.filter(is_active=True, **{f'{field}__lte': today + COMPLIANCE_WINDOW})
+                       .values_list('id', field))
+            for field, kind, _ in COMPLIANCE}
+
+
+def _day(value): return timezone.localdate(value) if hasattr(value, 'tzinfo') else value
+
+
+def sweep(now=None):
+    """Expire lapsed subscriptions and queue reminders; returns counts per notice kind."""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    found = {
+        'subscription_expired': expire_subscriptions(now),
+        'subscription_expiring': expiring_subscriptions(now),
+        **expiring_compliance(today),
+    }
+    labels = {kind: label for _, kind, label in COMPLIANCE}
+    notices = []
+    for kind, rows in found.items():
+        for cid, due in rows:
+            due = _day(due)
+            if kind == 'subscription_expired': message = f"Your subscription ended on {due:%b %d, %Y}. Renew to restore access."
+            elif kind == 'subscription_expiring': message = f"Your subscription ends on {due:%b %d, %Y}."
+            else: message = f"{labels[kind]} {'expired' if due < today else 'expires'} on {due:%b %d, %Y}. Upload a current copy."
+            notices.append(Notification(company_id=cid, kind=kind, due=due, message=message))
+    Notification.objects.bulk_create(notices, batch_size=500, ignore_conflicts=True)
+    return {kind: len(rows) for kind, rows in found.items()}
@@ -0,0 +1,39 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from .. import fragments
+
+register = template.Library()
+
+# Stands in for the CSRF token while a fragment is rendered for the cache and is
+# swapped for the requesting user's token on every hit and miss.
+CSRF_PLACEHOLDER = 'FRAGMENT-CSRF-TOKEN'
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist, self.name, self.vary_on = nodelist, name, vary_on
+
+    def render(self, context):
+        tenant = getattr(context.get('request'), 'tenant', None)
+        if tenant is None: return self.nodelist.render(context)
+        key = fragments.fragment_key(tenant.company_id, self.name, [v.resolve(context) for v in self.vary_on])
+        html = cache.get(key)
+        if html is None:
+            fragments.count('miss')
+            with context.push(csrf_token=CSRF_PLACEHOLDER): html = self.nodelist.render(context)
+            cache.set(key, html, fragments.FRAGMENT_TIMEOUT)
+        else:
+            fragments.count('hit')
+        return mark_safe(html.replace(CSRF_PLACEHOLDER, str(context.get('csrf_token', ''))))
+
+
+@register.tag
+def fragment(parser, token):
+    """{% fragment "name" var1 var2 %}...{% endfragment %}: cached per company generation and the given vars."""
+    bits = token.split_contents()
+    if len(bits) < 2: raise template.TemplateSyntaxError("'fragment' needs a name")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, bits[1].strip('"\''), [parser.compile_filter(b) for b in bits[2:]])
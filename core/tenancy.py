@@ -0,0 +1,83 @@
+from functools import wraps
+
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+from .entitlements import plan_for
+from .models import Company, UserProfile
+
+# --- TENANT CONTEXT ---
+# request.tenant is resolved once per request by TenantMiddleware from two cache
+# entries: user -> (company_id, role) and company_id -> Company snapshot. Both are
+# dropped by signals when a UserProfile or Company is saved; bumping CACHE_VERSION
+# orphans every entry when the snapshot shape changes. The snapshot serves reads only:
+# requests that can write (POST, PATCH, ...) resolve from the database, so their
+# activation and plan checks see the current row.
+
+CACHE_VERSION = 1
+CACHE_TIMEOUT = 60
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+class Tenant:
+    def __init__(self, company, role):
+        self.company = company
+        self.company_id = company.pk
+        self.role = role
+        self.entitlements = plan_for(company.plan_type)
+        self.plan = self.entitlements.key
+
+    @property
+    def is_active(self): return self.company.is_active
+
+    @property
+    def has_access(self): return self.company.has_access
+
+    @property
+    def payment_pending(self): return bool(self.company.payment_submitted_at) and not self.company.is_active
+
+    def __repr__(self): return f"<Tenant {self.company_id} {self.plan}>"
+
+
+def user_key(user_id): return f'tenant:user:{user_id}'
+def company_key(company_id): return f'tenant:company:{company_id}'
+
+
+def resolve(user, fresh=False):
+    """Tenant for an authenticated user, or None if they have no company. `fresh` reads (and re-caches) the rows."""
+    membership = None if fresh else cache.get(user_key(user.pk), version=CACHE_VERSION)
+    if membership is None:
+        membership = UserProfile.objects.filter(user=user).values_list('company_id', 'role').first() or (None, None)
+        cache.set(user_key(user.pk), membership, CACHE_TIMEOUT, version=CACHE_VERSION)
+    company_id, role = membership
+    if company_id is None: return None
+
+    company = None if fresh else cache.get(company_key(company_id), version=CACHE_VERSION)
+    if company is None:
+        company = Company.objects.filter(pk=company_id).first()
+        if company is None: return None
+        cache.set(company_key(company_id), company, CACHE_TIMEOUT, version=CACHE_VERSION)
+    return Tenant(company, role)
+
+
+def forget_user(user_id): cache.delete(user_key(user_id), version=CACHE_VERSION)
+def forget_company(company_id): cache.delete(company_key(company_id), version=CACHE_VERSION)
+def forget_companies(company_ids): cache.delete_many([company_key(i) for i in company_ids], version=CACHE_VERSION)
+
+
+class TenantMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = request.user
+        request.tenant = resolve(user, fresh=request.method not in SAFE_METHODS) if user.is_authenticated else None
+        return self.get_response(request)
+
+
+def tenant_required(view):
+    """Send signed-in users without a company (no profile yet) to registration, as the dashboard does."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.tenant is None: return redirect('register')
+        return view(request, *args, **kwargs)
+    return wrapped
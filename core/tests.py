@@ -1,3 +1,1406 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import logging
+import os
+import random
+import re
+import runpy
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command, CommandError
+from django.db import connection, connections, OperationalError
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import availability, benchmarks, db, entitlements, events, fragments, hq, importer, invoices, lanes, media, profiling, rollups, sweeper, tenancy, thumbnails, transitions, warmup
+from .db import ReplicaRouter
+from .forms import LoadForm, LoadImportUploadForm
+from .models import ApiToken, Company, CompanyDataVersion, UserProfile, Driver, Load, CompanyDailyStats, Document, CompanyUsage, Notification
+from .pagination import KeysetPaginator
+from .schedule import fleet_schedule, schedule_rows
+from .storage import dedup_storage
+
+
+def make_company(username='dispatch', plan='enterprise', active=True):
+    u = User.objects.create_user(username=username)
+    c = Company.objects.create(owner=u, name=f'{username} co', plan_type=plan, is_active=active,
+                               subscription_end_date=timezone.now() + timedelta(days=30))
+    UserProfile.objects.create(user=u, company=c, role='admin')
+    return u, c
+
+
+def make_load(company, driver=None, status='booked', days=0, **kw):
+    when = timezone.now() + timedelta(days=days)
+    defaults = dict(load_ref=f'REF{days}', origin='Dallas, TX', destination='Austin, TX', rate=1000, expenses=250, miles=200,
+                    pickup_date=when, delivery_date=when + timedelta(days=1))
+    defaults.update(kw)
+    return Load.objects.create(company=company, driver=driver, status=status, **defaults)
+
+
+class TempMediaMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable(); self.addCleanup(media.disable)
+        super().setUp()
+
+
+def upload(name='doc.pdf', content=b'%PDF-1.4 test', content_type='application/pdf'):
+    return SimpleUploadedFile(name, content, content_type=content_type)
+
+
+# --- 1. FLEET SCHEDULE ---
+class FleetScheduleTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+
+    def add_trucks(self, n):
+        for i in range(n):
+            d = Driver.objects.create(company=self.company, name=f'Driver {i}', truck_number=f'U{i}')
+            make_load(self.company, d, status='active', days=i)
+            make_load(self.company, d, status='paid', days=i + 5)
+
+    def dashboard_queries(self):
+        self.client.get(reverse('dashboard'))  # warm the tenant cache
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_latest_open_load_per_driver(self):
+        d = Driver.objects.create(company=self.company, name='Ann', truck_number='101')
+        Driver.objects.create(company=self.company, name='Bob', truck_number='102')
+        make_load(self.company, d, status='booked', days=1, destination='Tulsa, OK')
+        latest = make_load(self.company, d, status='active', days=3, destination='Memphis, TN')
+        make_load(self.company, d, status='paid', days=9, destination='Reno, NV')
+
+        ann, bob = fleet_schedule(self.company)
+        self.assertEqual(ann['unit'], '101')
+        self.assertEqual(ann['status_label'], 'Active')
+        self.assertEqual(ann['next_available'], f"Memphis, TN @ {latest.delivery_date.strftime('%b %d, %H:%M')}")
+        self.assertEqual(bob, {'unit': '102', 'driver': 'Bob', 'status_label': 'Available', 'next_available': 'Ready Now'})
+
+    def test_dashboard_query_count_is_constant(self):
+        self.add_trucks(1)
+        small = self.dashboard_queries()
+        self.add_trucks(40)
+        self.assertEqual(self.dashboard_queries(), small)
+
+
+# --- 2. KPI ROLLUPS ---
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+
+    def assertInSync(self):
+        self.assertEqual(rollups.drift(self.company), {})
+
+    def test_rollups_follow_load_lifecycle(self):
+        a = make_load(self.company, rate=1200, expenses=300, miles=500)
+        b = make_load(self.company, status='active', days=2, rate=800, expenses=100, miles=250)
+        self.assertInSync()
+        self.assertEqual(rollups.totals(self.company)['revenue'], Decimal('2000.00'))
+
+        a.status = 'paid'; a.save()
+        b.rate = 950; b.pickup_date += timedelta(days=3); b.save()
+        self.assertInSync()
+        open_totals = rollups.totals(self.company, exclude=['paid'])
+        self.assertEqual((open_totals['loads'], open_totals['revenue'], open_totals['profit']), (1, Decimal('950.00'), Decimal('850.00')))
+
+        b.delete()
+        self.assertInSync()
+        self.assertEqual(rollups.totals(self.company, exclude=['paid'])['loads'], 0)
+
+    def test_dashboard_reads_rollups(self):
+        make_load(self.company, rate=1000, expenses=400)
+        make_load(self.company, status='paid', rate=5000, expenses=0)
+        self.client.force_login(self.user)
+        stats = self.client.get(reverse('dashboard')).context['stats']
+        self.assertEqual((stats['revenue'], stats['profit']), (Decimal('1000.00'), Decimal('600.00')))
+
+    def test_company_delete_leaves_no_stats(self):
+        make_load(self.company); make_load(self.company, status='paid', days=1)
+        self.client.force_login(User.objects.create_superuser('hq', password='pw'))
+        self.client.get(reverse('delete_company', args=[self.company.id]))
+        connection.check_constraints()
+        self.assertFalse(Company.objects.exists())
+        self.assertFalse(CompanyDailyStats.objects.exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        make_load(self.company, rate=1000)
+        CompanyDailyStats.objects.update(revenue=1)
+        with self.assertRaises(CommandError): call_command('rebuild_rollups', '--check', stdout=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertInSync()
+
+
+# --- 3. QUERY PLANS ---
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN on the hot view querysets: no full table scans, no sorts the indexes should serve."""
+    FULL_SCAN = re.compile(r'\bSCAN (core_\w+)(?! USING (COVERING )?INDEX)')
+
+    def setUp(self):
+        if connection.vendor != 'sqlite': self.skipTest('plan format is SQLite specific')
+        self.user, self.company = make_company()
+        d = Driver.objects.create(company=self.company, name='Ann', truck_number='101')
+        make_load(self.company, d)
+
+    def assertIndexed(self, qs, sorted_by_index=True):
+        plan = qs.explain()
+        self.assertIsNone(self.FULL_SCAN.search(plan), plan)
+        if sorted_by_index: self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_load_board(self):
+        self.assertIndexed(Load.objects.filter(company=self.company).exclude(status='paid').order_by('-pickup_date', '-id'))
+        self.assertIndexed(Load.objects.filter(company=self.company, status='active').order_by('-pickup_date', '-id'))
+
+    def test_dashboard(self):
+        self.assertIndexed(schedule_rows(self.company))
+        self.assertIndexed(Driver.objects.filter(company=self.company))
+        self.assertIndexed(CompanyDailyStats.objects.filter(company=self.company).exclude(status='paid'), sorted_by_index=False)
+
+    def test_load_board_cursor_page_seeks_index(self):
+        qs = Load.objects.filter(company=self.company).exclude(status='paid')
+        after = KeysetPaginator(qs, ('-pickup_date', '-id'))._after([timezone.now(), 10])
+        plan = qs.order_by('-pickup_date', '-id').filter(after).explain()
+        self.assertIn('pickup_date<?', plan)
+
+    def test_document_center(self):
+        self.assertIndexed(Load.objects.filter(company=self.company), sorted_by_index=False)
+
+
+# --- 4. LOAD BOARD ---
+class LoadBoardTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+        self.driver = Driver.objects.create(company=self.company, name='Ann', truck_number='101')
+
+    def board(self, **params):
+        r = self.client.get(reverse('manage_loads'), params)
+        self.assertEqual(r.status_code, 200)
+        return r.context['page']
+
+    def test_keyset_walk_covers_every_open_load_once(self):
+        when = timezone.now()
+        for i in range(23): make_load(self.company, self.driver, pickup_date=when - timedelta(hours=i // 3))  # shared pickup times
+        make_load(self.company, self.driver, status='paid')
+        qs = Load.objects.filter(company=self.company).exclude(status='paid')
+        paginator = KeysetPaginator(qs, ('-pickup_date', '-id'), per_page=5)
+
+        seen, page = [], paginator.page()
+        while True:
+            seen += [l.id for l in page]
+            if not page.has_next: break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, list(qs.order_by('-pickup_date', '-id').values_list('id', flat=True)))
+
+        back = paginator.page(page.prev_cursor)
+        self.assertEqual([l.id for l in back], seen[-5 - len(page):-len(page)])
+
+    def test_board_query_count_is_flat(self):
+        for i in range(3): make_load(self.company, self.driver, days=-i)
+        self.board()  # warm the tenant cache
+        fragments.bump(self.company.id)  # measure the uncached render
+        with CaptureQueriesContext(connection) as small: self.board()
+        for i in range(120): make_load(self.company, self.driver, days=-i)
+        with CaptureQueriesContext(connection) as large: page = self.board()
+        self.assertEqual(len(large), len(small))
+        fragments.bump(self.company.id)
+        with CaptureQueriesContext(connection) as deep: self.board(cursor=page.next_cursor)
+        self.assertEqual(len(deep), len(small))
+
+    def test_filters(self):
+        other = Driver.objects.create(company=self.company, name='Bob', truck_number='102')
+        make_load(self.company, self.driver, status='active', days=0)
+        make_load(self.company, other, status='booked', days=0)
+        make_load(self.company, other, status='booked', days=10)
+        self.assertEqual(len(self.board(status='booked')), 2)
+        self.assertEqual(len(self.board(driver=other.id, status='booked')), 2)
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.board(driver=other.id, pickup_to=tomorrow)), 1)
+        self.assertEqual(len(self.board(cursor='garbage')), 3)
+
+    def test_tampered_cursors_fall_back_to_the_first_page(self):
+        make_load(self.company, self.driver)
+        forge = lambda data: base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+        bad = [{'0': 'n'}, [], ['n', 'yesterday', 1], ['n', timezone.now().isoformat(), 'one'], ['n', None, 1],
+               ['p', timezone.now().isoformat(), None], ['n', timezone.now().isoformat(), 10 ** 30], 'n']
+        for data in bad:
+            with self.subTest(data=data):
+                self.assertEqual(len(self.board(cursor=forge(data))), 1)
+                self.assertEqual(self.client.get(reverse('document_center'), {'cursor': forge(data)}).status_code, 200)
+                self.assertEqual(self.client.get(reverse('api_loads'), {'cursor': forge(data)}).status_code, 400)
+
+
+# --- 5. DOCUMENT INDEX ---
+class DocumentIndexTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.company = make_company()
+
+    def test_index_follows_file_fields(self):
+        d = Driver.objects.create(company=self.company, name='Ann', truck_number='101', cdl_file=upload('cdl.pdf'))
+        doc = Document.objects.get(owner_type='driver', owner_id=d.id)
+        self.assertEqual((doc.kind, doc.size, doc.content_type, doc.company_id), ('cdl_file', 13, 'application/pdf', self.company.id))
+
+        d.medical_card_file = upload('med.png', b'png', 'image/png'); d.name = 'Ann B'; d.save()
+        self.assertEqual(set(Document.objects.filter(owner_id=d.id).values_list('kind', 'owner_label')),
+                         {('cdl_file', 'Ann B (Unit 101)'), ('medical_card_file', 'Ann B (Unit 101)')})
+
+        d.cdl_file = None; d.save()
+        self.assertEqual(list(Document.objects.filter(owner_id=d.id).values_list('kind', flat=True)), ['medical_card_file'])
+        d.delete()
+        self.assertFalse(Document.objects.exists())
+
+    def test_document_center_is_paginated_and_filterable(self):
+        self.client.force_login(self.user)
+        self.company.mc_cert = upload('mc.pdf'); self.company.save()
+        for i in range(30): make_load(self.company, load_ref=f'L{i}', rate_con_file=upload(f'rc{i}.pdf'))
+
+        page = self.client.get(reverse('document_center')).context['page']
+        self.assertEqual(len(page), 25)
+        self.assertEqual(len(self.client.get(reverse('document_center'), {'cursor': page.next_cursor}).context['page']), 6)
+        self.assertEqual(len(self.client.get(reverse('document_center'), {'owner_type': 'company'}).context['page']), 1)
+        self.assertEqual([d.owner_label for d in self.client.get(reverse('document_center'), {'q': 'L17'}).context['page']], ['Load #L17'])
+
+    def test_backfill_indexes_existing_files(self):
+        d = Driver.objects.create(company=self.company, name='Ann', truck_number='101', cdl_file=upload('cdl.pdf'))
+        Document.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_documents', stdout=out)
+        self.assertEqual(Document.objects.get().name, d.cdl_file.name)
+        self.assertIn('0 media files are not referenced', out.getvalue())
+
+
+# --- 6. TENANT CONTEXT ---
+class TenantContextTests(TestCase):
+    def setUp(self):
+        cache.clear()  # row ids are reused between tests; memberships cached by an earlier test would leak in
+        self.user, self.company = make_company(plan='starter')
+
+    def test_resolve_is_cached_and_invalidated_on_save(self):
+        self.assertEqual(tenancy.resolve(self.user).plan, 'starter')
+        with self.assertNumQueries(0):
+            t = tenancy.resolve(self.user)
+        self.assertFalse(t.entitlements.show_profit)
+
+        self.company.plan_type = 'pro'; self.company.save()
+        self.assertEqual(tenancy.resolve(self.user).entitlements.fleet_limit, 10)
+
+        other = Company.objects.create(owner=User.objects.create_user('other'), name='Other', plan_type='enterprise')
+        UserProfile.objects.filter(user=self.user).delete()
+        self.assertIsNone(tenancy.resolve(self.user))
+        UserProfile.objects.create(user=self.user, company=other)
+        self.assertEqual(tenancy.resolve(self.user).company_id, other.id)
+
+    def test_dashboard_needs_no_profile_or_company_queries(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))  # warm the tenant and fragment caches
+        # session, user; the stats and schedule come from the cached fragment
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        fragments.bump(self.company.id)
+        # + fleet schedule, rollup totals
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+    def test_user_without_company_is_sent_to_register(self):
+        loner = User.objects.create_user('loner', password='pw')
+        self.client.force_login(loner)
+        self.assertRedirects(self.client.get(reverse('dashboard')), reverse('register'))
+        for name in ('manage_loads', 'manage_fleet', 'add_load', 'document_center', 'export_loads', 'company_settings'):
+            self.assertRedirects(self.client.get(reverse(name)), reverse('register'), fetch_redirect_response=False, msg_prefix=name)
+        self.assertRedirects(self.client.post(reverse('transition_loads')), reverse('register'), fetch_redirect_response=False)
+
+    def test_writes_check_the_stored_company_not_the_snapshot(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('manage_fleet'))  # caches the active snapshot
+        Company.objects.filter(pk=self.company.pk).update(is_active=False)  # no signal: the snapshot is stale
+        self.assertEqual(self.client.get(reverse('manage_fleet')).status_code, 200)  # reads may lag for CACHE_TIMEOUT
+        r = self.client.post(reverse('manage_fleet'), {'name': 'Ann', 'truck_number': 'U1'})
+        self.assertTemplateUsed(r, 'payment_pending.html')
+        self.assertFalse(Driver.objects.exists())
+        self.assertFalse(tenancy.resolve(self.user).is_active)  # and the write refreshed the snapshot
+
+
+# --- 7. PLAN ENTITLEMENTS ---
+class EntitlementTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company(plan='starter')
+        self.client.force_login(self.user)
+
+    def add_truck(self, n):
+        return self.client.post(reverse('manage_fleet'), {'name': f'Driver {n}', 'truck_number': f'U{n}'})
+
+    def test_registry(self):
+        self.assertEqual(entitlements.plan_for('pro_annual').fleet_limit, 10)
+        self.assertEqual([p.price for p in entitlements.PLANS.values()], [99, 199, 499])
+
+    def test_fleet_quota_uses_counter(self):
+        for n in range(3): self.add_truck(n)
+        with CaptureQueriesContext(connection) as ctx: self.add_truck(3)
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql']])
+        self.assertEqual(Driver.objects.filter(company=self.company).count(), 3)
+        self.assertEqual(CompanyUsage.objects.get(company=self.company).drivers, 3)
+
+    def test_counters_follow_creates_and_deletes_outside_views(self):
+        d = Driver.objects.create(company=self.company, name='Admin made', truck_number='A1')
+        self.assertEqual(entitlements.usage_for(self.company.id).drivers, 1)
+        d.delete()
+        self.assertEqual(entitlements.usage_for(self.company.id).drivers, 0)
+
+    def test_company_delete_leaves_no_counters(self):
+        for n in range(2): self.add_truck(n)
+        self.company.plan_type = 'pro'; self.company.save()
+        self.client.post(reverse('manage_clients'), {'username': 'owner0', 'password': 'pw'})
+        self.client.force_login(User.objects.create_superuser('hq', password='pw'))
+        self.client.get(reverse('delete_company', args=[self.company.id]))
+        connection.check_constraints()
+        self.assertFalse(Company.objects.exists())
+        self.assertFalse(CompanyUsage.objects.exists())
+
+    def test_stale_check_cannot_overfill(self):
+        # Two workers that both saw 2/3 trucks each try to take the last slot
+        for n in range(2): self.add_truck(n)
+        self.assertTrue(entitlements.acquire(self.company.id, 'drivers', 3))
+        self.assertFalse(entitlements.acquire(self.company.id, 'drivers', 3))
+
+    def test_owner_login_quota(self):
+        self.company.plan_type = 'pro'; self.company.save()
+        for n in range(5): self.client.post(reverse('manage_clients'), {'username': f'owner{n}', 'password': 'pw'})
+        self.assertEqual(UserProfile.objects.filter(company=self.company, role='owner').count(), 3)
+        self.assertEqual(entitlements.usage_for(self.company.id).owner_logins, 3)
+
+
+class ConcurrentQuotaTests(TransactionTestCase):
+    def test_parallel_reservations_respect_limit(self):
+        _, company = make_company(plan='starter')
+        entitlements.usage_for(company.id)
+        start, wins, errors = threading.Barrier(8), [], []
+
+        def worker(n):
+            start.wait()
+            try:
+                for _ in range(200):
+                    try:
+                        with entitlements.reserve(company, 'drivers'):
+                            d = Driver(company=company, name=f'D{n}', truck_number=f'T{n}'); d._quota_reserved = True; d.save()
+                        wins.append(n); return
+                    except entitlements.QuotaExceeded:
+                        return
+                    except OperationalError as e:  # shared-cache SQLite reports lock contention instead of waiting
+                        if 'locked' not in str(e): raise
+                        time.sleep(0.005)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(wins), 3)
+        self.assertEqual(Driver.objects.filter(company=company).count(), 3)
+
+
+# --- 8. HQ ANALYTICS ---
+class HQDeskTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('hq', password='pw')
+        self.client.force_login(self.admin)
+
+    def add_tenants(self, n, start=0):
+        for i in range(start, start + n):
+            make_company(f'tenant{i}', plan=['starter', 'pro_annual', 'enterprise'][i % 3])
+
+    def test_snapshot_aggregates(self):
+        self.add_tenants(3)
+        _, lapsed = make_company('lapsed', plan='pro')
+        Company.objects.filter(pk=lapsed.pk).update(is_active=False, subscription_end_date=timezone.now() - timedelta(days=3))
+        _, pending = make_company('pending', active=False)
+        Company.objects.filter(pk=pending.pk).update(payment_submitted_at=timezone.now(), subscription_end_date=None)
+        _, soon = make_company('soon', plan='pro')
+        Company.objects.filter(pk=soon.pk).update(subscription_end_date=timezone.now() + timedelta(days=2))
+        _, unswept = make_company('unswept', plan='enterprise')  # lapsed, not yet switched off by the sweeper
+        Company.objects.filter(pk=unswept.pk).update(subscription_end_date=timezone.now() - timedelta(days=1))
+        _, renewing = make_company('renewing', active=False)  # lapsed, new receipt awaiting approval
+        Company.objects.filter(pk=renewing.pk).update(payment_submitted_at=timezone.now(), subscription_end_date=timezone.now() - timedelta(days=5))
+
+        stats = hq.compute_snapshot()
+        self.assertEqual(stats['total_clients'], 4)
+        self.assertEqual(stats['mrr'], 99 + 199 + 499 + 199)
+        self.assertEqual((stats['pending_count'], stats['expiring_soon'], stats['churned_30d']), (2, 1, 2))
+        self.assertEqual(stats['churn_rate'], round(100 * 2 / 6, 1))
+        self.assertEqual(dict(stats['plan_mix']), {'Starter': 1, 'Pro': 2, 'Enterprise': 1})
+
+    def test_desk_query_count_does_not_grow_with_tenants(self):
+        self.add_tenants(3)
+        self.client.get(reverse('super_admin_desk'))
+        with CaptureQueriesContext(connection) as small: self.client.get(reverse('super_admin_desk'))
+        self.add_tenants(60, start=3)
+        self.client.get(reverse('super_admin_desk'))
+        with CaptureQueriesContext(connection) as large: r = self.client.get(reverse('super_admin_desk'))
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(r.context['active']), 50)
+
+    def test_snapshot_dropped_when_company_changes(self):
+        self.add_tenants(1)
+        self.assertEqual(self.client.get(reverse('super_admin_desk')).context['stats']['total_clients'], 1)
+        self.client.get(reverse('pause_company', args=[Company.objects.get().id]))
+        self.assertEqual(self.client.get(reverse('super_admin_desk')).context['stats']['total_clients'], 0)
+
+
+# --- 9. INVOICE PDFs ---
+class InvoicePdfTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+
+    def pdf(self, load):
+        r = self.client.get(reverse('invoice_pdf', args=[load.id]))
+        self.assertEqual(r['Content-Type'], 'application/pdf')
+        return b''.join(r.streaming_content)
+
+    def test_pdf_is_cached_per_content_version(self):
+        load = make_load(self.company, status='delivered', broker_name='ACME (Logistics)', rate=1500)
+        first = self.pdf(load)
+        self.assertTrue(first.startswith(b'%PDF-1.4') and first.rstrip().endswith(b'%%EOF'))
+        folder = os.path.join(self.media_root, 'invoices', str(self.company.id), str(load.id))
+        self.assertEqual(len(os.listdir(folder)), 1)
+
+        with mock.patch('core.invoices.render') as render:
+            self.assertEqual(self.pdf(load), first)
+        render.assert_not_called()
+
+        load.rate = 1750; load.save()
+        self.assertNotEqual(self.pdf(load), first)
+        self.assertEqual(len(os.listdir(folder)), 1)
+
+    def test_concurrent_misses_replace_rather_than_delete_each_other(self):
+        load = make_load(self.company, status='delivered')
+        folder = os.path.join(self.media_root, 'invoices', str(self.company.id), str(load.id))
+        real_render, inner = invoices.render, []
+        def render(l, c):  # a second request misses while the first is still rendering
+            if not inner:
+                inner.append(None)
+                inner[0] = invoices.cached_path(l, c)
+            return real_render(l, c)
+        with mock.patch('core.invoices.render', render):
+            name = invoices.cached_path(load, self.company)
+        self.assertEqual(inner, [name])
+        self.assertEqual(os.listdir(folder), [os.path.basename(name)])
+        with default_storage.open(name) as f: self.assertTrue(f.read().startswith(b'%PDF'))
+
+        load.rate = 1750; load.save()
+        real_listdir = os.listdir
+        with mock.patch('os.listdir', lambda d: real_listdir(d) + ['gone.pdf']):  # removed by another request meanwhile
+            fresh = invoices.cached_path(load, self.company)
+        self.assertEqual(os.listdir(folder), [os.path.basename(fresh)])
+
+    def test_batch_zip_holds_every_delivered_load(self):
+        delivered = [make_load(self.company, status='delivered', days=i) for i in range(5)]
+        make_load(self.company, status='booked')
+        r = self.client.get(reverse('invoice_batch'))
+        with zipfile.ZipFile(io.BytesIO(b''.join(r.streaming_content))) as zf:
+            self.assertEqual(sorted(zf.namelist()), sorted(f'INV-{l.id}.pdf' for l in delivered))
+            self.assertTrue(all(zf.read(n).startswith(b'%PDF') for n in zf.namelist()))
+
+    def test_batch_starts_streaming_before_reading_every_load(self):
+        loads = [make_load(self.company, status='delivered', days=i) for i in range(30)]
+        taken = []
+        def source():
+            for l in loads: taken.append(l); yield l
+        stream = invoices.stream_zip(source(), self.company, workers=2)
+        first = next(stream)
+        self.assertLessEqual(len(taken), 2 * invoices.AHEAD + 1)
+        with zipfile.ZipFile(io.BytesIO(first + b''.join(stream))) as zf:
+            self.assertEqual(zf.namelist(), [f'INV-{l.id}.pdf' for l in loads])
+
+    def test_other_tenants_cannot_fetch(self):
+        _, other = make_company('other')
+        self.assertEqual(self.client.get(reverse('invoice_pdf', args=[make_load(other).id])).status_code, 404)
+
+
+# --- 10. BULK IMPORT ---
+IMPORT_HEADER = 'load_ref,broker_name,broker_mc,origin,destination,pickup_date,delivery_date,truck_number,rate,miles,expenses,status\n'
+
+
+class LoadImportTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.truck = Driver.objects.create(company=self.company, name='Driver', truck_number='U1')
+        self.client.force_login(self.user)
+
+    def csv(self, *rows):
+        return upload('loads.csv', (IMPORT_HEADER + ''.join(r + '\n' for r in rows)).encode(), 'text/csv')
+
+    def test_import_creates_loads_and_keeps_rollups_in_sync(self):
+        rows = [f'R{i},ACME,MC1,"Dallas, TX","Austin, TX",2025-01-0{i % 3 + 1} 08:00,2025-01-05 08:00,{"U1" if i % 2 else ""},1000.50,200,100,delivered'
+                for i in range(7)]
+        with CaptureQueriesContext(connection) as ctx:
+            result = importer.import_loads(self.company, importer.open_csv(self.csv(*rows)), chunk_size=3)
+        self.assertEqual((result.created, result.failed), (7, 0))
+        self.assertLess(len(ctx), 25)
+        self.assertEqual(Load.objects.filter(company=self.company, driver=self.truck).count(), 3)
+        self.assertEqual(rollups.drift(self.company), {})
+        self.assertEqual(rollups.totals(self.company)['revenue'], Decimal('7003.50'))
+
+    def test_bad_rows_are_reported_by_line(self):
+        r = self.client.post(reverse('import_loads'), {'csv_file': self.csv(
+            'OK,ACME,MC1,A,B,2025-01-01 08:00,2025-01-02 08:00,U1,900,100,0,booked',
+            'BAD,ACME,MC1,A,B,not a date,2025-01-02 08:00,U9,900,100,0,lost',
+        )})
+        result = r.context['result']
+        self.assertEqual((result.created, result.failed), (1, 1))
+        line, errors = result.errors[0]
+        self.assertEqual(line, 3)
+        self.assertEqual(set(errors), {'pickup_date', 'truck_number', 'status'})
+        self.assertContains(r, 'No truck U9 in your fleet.')
+
+    def test_double_booked_trucks_are_rejected(self):
+        make_load(self.company, self.truck, load_ref='STORED', pickup_date=timezone.make_aware(datetime(2025, 3, 1, 8)),
+                  delivery_date=timezone.make_aware(datetime(2025, 3, 2, 8)))
+        result = importer.import_loads(self.company, importer.open_csv(self.csv(
+            'A,ACME,MC1,X,Y,2025-03-01 20:00,2025-03-02 20:00,U1,900,100,0,booked',    # overlaps the stored load
+            'B,ACME,MC1,X,Y,2025-03-05 08:00,2025-03-06 08:00,U1,900,100,0,booked',
+            'C,ACME,MC1,X,Y,2025-03-05 20:00,2025-03-07 08:00,U1,900,100,0,active',    # overlaps B from this file
+            'D,ACME,MC1,X,Y,2025-03-06 08:00,2025-03-07 08:00,U1,900,100,0,booked',    # starts as B ends
+            'E,ACME,MC1,X,Y,2025-03-05 20:00,2025-03-07 08:00,U1,900,100,0,delivered', # history doesn't block
+        )), chunk_size=2)
+        self.assertEqual((result.created, [line for line, _ in result.errors]), (3, [2, 4]))
+        self.assertIn('load STORED', result.errors[0][1]['truck_number'][0])
+        self.assertIn('load B', result.errors[1][1]['truck_number'][0])
+
+    def test_non_utf8_file_is_reported_not_a_server_error(self):
+        rows = [f'R{i},ACME,MC1,A,B,2025-01-01 08:00,2025-01-02 08:00,U1,900,100,0,paid' for i in range(5)]
+        body = (IMPORT_HEADER + '\n'.join(rows + ['CAF,Café Freight,MC2,A,B,2025-01-01 08:00,2025-01-02 08:00,,900,100,0,paid'])).encode('cp1252')
+        r = self.client.post(reverse('import_loads'), {'csv_file': upload('loads.csv', body, 'text/csv')})
+        self.assertEqual(r.status_code, 200)
+        result = r.context['result']
+        self.assertEqual(list(result.errors[-1][1]), ['file'])
+        self.assertEqual(Load.objects.filter(company=self.company).count(), result.created)
+
+    def test_imported_rows_match_model_saves(self):
+        importer.import_loads(self.company, importer.open_csv(self.csv('R1,ACME,MC1,A,B,2025-01-01 08:00,2025-01-02 08:00,U1,900.5,100,,booked')))
+        load = Load.objects.get(load_ref='R1')
+        self.assertEqual((load.status, load.expenses, load.rate, load.driver_id, load.rate_con_file.name), ('booked', 0, Decimal('900.50'), self.truck.id, ''))
+        self.assertEqual(load.pickup_date, timezone.make_aware(datetime(2025, 1, 1, 8)))
+
+    def test_unset_columns_match_bulk_create(self):
+        # columns the file doesn't fill, including a per-row callable default, come out as bulk_create writes them
+        when = timezone.make_aware(datetime(2025, 1, 1, 8))
+        given = dict(broker_name='ACME', broker_mc='MC1', origin='A', destination='B', pickup_date=when, delivery_date=when + timedelta(days=1),
+                     rate=Decimal('900.5'), miles=100, status='booked')
+        refs, bol = iter(range(10)), Load._meta.get_field('bol_file')
+        default = lambda: f'loads/bol/{next(refs)}.pdf'
+        with mock.patch.object(bol, 'default', default), mock.patch.object(bol, '_get_default', default):
+            importer.import_loads(self.company, importer.open_csv(self.csv('R1,ACME,MC1,A,B,2025-01-01 08:00,2025-01-02 08:00,U1,900.5,100,,booked',
+                                                                            'R2,ACME,MC1,A,B,2025-01-03 08:00,2025-01-04 08:00,,900.5,100,,booked')))
+            Load.objects.bulk_create([Load(company=self.company, driver=self.truck, load_ref='R3', **given)])
+        imported, saved = Load.objects.get(load_ref='R1'), Load.objects.get(load_ref='R3')
+        names = {imported.bol_file.name, Load.objects.get(load_ref='R2').bol_file.name, saved.bol_file.name}
+        self.assertEqual((len(names), all(n.startswith('loads/bol/') for n in names)), (3, True))  # a fresh default per row
+        for f in Load._meta.concrete_fields:
+            if f.name not in ('id', 'load_ref', 'bol_file'): self.assertEqual(getattr(imported, f.attname), getattr(saved, f.attname), f.name)
+
+    def test_oversized_upload_is_refused(self):
+        with mock.patch.object(LoadImportUploadForm, 'MAX_BYTES', 10):
+            r = self.client.post(reverse('import_loads'), {'csv_file': self.csv('R1,ACME,MC1,A,B,2025-01-01 08:00,2025-01-02 08:00,U1,900,100,0,paid')})
+        self.assertIsNone(r.context['result'])
+        self.assertFalse(Load.objects.exists())
+
+
+# --- 11. BULK STATUS TRANSITIONS ---
+class TransitionTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+
+    def post(self, ids, status):
+        return self.client.post(reverse('transition_loads'), {'load_ids': ids, 'new_status': status}, HTTP_ACCEPT='application/json')
+
+    def test_malformed_ids_are_ignored(self):
+        load = make_load(self.company)
+        r = self.post(['\u00b2', '\u0661', '9' * 30, '-1', f' {load.id}', str(load.id)], 'active')
+        self.assertEqual((r.status_code, [x['id'] for x in r.json()['results']]), (200, [load.id]))
+        load.refresh_from_db()
+        self.assertEqual(load.status, 'active')
+
+    def test_moves_eligible_loads_in_one_update(self):
+        booked = [make_load(self.company, days=i) for i in range(5)]
+        delivered = make_load(self.company, status='delivered')
+        foreign = make_load(make_company('other')[1])
+        self.client.get(reverse('manage_loads'))  # warm the tenant cache
+
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.post([l.id for l in booked] + [delivered.id, foreign.id], 'active')
+        self.assertEqual(sum(q['sql'].startswith('UPDATE "core_load"') for q in ctx.captured_queries), 1)
+        results = {row['id']: row for row in r.json()['results']}
+        self.assertTrue(all(results[l.id]['ok'] for l in booked))
+        self.assertFalse(results[delivered.id]['ok'])
+        self.assertEqual(results[foreign.id]['error'], 'Load not found.')
+        self.assertEqual(Load.objects.filter(company=self.company, status='active').count(), 5)
+        foreign.refresh_from_db(); self.assertEqual(foreign.status, 'booked')
+        self.assertEqual(rollups.drift(self.company), {})
+
+    def test_rejects_skips_and_unknown_targets(self):
+        load = make_load(self.company)
+        self.assertFalse(self.post([load.id], 'paid').json()['results'][0]['ok'])
+        self.assertEqual(self.post([load.id], 'lost').status_code, 400)
+        self.client.post(reverse('transition_loads'), {'load_ids': [load.id], 'new_status': 'active'})
+        load.refresh_from_db()
+        self.assertEqual(load.status, 'active')
+
+    def test_complete_load_goes_through_transitions(self):
+        active, booked = make_load(self.company, status='active'), make_load(self.company, days=1)
+        url = lambda l: reverse('complete_load', args=[l.id])
+        self.assertEqual(self.client.get(url(active)).status_code, 405)
+        self.client.post(url(active)); self.client.post(url(booked))
+        self.assertEqual(Load.objects.get(pk=active.pk).status, 'delivered')
+        self.assertEqual(Load.objects.get(pk=booked.pk).status, 'booked')  # can't skip the trip
+        self.assertEqual(rollups.drift(self.company), {})
+        self.assertEqual(self.client.post(reverse('complete_load', args=[make_load(make_company('other')[1]).id])).status_code, 404)
+
+
+# --- 12. ACCOUNTING EXPORT ---
+class LoadExportTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+        driver = Driver.objects.create(company=self.company, name='Sam', truck_number='U7')
+        self.paid = make_load(self.company, driver, status='paid', days=-10, broker_name='ACME', rate=1200, expenses=300)
+        self.booked = make_load(self.company, status='booked', days=2)
+        make_load(make_company('other')[1], status='paid')
+
+    def export(self, **params):
+        r = self.client.get(reverse('export_loads'), params)
+        self.assertTrue(r.streaming)
+        return b''.join(r.streaming_content).decode()
+
+    def test_csv_includes_paid_history_with_profit(self):
+        rows = list(csv.DictReader(StringIO(self.export())))
+        self.assertEqual([int(r['id']) for r in rows], [self.paid.id, self.booked.id])
+        self.assertEqual((rows[0]['driver_truck_number'], rows[0]['broker_name'], rows[0]['net_profit']), ('U7', 'ACME', '900.00'))
+
+    def test_ndjson_with_filters(self):
+        lines = self.export(format='ndjson', status='paid').splitlines()
+        self.assertEqual([json.loads(l)['id'] for l in lines], [self.paid.id])
+        today = timezone.localdate()
+        self.assertEqual(self.export(format='ndjson', pickup_from=today.isoformat()).count('\n'), 1)
+
+    def test_command_streams_to_stdout(self):
+        out = StringIO()
+        call_command('export_loads', self.company.id, '--status', 'booked', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+# --- 13. DEDUPLICATING STORAGE ---
+class DedupStorageTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.company = make_company()
+
+    def test_identical_uploads_share_one_blob(self):
+        self.company.mc_cert = upload('mc.png', b'same bytes'); self.company.w9_cert = upload('w9.png', b'same bytes'); self.company.save()
+        d = Driver.objects.create(company=self.company, name='Ann', truck_number='101', cdl_file=upload('cdl.png', b'other'))
+        mc, w9 = self.company.mc_cert, self.company.w9_cert
+        self.assertNotEqual(mc.name, w9.name)
+        self.assertTrue(os.path.samefile(mc.path, w9.path))
+        self.assertEqual((dedup_storage.references(mc.name), dedup_storage.references(d.cdl_file.name)), (2, 1))
+        self.assertEqual(w9.read(), b'same bytes')
+
+        blobs = os.path.join(self.media_root, 'blobs')
+        count = lambda: sum(len(f) for p, _, f in os.walk(blobs) if not p.endswith('tmp'))
+        self.assertEqual(count(), 2)
+        dedup_storage.delete(mc.name)
+        self.assertEqual((dedup_storage.references(w9.name), count()), (1, 2))
+        dedup_storage.delete(w9.name)
+        self.assertEqual(count(), 1)
+
+    def test_dedupe_media_links_existing_copies(self):
+        for folder in ('compliance/mc', 'compliance/w9', 'receipts'):
+            os.makedirs(os.path.join(self.media_root, folder))
+            with open(os.path.join(self.media_root, folder, 'shot.png'), 'wb') as f: f.write(b'x' * 2048)
+        out = StringIO()
+        call_command('dedupe_media', stdout=out)
+        paths = [os.path.join(self.media_root, f, 'shot.png') for f in ('compliance/mc', 'compliance/w9', 'receipts')]
+        self.assertTrue(os.path.samefile(paths[0], paths[1]) and os.path.samefile(paths[0], paths[2]))
+        self.assertEqual(dedup_storage.references('receipts/shot.png'), 3)
+        self.assertIn('Scanned 3 files', out.getvalue())
+
+
+# --- 14. IMAGE PREVIEWS ---
+def image_upload(name='shot.jpg', size=(2400, 1600), fmt='JPEG'):
+    from PIL import Image
+    out = io.BytesIO()
+    exif = Image.Exif(); exif[0x010F] = 'PhoneMaker'
+    Image.new('RGB', size, (200, 30, 30)).save(out, fmt, exif=exif)
+    return upload(name, out.getvalue(), 'image/jpeg')
+
+
+class PreviewTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.company = make_company()
+
+    def test_receipt_preview_built_after_commit(self):
+        from PIL import Image
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.payment_receipt = image_upload(); self.company.save()
+        thumbnails.wait()
+        name = self.company.payment_receipt.name
+        with Image.open(dedup_storage.path(thumbnails.preview_name(name))) as img:
+            self.assertLessEqual(max(img.size), max(thumbnails.PREVIEW_SIZE))
+            self.assertFalse(img.getexif())
+        self.assertLess(dedup_storage.size(thumbnails.preview_name(name)), self.company.payment_receipt.size)
+
+        superuser = User.objects.create_superuser('hq', password=None)
+        self.company.is_active = False; self.company.payment_submitted_at = timezone.now(); self.company.save()
+        self.client.force_login(superuser)
+        self.assertContains(self.client.get(reverse('super_admin_desk')), thumbnails.preview_url(name))
+
+    def test_pdfs_are_skipped_and_backfill_builds_missing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            d = Driver.objects.create(company=self.company, name='Ann', truck_number='1', cdl_file=upload('cdl.pdf'),
+                                      medical_card_file=image_upload('med.png', (300, 300), 'PNG'))
+        thumbnails.wait()
+        self.assertIsNone(Document.objects.get(kind='cdl_file').preview_url)
+        dedup_storage.delete(thumbnails.preview_name(d.medical_card_file.name))
+
+        out = StringIO()
+        call_command('build_previews', stdout=out)
+        self.assertIn('Built 1 previews', out.getvalue())
+        self.assertIsNotNone(Document.objects.get(kind='medical_card_file').preview_url)
+
+
+# --- 15. AUTHORIZED MEDIA ---
+class MediaServingTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+        self.company.mc_cert = upload('mc.pdf', b'0123456789' * 100); self.company.save()
+        self.url = self.company.mc_cert.url
+
+    def test_only_the_owning_tenant_can_download(self):
+        r = self.client.get(self.url)
+        self.assertEqual((r.status_code, b''.join(r.streaming_content)), (200, b'0123456789' * 100))
+        self.assertEqual(r['Content-Type'], 'application/pdf')
+        other, _ = make_company('other')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get('/media/blobs/../' + self.company.mc_cert.name).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_conditional_and_range_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        r = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual((r.status_code, r['Content-Range'], b''.join(r.streaming_content)), (206, 'bytes 10-19/1000', b'0123456789'))
+        self.assertEqual(b''.join(self.client.get(self.url, HTTP_RANGE='bytes=-5').streaming_content), b'56789')
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=2000-').status_code, 416)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"').status_code, 200)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_hands_off_to_proxy(self):
+        r = self.client.get(self.url)
+        self.assertEqual(r['X-Accel-Redirect'], f'/protected-media/{self.company.mc_cert.name}')
+        self.assertEqual(r.content, b'')
+
+        self.company.mc_cert = upload('Şirket MC.pdf'); self.company.save()
+        folder, _, base = self.company.mc_cert.name.rpartition('/')
+        self.assertEqual(self.client.get(self.company.mc_cert.url)['X-Accel-Redirect'], f"/protected-media/{folder}/{base.replace('Ş', '%C5%9E')}")
+        path = os.path.join(self.media_root, 'legacy name #1 50%.pdf')
+        with open(path, 'wb') as f: f.write(b'%PDF')
+        r = media.serve(RequestFactory().get('/'), 'legacy name #1 50%.pdf', path, 'application/pdf')
+        self.assertEqual(r['X-Accel-Redirect'], '/protected-media/legacy%20name%20%231%2050%25.pdf')
+
+
+# --- 16. DATABASE ROUTING ---
+class DatabaseRoutingTests(TransactionTestCase):
+    # TestCase wraps every test in a transaction, which (correctly) pins all reads to the primary
+    databases = '__all__'
+
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.client.force_login(self.user)
+        self.router = ReplicaRouter()
+
+    def routed(self, request, action=lambda: None):
+        seen = []
+        @db.replica_reads
+        def view(request):
+            seen.append(self.router.db_for_read(Load))
+            action()
+            seen.append(self.router.db_for_read(Load))
+            return seen
+        return view(request)
+
+    def test_reads_go_to_replica_until_a_write(self):
+        factory = RequestFactory()
+        with mock.patch('core.db.replica_configured', return_value=True):
+            self.assertEqual(self.routed(factory.get('/')), ['replica', 'replica'])
+            self.assertEqual(self.routed(factory.get('/'), lambda: make_load(self.company)), ['replica', 'default'])
+            self.assertEqual(self.routed(factory.post('/')), ['default', 'default'])
+            pinned = factory.get('/'); pinned.COOKIES[db.PIN_COOKIE] = str(time.time() + 5)
+            self.assertEqual(self.routed(pinned), ['default', 'default'])
+        self.assertEqual(self.router.db_for_read(Load), 'default')
+        with mock.patch('core.db.replica_configured', return_value=False):
+            self.assertEqual(self.routed(factory.get('/')), ['default', 'default'])
+
+    def test_unsafe_requests_pin_the_client_to_the_primary(self):
+        with mock.patch('core.db.replica_configured', return_value=True):
+            r = self.client.post(reverse('transition_loads'), {'load_ids': [], 'new_status': 'active'})
+        self.assertIn(db.PIN_COOKIE, r.cookies)
+        self.assertNotIn(db.PIN_COOKIE, self.client.get(reverse('dashboard')).cookies)
+
+    @skipUnless('replica' in settings.DATABASES, "no replica configured (set DATABASE_REPLICA_URL)")
+    def test_read_heavy_views_query_the_replica(self):
+        self.client.cookies.pop(db.PIN_COOKIE, None)
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        self.assertTrue(replica.captured_queries)
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite only")
+    def test_sqlite_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout'); self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute('PRAGMA synchronous'); self.assertEqual(cursor.fetchone()[0], 1)
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite only")
+    def test_wal_is_an_explicit_one_time_switch(self):
+        path = os.path.join(tempfile.mkdtemp(), 'wal.sqlite3')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        journal_mode = lambda conn: conn.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+        default = connections['default']
+        fresh = lambda: type(default)({**default.settings_dict, 'NAME': path}, alias='scratch')
+
+        first = fresh(); first.ensure_connection()  # connection_created hook runs
+        self.assertEqual(journal_mode(first), 'delete')
+        self.assertEqual(db.enable_wal(first), 'wal')
+        first.close()
+        second = fresh(); second.ensure_connection()
+        self.assertEqual(journal_mode(second), 'wal')  # stored in the file
+        second.close()
+
+
+# --- 17. LIVE BOARD EVENTS ---
+class LiveEventTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.driver = Driver.objects.create(company=self.company, name='Driver', truck_number='U1')
+
+    def published(self, action):
+        with mock.patch.object(events.broker(), 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            action()
+        return [(name, event) for (name, event), _ in publish.call_args_list]
+
+    def test_writes_publish_on_the_company_channel(self):
+        load = make_load(self.company, driver=self.driver)
+        channel = events.channel(self.company.id)
+        [(name, event)] = self.published(lambda: Load.objects.filter(pk=load.pk).first().save())
+        self.assertEqual((name, event['type'], event['id'], event['truck']), (channel, 'load', load.id, 'U1'))
+        [(_, event)] = self.published(lambda: transitions.transition(self.company, [load.id], 'active'))
+        self.assertEqual((event['type'], event['ids'], event['status_label']), ('status', [load.id], 'In Transit'))
+        self.assertEqual(self.published(lambda: transitions.transition(self.company, [load.id], 'active')), [])
+        self.assertIn((channel, {'type': 'load', 'id': load.id, 'deleted': True}), self.published(lambda: Load.objects.get(pk=load.pk).delete()))
+
+    async def test_publish_from_a_worker_thread_reaches_subscribers(self):
+        broker = events.LocalBroker()
+        sub, other = broker.subscribe('company:1'), broker.subscribe('company:2')
+        worker = threading.Thread(target=broker.publish, args=('company:1', {'type': 'resync'}))
+        worker.start(); worker.join()
+        self.assertEqual(await sub.get(1), {'type': 'resync'})
+        with self.assertRaises(asyncio.TimeoutError): await other.get(0.05)
+        sub.close(); other.close()
+        self.assertEqual(broker.subscribers, {})
+
+    async def test_socket_broker_relays_between_processes(self):
+        directory = tempfile.mkdtemp(); self.addCleanup(shutil.rmtree, directory)
+        with override_settings(EVENTS_SOCKET=os.path.join(directory, 'events.sock')):
+            web, board = events.SocketBroker(), events.SocketBroker()  # e.g. a web worker and the events process
+            web.publish('company:1', {'type': 'resync'})  # no events process yet: dropped
+            sub = board.subscribe('company:1')
+            web.publish('company:2', {'type': 'resync'})
+            web.publish('company:1', {'type': 'status', 'ids': [7]})
+            self.assertEqual(await sub.get(1), {'type': 'status', 'ids': [7]})
+            with self.assertRaises(asyncio.TimeoutError): await sub.get(0.05)
+        sub.close()
+        asyncio.get_running_loop().remove_reader(board.receiver.fileno())
+        board.receiver.close(); web.sender.close()
+
+    async def test_stream_relays_events_and_unsubscribes(self):
+        await self.async_client.aforce_login(self.user)
+        r = await self.async_client.get(reverse('load_events'))
+        self.assertEqual((r['Content-Type'], r['Cache-Control']), ('text/event-stream', 'no-cache'))
+        body = aiter(r.streaming_content)
+        self.assertEqual(await anext(body), b'retry: 5000\n\n')
+        events.broker().publish(events.channel(self.company.id), {'type': 'status', 'ids': [7]})
+        self.assertEqual(await anext(body), b'event: status\ndata: {"type":"status","ids":[7]}\n\n')
+        waiting = asyncio.ensure_future(anext(body))
+        await asyncio.sleep(0.01)
+        waiting.cancel()  # what the ASGI handler does when the client disconnects
+        with self.assertRaises(asyncio.CancelledError): await waiting
+        self.assertNotIn(events.channel(self.company.id), events.broker().subscribers)
+
+    def test_stream_requires_an_active_tenant(self):
+        self.assertEqual(self.client.get(reverse('load_events')).status_code, 403)
+
+    def test_wsgi_boards_are_told_not_to_reconnect(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('load_events')).status_code, 204)
+
+
+# --- 18. JSON API ---
+class JsonApiTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.company = make_company()
+        self.driver = Driver.objects.create(company=self.company, name='Driver', truck_number='U1')
+        self.client.force_login(self.user)
+
+    def test_list_is_paginated_and_narrowed_to_requested_fields(self):
+        loads = [make_load(self.company, driver=self.driver, days=i) for i in range(5)]
+        make_load(make_company('other')[1])
+        r = self.client.get(reverse('api_loads'), {'fields': 'id,status,driver__truck_number', 'limit': 3})
+        body = r.json()
+        self.assertEqual(body['results'][0], {'id': loads[-1].id, 'status': 'booked', 'driver__truck_number': 'U1'})
+        rest = self.client.get(body['next']).json()
+        self.assertEqual([l['id'] for l in body['results'] + rest['results']], [l.id for l in reversed(loads)])
+        self.assertIsNone(rest['next'])
+        self.assertEqual(self.client.get(reverse('api_loads'), {'fields': 'company'}).status_code, 400)
+
+    def test_unchanged_poll_is_a_cheap_304(self):
+        load = make_load(self.company, driver=self.driver)
+        url = reverse('api_loads')
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(r.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if 'core_load' in q['sql']])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        transitions.transition(self.company, [load.id], 'active')
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual((r.status_code, r.json()['results'][0]['status']), (200, 'active'))
+        self.assertNotEqual(r['ETag'], first['ETag'])
+
+    def test_writes_are_validated_by_the_forms(self):
+        r = self.client.post(reverse('api_drivers'), {'name': 'New', 'truck_number': 'U2', 'truck_type': 'Reefer', 'status': 'Active'})
+        self.assertEqual((r.status_code, r.json()['truck_number']), (201, 'U2'))
+        self.assertEqual(self.client.post(reverse('api_drivers'), {'name': 'No truck'}).status_code, 400)
+
+        load = make_load(self.company)  # no rate con, like a CSV-imported load
+        url = reverse('api_load', args=[load.id])
+        r = self.client.patch(url, {'status': 'delivered', 'driver': self.driver.id}, content_type='application/json')
+        self.assertEqual((r.status_code, r.json()['status'], r.json()['driver']), (200, 'delivered', self.driver.id))
+        r = self.client.patch(url, {'rate': 'lots'}, content_type='application/json')
+        self.assertIn('rate', r.json()['fields'])
+        other_driver = Driver.objects.create(company=make_company('other')[1], name='X', truck_number='X1')
+        self.assertEqual(self.client.patch(url, {'driver': other_driver.id}, content_type='application/json').status_code, 400)
+
+    def test_create_and_update_loads(self):
+        when = timezone.now().replace(microsecond=0)
+        body = {'load_ref': 'API1', 'origin': 'Dallas, TX', 'destination': 'Austin, TX', 'pickup_date': when.isoformat(),
+                'delivery_date': (when + timedelta(days=1)).isoformat(), 'rate': '1500.00', 'status': 'booked', 'driver': self.driver.id}
+        r = self.client.post(reverse('api_loads'), body, content_type='application/json')
+        self.assertEqual((r.status_code, r.json()['load_ref'], r.json()['rate_con_file']), (201, 'API1', None))
+        load = Load.objects.get(pk=r.json()['id'])
+        self.assertEqual((load.company, load.driver), (self.company, self.driver))
+
+        r = self.client.post(reverse('api_loads'), {**body, 'load_ref': 'API2', 'driver': '', 'rate_con_file': upload('rc.pdf')})  # multipart
+        self.assertEqual(r.status_code, 201)
+        with_file = Load.objects.get(pk=r.json()['id'])
+        url = reverse('api_load', args=[with_file.id])
+        r = self.client.patch(url, 'status=active&miles=640', content_type='application/x-www-form-urlencoded')
+        with_file.refresh_from_db()
+        self.assertEqual((r.status_code, with_file.status, with_file.miles), (200, 'active', 640))
+        self.assertTrue(with_file.rate_con_file.name)  # kept
+
+        self.assertEqual(self.client.patch(url, 'status=paid', content_type='text/plain').status_code, 415)
+        self.assertEqual(self.client.post(reverse('api_loads'), 'x', content_type='text/plain').status_code, 415)
+
+    def test_tenant_scoping(self):
+        foreign = make_load(make_company('other')[1])
+        self.assertEqual(self.client.get(reverse('api_load', args=[foreign.id])).status_code, 404)
+        self.assertEqual(self.client.patch(reverse('api_load', args=[foreign.id]), {}, content_type='application/json').status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_loads')).status_code, 401)
+
+    def test_bearer_token_needs_no_session_or_csrf(self):
+        self.user.set_password('pw'); self.user.save()
+        client = Client(enforce_csrf_checks=True)
+        self.assertEqual(client.post(reverse('api_token'), {'username': 'dispatch', 'password': 'nope'}).status_code, 401)
+        r = client.post(reverse('api_token'), {'username': 'dispatch', 'password': 'pw', 'name': 'TMS'}, content_type='application/json')
+        key = r.json()['token']
+        self.assertEqual((r.status_code, ApiToken.objects.get().name), (201, 'TMS'))
+        self.assertNotIn(key, ApiToken.objects.values_list('digest', flat=True))
+
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {key}'}
+        r = client.post(reverse('api_drivers'), {'name': 'Token', 'truck_number': 'T1', 'truck_type': 'Reefer', 'status': 'Active'}, **auth)
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(client.get(reverse('api_drivers'), **auth).json()['results'][-1]['name'], 'Token')
+        self.assertEqual(client.get(reverse('api_drivers'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+        self.assertEqual(client.delete(reverse('api_token'), **auth).status_code, 204)
+        self.assertEqual(client.get(reverse('api_drivers'), **auth).status_code, 401)
+
+    def test_session_writes_still_need_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        self.assertEqual(client.get(reverse('api_drivers')).status_code, 200)
+        self.assertEqual(client.post(reverse('api_drivers'), {'name': 'Forged', 'truck_number': 'F1'}).status_code, 403)
+        self.assertFalse(Driver.objects.filter(name='Forged').exists())
+
+    def test_first_write_before_any_read_changes_the_etag(self):
+        self.assertEqual(CompanyDataVersion.objects.get(company=self.company).version, 1)  # setUp's driver, never read
+        make_load(self.company)
+        self.assertEqual(CompanyDataVersion.objects.get(company=self.company).version, 2)
+        url = reverse('api_loads')
+        first = self.client.get(url)
+        make_load(self.company, days=1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+# --- 19. FRAGMENT CACHE ---
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.driver = Driver.objects.create(company=self.company, name='Driver', truck_number='U1')
+        self.client.force_login(self.user)
+        fragments.reset_stats()
+
+    def test_board_is_served_from_cache_until_a_write(self):
+        load = make_load(self.company, driver=self.driver, load_ref='FIRST')
+        self.client.get(reverse('manage_loads'))
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(reverse('manage_loads'))
+        self.assertContains(r, 'FIRST')
+        self.assertFalse([q for q in ctx.captured_queries if 'core_load' in q['sql']])
+        self.assertEqual(fragments.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 50.0})
+
+        load.load_ref = 'RENAMED'; load.save()
+        self.assertContains(self.client.get(reverse('manage_loads')), 'RENAMED')
+        self.driver.name = 'Renamed Driver'; self.driver.save()
+        self.assertContains(self.client.get(reverse('manage_fleet')), 'Renamed Driver')
+        self.assertNotContains(self.client.get(reverse('manage_loads'), {'status': 'active'}), 'RENAMED')
+
+    def test_cached_forms_carry_each_users_csrf_token(self):
+        make_load(self.company, driver=self.driver)
+        colleague = User.objects.create_user('colleague')
+        UserProfile.objects.create(user=colleague, company=self.company, role='dispatcher')
+        other = self.client_class(enforce_csrf_checks=True)
+        other.force_login(colleague)
+
+        self.client.get(reverse('manage_loads'))
+        r = other.get(reverse('manage_loads'))
+        self.assertEqual(fragments.stats()['hits'], 1)
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', r.content.decode()).group(1)
+        self.assertNotIn('FRAGMENT-CSRF-TOKEN', r.content.decode())
+        r = other.post(reverse('transition_loads'), {'load_ids': [], 'new_status': 'active', 'csrfmiddlewaretoken': token})
+        self.assertEqual(r.status_code, 302)
+
+    def test_fragments_are_per_company(self):
+        make_load(self.company, driver=self.driver, load_ref='MINE')
+        self.client.get(reverse('manage_loads'))
+        stranger, _ = make_company('other')
+        self.client.force_login(stranger)
+        self.assertNotContains(self.client.get(reverse('manage_loads')), 'MINE')
+
+
+# --- 20. DRIVER AVAILABILITY ---
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.busy = Driver.objects.create(company=self.company, name='Busy', truck_number='U1')
+        self.free = Driver.objects.create(company=self.company, name='Free', truck_number='U2')
+        self.booked = make_load(self.company, driver=self.busy, load_ref='TAKEN', days=1)  # pickup +1d, delivery +2d
+
+    def test_index_matches_a_scan(self):
+        rng = random.Random(7)
+        rows = [(i, rng.randrange(20), s, s + rng.uniform(1, 50)) for i, s in enumerate(rng.uniform(0, 1000) for _ in range(500))]
+        index = availability.IntervalIndex(rows)
+        for _ in range(200):
+            s = rng.uniform(-50, 1050); e = s + rng.uniform(0.5, 80)
+            expected = {}
+            for _, d, rs, re_ in rows:
+                if rs < e and re_ > s: expected[d] = max(expected.get(d, re_), re_)
+            self.assertEqual(index.busy(s, e), expected)
+        self.assertEqual(availability.IntervalIndex([]).busy(0, 1), {})
+
+    def test_queries_scan_at_most_a_leaf_or_two(self):
+        rows = [(i, 1, i, i + 0.5) for i in range(767)]  # not a power of two: the last subtree is partly empty
+        index = availability.IntervalIndex(rows)
+        scanned = []
+        real = availability.compress
+        with mock.patch.object(availability, 'compress', side_effect=lambda data, flags: scanned.append(len(data)) or real(data, flags)):
+            for t in (3, 300, 520, 600, 700, 766):
+                scanned.clear()
+                self.assertEqual(index.overlapping(t + 0.1, t + 0.2), [t])
+                self.assertLessEqual(sum(scanned), 2 * index.LEAF)
+
+    def form(self, days, instance=None, **data):
+        when = timezone.localtime(timezone.now() + timedelta(days=days))
+        fields = {'load_ref': 'NEW', 'origin': 'A', 'destination': 'B', 'rate': 1000, 'miles': 10, 'expenses': 0, 'status': 'booked',
+                  'pickup_date': f'{when:%Y-%m-%dT%H:%M}', 'delivery_date': f'{when + timedelta(hours=6):%Y-%m-%dT%H:%M}', **data}
+        files = {} if instance else {'rate_con_file': upload('rc.pdf', b'%PDF', 'application/pdf')}
+        return LoadForm(self.company, fields, files, instance=instance)
+
+    def test_dropdown_flags_trucks_booked_in_the_window(self):
+        html = str(self.form(1.5)['driver'])
+        self.assertRegex(html, r'<option value="%d" disabled>Busy \(booked until' % self.busy.id)
+        self.assertRegex(html, r'<option value="%d">' % self.free.id)
+        self.assertNotIn('disabled', str(self.form(5)['driver']))
+
+    def test_overlapping_assignment_is_rejected(self):
+        form = self.form(1.5, driver=self.busy.id)
+        self.assertFalse(form.is_valid())
+        self.assertIn('TAKEN', form.errors['driver'][0])
+        self.assertTrue(self.form(1.5, driver=self.free.id).is_valid())
+        self.assertTrue(self.form(5, driver=self.busy.id).is_valid())
+        self.assertTrue(self.form(1.5, driver=self.busy.id, status='delivered').is_valid())
+        self.booked.rate_con_file = 'loads/ratecons/rc.pdf'
+        self.assertTrue(self.form(1.2, instance=self.booked, driver=self.busy.id).is_valid())  # a load never clashes with itself
+
+    def test_index_follows_writes(self):
+        window = (self.booked.pickup_date.timestamp(), self.booked.delivery_date.timestamp())
+        self.assertIn(self.busy.id, availability.for_company(self.company.id).busy(*window))
+        transitions.transition(self.company, [self.booked.id], 'active')
+        transitions.transition(self.company, [self.booked.id], 'delivered')
+        self.assertEqual(availability.for_company(self.company.id).busy(*window), {})
+
+
+# --- 21. LANE ANALYTICS ---
+class LaneAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        for i, (origin, rate, miles) in enumerate([('Dallas, TX', 1000, 500), ('dallas, tx ', 3000, 1000), ('Dallas, TX', 2000, 500)]):
+            make_load(self.company, days=-i, origin=origin, destination='Austin, TX', broker_name='ACME', rate=rate, miles=miles, expenses=100)
+        make_load(self.company, days=-5, origin='Houston, TX', destination='Austin, TX', broker_name='', rate=900, miles=0, expenses=0)
+        make_load(self.company, days=-400, origin='Old, TX', destination='Austin, TX')  # outside the window
+
+    def test_lane_and_broker_stats(self):
+        report = lanes.for_company(self.company.id)
+        self.assertEqual(report['loads'], 4)
+        top, bare = report['lanes']
+        self.assertEqual((top['origin'], top['destination'], top['loads']), ('Dallas, TX', 'Austin, TX', 3))
+        self.assertEqual((top['revenue'], top['miles'], top['rpm'], top['ppm']), (6000, 2000, 3.0, 2.85))
+        self.assertEqual((top['rpm_p25'], top['rpm_p50'], top['rpm_p75']), (2.5, 3.0, 3.5))  # per-load 2, 3, 4 $/mi
+        self.assertEqual((bare['loads'], bare['rpm'], bare['rpm_p50']), (1, None, None))
+        self.assertEqual([(b['broker'], b['loads']) for b in report['brokers']], [('ACME', 3), ('(no broker)', 1)])
+
+    def test_cached_until_loads_change(self):
+        lanes.for_company(self.company.id)
+        with self.assertNumQueries(0): lanes.for_company(self.company.id)
+        make_load(self.company, origin='Dallas, TX', destination='Austin, TX', rate=500, miles=500)
+        self.assertEqual(lanes.for_company(self.company.id)['lanes'][0]['loads'], 4)
+
+    def test_page_hides_profit_on_starter(self):
+        self.client.force_login(self.user)
+        r = self.client.get(reverse('lane_analytics'))
+        self.assertContains(r, 'Dallas, TX')
+        self.assertContains(r, '2.85')
+        self.company.plan_type = 'starter'; self.company.save()
+        self.assertNotContains(self.client.get(reverse('lane_analytics')), '2.85')
+
+
+# --- 22. EXPIRY SWEEPER ---
+class ExpirySweeperTests(TestCase):
+    def setUp(self):
+        self.user, self.lapsed = make_company('lapsed')
+        _, self.current = make_company('current')
+        Company.objects.filter(pk=self.lapsed.pk).update(subscription_end_date=timezone.now() - timedelta(hours=1),
+                                                         payment_submitted_at=timezone.now() - timedelta(days=31))
+
+    def test_lapsed_subscriptions_switched_off(self):
+        self.assertFalse(tenancy.resolve(self.user).has_access)  # the end date counts before any sweep
+        self.assertTrue(tenancy.resolve(self.user).is_active)
+        with self.captureOnCommitCallbacks(execute=True): counts = sweeper.sweep()
+        self.assertEqual(counts['subscription_expired'], 1)
+        self.assertEqual(Company.objects.filter(is_active=True).get(), self.current)
+        self.assertIsNone(Company.objects.get(pk=self.lapsed.pk).payment_submitted_at)
+        self.assertFalse(tenancy.resolve(self.user).is_active)  # cached snapshot dropped by the sweep
+        self.assertEqual(Notification.objects.get().kind, 'subscription_expired')
+
+    def test_shortened_access_applies_before_the_sweep(self):
+        user, company = make_company('shortened')
+        superuser = User.objects.create_superuser('hq', password='pw')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        self.client.force_login(superuser)
+        self.client.post(reverse('edit_access_days', args=[company.pk]), {'days': -60})
+        self.client.force_login(user)
+        self.assertRedirects(self.client.get(reverse('dashboard')), reverse('subscription_plans'), fetch_redirect_response=False)
+
+    def test_reminders_queued_once(self):
+        today = timezone.localdate()
+        Company.objects.filter(pk=self.current.pk).update(subscription_end_date=timezone.now() + timedelta(days=3),
+                                                          mc_expiry=today + timedelta(days=10), insurance_expiry=today - timedelta(days=1))
+        _, later = make_company('later')
+        Company.objects.filter(pk=later.pk).update(mc_expiry=today + timedelta(days=90))
+        sweeper.sweep(); sweeper.sweep()
+        notices = dict(Notification.objects.filter(company=self.current).values_list('kind', 'message'))
+        self.assertEqual(set(notices), {'subscription_expiring', 'mc_expiring', 'insurance_expiring'})
+        self.assertIn('expired on', notices['insurance_expiring'])
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertFalse(Notification.objects.filter(company=later).exists())
+
+    def test_query_count_does_not_grow_with_companies(self):
+        with CaptureQueriesContext(connection) as small: sweeper.sweep()
+        Notification.objects.all().delete()
+        for i in range(20):
+            _, c = make_company(f'lapsed{i}')
+            Company.objects.filter(pk=c.pk).update(subscription_end_date=timezone.now() - timedelta(days=1), mc_expiry=timezone.localdate())
+        with CaptureQueriesContext(connection) as large: sweeper.sweep()
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(Notification.objects.count(), 20)  # expired ones get no compliance nagging
+
+    def test_command_reports_counts(self):
+        out = StringIO()
+        call_command('sweep_expiry', stdout=out)
+        self.assertIn('Expired 1 subscriptions', out.getvalue())
+
+
+# --- 23. SEED DATA & VIEW BENCHMARKS ---
+class BenchmarkTests(TestCase):
+    def test_seed_then_benchmark_against_baseline(self):
+        call_command('seed_demo', companies=12, loads=400, stdout=StringIO())
+        self.assertEqual(Company.objects.count(), 12)
+        self.assertEqual(Load.objects.count(), sum(CompanyDailyStats.objects.values_list('loads', flat=True)))
+        self.assertTrue(Document.objects.filter(kind='rate_con_file').exists())
+        for c in Company.objects.select_related('usage'):
+            self.assertLessEqual(c.usage.drivers, entitlements.plan_for(c.plan_type).fleet_limit)
+
+        path = os.path.join(tempfile.mkdtemp(), 'views.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        out = StringIO()
+        call_command('bench_views', baseline=path, save=True, iterations=2, stdout=out)
+        with open(path) as f: saved = json.load(f)
+        self.assertEqual(set(saved['views']), {name for name, _ in benchmarks.VIEWS})
+        self.assertGreater(saved['views']['manage_loads']['queries'], 0)
+
+        for r in saved['views'].values(): r['queries'] -= 1
+        with open(path, 'w') as f: json.dump(saved, f)
+        with self.assertRaisesMessage(CommandError, 'regressions'):
+            call_command('bench_views', baseline=path, iterations=2, view=['dashboard'], stdout=out)
+
+    def test_compare_allows_noise_but_not_regressions(self):
+        base = {'dashboard': {'p50_ms': 8, 'p95_ms': 10, 'queries': 4, 'peak_kb': 400}}
+        self.assertEqual(benchmarks.compare({'dashboard': {'p50_ms': 9, 'p95_ms': 17, 'queries': 4, 'peak_kb': 500}}, base), [])
+        problems = benchmarks.compare({'dashboard': {'p50_ms': 30, 'p95_ms': 40, 'queries': 9, 'peak_kb': 4000}}, base)
+        self.assertEqual(len(problems), 3)
+
+
+# --- 24. REQUEST PROFILING ---
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.user, self.company = make_company()
+        self.driver = Driver.objects.create(company=self.company, name='Sam', truck_number='T1')
+        self.client.force_login(self.user)
+        profiling.reset()
+
+    def test_server_timing_header_for_staff_only(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('manage_fleet')))
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        r = self.client.get(reverse('manage_fleet'))
+        self.assertRegex(r['Server-Timing'], r'^sql;dur=[\d.]+;desc="\d+ queries, \d+ repeated", app;dur=[\d.]+, total;dur=[\d.]+$')
+        self.client.logout()
+        with override_settings(SERVER_TIMING_PUBLIC=True): self.assertIn('Server-Timing', self.client.get(reverse('home')))
+
+    def test_slow_request_log_directory_is_made_on_first_write(self):
+        path = os.path.join(tempfile.mkdtemp(), 'logs', 'slow.log')
+        self.addCleanup(shutil.rmtree, os.path.dirname(os.path.dirname(path)))
+        handler = profiling.SlowRequestFileHandler(path, delay=True)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+        handler.emit(logging.makeLogRecord({'msg': 'slow'}))
+        handler.close()
+        with open(path) as f: self.assertEqual(f.read(), 'slow\n')
+
+    def test_recorder_counts_repeats_and_folds_in_lists(self):
+        recorder = profiling.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for _ in range(3): list(Driver.objects.filter(pk=self.driver.pk))
+            list(Driver.objects.filter(pk__in=[1, 2])); list(Driver.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual((recorder.count, recorder.repeated), (5, 2))
+        (_, runs, _), (sql, in_runs, _) = sorted(recorder.costliest(), key=lambda r: -r[1])
+        self.assertEqual((runs, in_runs), (3, 2))
+        self.assertIn('IN (...)', sql)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_logged_with_sql(self):
+        with self.assertLogs('core.profiling', 'WARNING') as logs: self.client.get(reverse('manage_fleet'))
+        self.assertIn('GET /manage-fleet/ -> 200 [manage_fleet]', logs.output[0])
+        self.assertIn('core_driver', logs.output[0])
+
+    def test_hq_page_lists_endpoints(self):
+        for _ in range(3): self.client.get(reverse('manage_fleet'))
+        row = next(e for e in profiling.endpoints() if e['endpoint'] == 'manage_fleet')
+        self.assertEqual(row['requests'], 3)
+        self.assertGreater(row['avg_queries'], 0)
+        self.assertEqual(self.client.get(reverse('hq_performance')).status_code, 302)
+        self.client.force_login(User.objects.create_superuser('hq', password='pw'))
+        self.assertContains(self.client.get(reverse('hq_performance')), 'manage_fleet')
+        self.client.post(reverse('hq_performance'))
+        self.assertEqual([e['endpoint'] for e in profiling.endpoints()], ['hq_performance'])  # just the reset request itself
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('manage_fleet')))
+
+
+# --- 25. PROCESS WARM-UP ---
+class WarmupTests(TestCase):
+    def test_compiles_project_and_app_templates(self):
+        from django.template import engines
+        names = warmup.template_names(engines['django'].engine)
+        self.assertIn('manage_loads.html', names)
+        self.assertIn('admin/base.html', names)
+        compiled, seconds = warmup.warm()
+        self.assertGreaterEqual(compiled, len(names) - 5)
+        self.assertGreater(seconds, 0)
+
+    def gunicorn_config(self, **env):
+        with mock.patch.dict(os.environ, env): return runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+
+    def test_gunicorn_web_and_events_processes(self):
+        conf = self.gunicorn_config()
+        self.assertEqual((conf['worker_class'], conf['wsgi_app']), ('gthread', 'config.wsgi:application'))
+        self.assertGreaterEqual(conf['workers'], 3)
+        conf = self.gunicorn_config(GUNICORN_WORKER_CLASS='uvicorn.workers.UvicornWorker')
+        self.assertEqual((conf['workers'], conf['wsgi_app']), (1, 'config.asgi:application'))
+
+    def test_gunicorn_falls_back_to_one_worker_when_processes_share_nothing(self):
+        file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        def workers(conf, **overrides):
+            server = mock.Mock(num_workers=3)
+            with override_settings(**overrides): conf['on_starting'](server)
+            return server.num_workers
+        web, live = self.gunicorn_config(), self.gunicorn_config(GUNICORN_WORKER_CLASS='uvicorn.workers.UvicornWorker')
+        self.assertEqual((workers(web), workers(web, CACHES=file_cache)), (1, 3))  # tests run on a per-process cache
+        self.assertEqual(workers(live, CACHES=file_cache, EVENTS_BROKER='core.events.SocketBroker'), 1)
+        with mock.patch.object(events.SocketBroker, 'shared', True):
+            self.assertEqual(workers(live, CACHES=file_cache, EVENTS_BROKER='core.events.SocketBroker'), 3)
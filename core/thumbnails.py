@@ -0,0 +1,83 @@
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from .storage import dedup_storage
+
+# --- IMAGE PREVIEWS ---
+# Uploaded images get a small, EXIF-free WebP (JPEG if Pillow lacks WebP) preview at
+# previews/<original name>.<ext>, built by a thread pool after the upload's
+# transaction commits. Listings link the preview when it exists and the original
+# otherwise; the original is never modified.
+
+PREVIEW_DIR = 'previews'
+PREVIEW_SIZE = (640, 640)
+PREVIEW_QUALITY = 70
+PREVIEW_WORKERS = 2
+FORMAT, EXT = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+logger = logging.getLogger(__name__)
+_pool = None
+_pool_lock = threading.Lock()
+_pending = set()
+
+
+def preview_name(name): return f"{PREVIEW_DIR}/{name}.{EXT}"
+
+
+def preview_url(name):
+    """URL of the preview for a stored image, or None until one has been built."""
+    if not name: return None
+    preview = preview_name(name)
+    return dedup_storage.url(preview) if dedup_storage.exists(preview) else None
+
+
+def original_name(preview):
+    """Inverse of preview_name(), or None if `preview` is not a preview name."""
+    prefix, suffix = f"{PREVIEW_DIR}/", f".{EXT}"
+    return preview[len(prefix):-len(suffix)] if preview.startswith(prefix) and preview.endswith(suffix) else None
+
+
+def is_image(content_type): return content_type.startswith('image/')
+
+
+def build(name):
+    """Write the preview for `name` unless it already exists. Returns the preview name."""
+    preview = preview_name(name)
+    if dedup_storage.exists(preview): return preview
+    with dedup_storage.open(name, 'rb') as f, Image.open(f) as img:
+        img.draft('RGB', PREVIEW_SIZE)  # JPEG: decode at reduced scale
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(PREVIEW_SIZE)
+        if img.mode not in ('RGB', 'RGBA') or FORMAT == 'JPEG': img = img.convert('RGB')
+        out = io.BytesIO()
+        img.save(out, FORMAT, quality=PREVIEW_QUALITY, optimize=True)  # no exif= argument: metadata is dropped
+    return dedup_storage.save(preview, ContentFile(out.getvalue()))
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix='previews')
+        return _pool
+
+
+def _finished(future):
+    _pending.discard(future)
+    if future.exception(): logger.warning("Preview failed: %s", future.exception())
+
+
+def schedule(name):
+    future = _executor().submit(build, name)
+    _pending.add(future)
+    future.add_done_callback(_finished)
+    return future
+
+
+def wait():
+    """Block until every scheduled preview has been written (tests, management commands)."""
+    wait_futures(list(_pending))
@@ -0,0 +1,46 @@
+from django.db import transaction
+
+from . import api, events, fragments, rollups
+from .models import Load
+
+# --- LOAD STATUS TRANSITIONS ---
+# Loads only move one step forward: booked -> active -> delivered -> paid. A batch
+# is checked against the current statuses, then moved with one tenant-scoped UPDATE
+# that re-checks the source status, so a load changed by someone else in between is
+# left alone. The UPDATE skips Load signals; the rollup deltas are applied here.
+
+FLOW = ('booked', 'active', 'delivered', 'paid')
+PREVIOUS = dict(zip(FLOW[1:], FLOW))
+NOT_FOUND = "Load not found."
+
+
+class InvalidTransition(Exception):
+    pass
+
+
+def transition(company, load_ids, target):
+    """Move `load_ids` to `target`. Returns {load id: None if moved, else the reason it was not}."""
+    if target not in PREVIOUS: raise InvalidTransition(f"Loads cannot be moved to {target!r}.")
+    source = PREVIOUS[target]
+    ids = {int(i) for i in load_ids}
+    with transaction.atomic():
+        rows = {r['id']: r for r in Load.objects.select_for_update().filter(company=company, id__in=ids).values('id', *rollups.TRACKED)}
+        movable = {i for i, r in rows.items() if r['status'] == source}
+        Load.objects.filter(company=company, id__in=movable, status=source).update(status=target)
+
+        deltas = {}
+        for i in movable:
+            rollups.accumulate(deltas, rows[i], -1)
+            rollups.accumulate(deltas, {**rows[i], 'status': target})
+        rollups.add(deltas)
+        if movable:
+            api.touch(company.pk)
+            fragments.bump(company.pk)
+            events.publish(company.pk, events.status_event(movable, target))
+
+    results = {}
+    for i in sorted(ids):
+        if i not in rows: results[i] = NOT_FOUND
+        elif i not in movable: results[i] = f"Cannot move a {rows[i]['status']} load to {target}."
+        else: results[i] = None
+    return results
@@ -1,12 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
-from django.contrib.auth import login, logout
+from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from datetime import timedelta
+import mimetypes
+import os
+import re
+from django.conf import settings
 from django.contrib import messages
-from .models import Driver, Load, UserProfile, Company
-from .forms import LoadForm, DriverForm, RegistrationForm, OnboardingDocForm, PaymentReceiptForm, CompanyDocForm
+from django.core.files.storage import default_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.csrf import csrf_exempt
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from .models import ApiToken, Driver, Load, UserProfile, Company, Document
+from .forms import LoadForm, LoadApiForm, DriverForm, RegistrationForm, OnboardingDocForm, PaymentReceiptForm, CompanyDocForm, LoadBoardFilterForm, DocumentFilterForm, LoadImportUploadForm, LoadExportForm
+from .db import replica_reads
+from .pagination import KeysetPaginator, InvalidCursor
+from .schedule import fleet_schedule
+from .storage import dedup_storage
+from .tenancy import tenant_required
+from . import api, entitlements, events, exports, fragments, hq, importer, invoices, lanes, media, profiling, rollups, thumbnails, transitions
+
+BOARD_PAGE_SIZE = 50
+LOAD_ID = re.compile(r'[0-9]{1,18}')  # ASCII digits only (str.isdigit takes '²'), and within a 64-bit integer
+DOCUMENT_PAGE_SIZE = 25
+HQ_PAGE_SIZE = 50
+LANE_ROWS = 25
+
+def _query_without(request, *keys):
+    """Current GET params minus `keys`, url-encoded, for building pagination links."""
+    q = request.GET.copy()
+    for k in keys: q.pop(k, None)
+    return q.urlencode()
 
 # --- AUTH & REGISTRATION ---
 def register(request):
@@ -25,8 +54,9 @@ def register(request):
     return render(request, 'register.html', {'form': RegistrationForm()})
 
 @login_required
+@tenant_required
 def onboarding_docs(request):
-    c = request.user.userprofile.company
+    c = Company.objects.get(pk=request.tenant.company_id)
     if request.method == 'POST':
         form = OnboardingDocForm(request.POST, request.FILES, instance=c)
         if form.is_valid(): form.save(); return redirect('subscription_plans')
@@ -36,8 +66,9 @@ def onboarding_docs(request):
 def subscription_plans(request): return render(request, 'subscription_plans.html')
 
 @login_required
+@tenant_required
 def process_payment(request):
-    c = request.user.userprofile.company
+    c = Company.objects.get(pk=request.tenant.company_id)
     if 'plan' in request.GET: c.plan_type = request.GET['plan']; c.save()
     if request.method == 'POST':
         if request.FILES.get('payment_receipt'):
@@ -50,13 +81,27 @@ def process_payment(request):
 
 # --- HQ ADMIN ---
 @user_passes_test(lambda u: u.is_superuser)
+@replica_reads
 def super_admin_desk(request):
-    pending = Company.objects.filter(is_active=False).exclude(payment_submitted_at__isnull=True)
-    active = Company.objects.filter(is_active=True)
-    plan_prices = {'starter': 99, 'pro': 199, 'enterprise': 499}
-    mrr = sum(plan_prices.get(str(c.plan_type).lower(), 0) for c in active)
-    stats = {'total_clients': active.count(), 'mrr': mrr, 'pending_count': pending.count()}
-    return render(request, 'super_admin_desk.html', {'pending': pending, 'active': active, 'stats': stats})
+    pending = Company.objects.filter(is_active=False).exclude(payment_submitted_at__isnull=True).select_related('owner')
+    active = Company.objects.filter(is_active=True).select_related('owner')
+    pages = {}
+    for name, qs, ordering in (('pending', pending, ('payment_submitted_at', 'id')), ('active', active, ('-id',))):
+        paginator = KeysetPaginator(qs, ordering, per_page=HQ_PAGE_SIZE)
+        try: pages[name] = paginator.page(request.GET.get(f'{name}_cursor'))
+        except InvalidCursor: pages[name] = paginator.page()
+    for c in pages['pending']: c.receipt_preview = thumbnails.preview_url(c.payment_receipt.name)
+    return render(request, 'super_admin_desk.html', {
+        'pending': pages['pending'], 'active': pages['active'], 'stats': hq.snapshot(), 'fragment_stats': fragments.stats(),
+        'pending_query': _query_without(request, 'pending_cursor'), 'active_query': _query_without(request, 'active_cursor'),
+    })
+
+@user_passes_test(lambda u: u.is_superuser)
+def hq_performance(request):
+    if request.method == 'POST': profiling.reset(); return redirect('hq_performance')
+    return render(request, 'hq_performance.html', {
+        'endpoints': profiling.endpoints(), 'enabled': settings.REQUEST_PROFILING, 'slow_ms': settings.SLOW_REQUEST_MS,
+    })
 
 @user_passes_test(lambda u: u.is_superuser)
 def edit_access_days(request, company_id):
@@ -82,78 +127,121 @@ def delete_company(request, company_id):
 
 # --- DASHBOARD & TOOLS ---
 @login_required
+@replica_reads
 def dashboard(request):
     if request.user.is_superuser: return redirect('super_admin_desk')
-    try: c = request.user.userprofile.company
-    except: return redirect('register')
-    if c.payment_submitted_at and not c.is_active: return render(request, 'payment_pending.html')
-    if not c.has_access and not c.payment_submitted_at: return redirect('subscription_plans')
-    
-    drivers = Driver.objects.filter(company=c)
-    loads = Load.objects.filter(company=c).exclude(status='paid')
+    t = request.tenant
+    if t is None: return redirect('register')
+    c = t.company
+    if t.payment_pending: return render(request, 'payment_pending.html')
+    if not t.has_access and not c.payment_submitted_at: return redirect('subscription_plans')
     
     # --- PROFIT CALCULATION LIMIT ---
-    plan = str(c.plan_type).lower()
-    show_profit = True
-    if 'starter' in plan: 
-        show_profit = False  # Starter Plan CANNOT see profit
-    
-    schedule = []
-    for d in drivers:
-        fl = Load.objects.filter(driver=d).exclude(status='paid').order_by('-delivery_date').first()
-        status_label = "Available"; next_avail = "Ready Now"
-        if fl:
-            status_label = fl.status.title()
-            next_avail = f"{fl.destination} @ {fl.delivery_date.strftime('%b %d, %H:%M')}"
-        schedule.append({'unit': d.truck_number, 'driver': d.name, 'status_label': status_label, 'next_available': next_avail})
-    
-    stats = {
-        'revenue': sum(l.rate for l in loads),
-        'profit': sum(l.net_profit for l in loads) if show_profit else 0, # Hide value if starter
-        'drivers': drivers.count()
-    }
+    show_profit = t.entitlements.show_profit  # Starter Plan CANNOT see profit
+
+    # Lazy: only evaluated when the template's cached fragment misses
+    schedule = SimpleLazyObject(lambda: fleet_schedule(c))
+
+    def compute_stats():
+        open_totals = rollups.totals(c, exclude=['paid'])
+        return {
+            'revenue': open_totals['revenue'],
+            'profit': open_totals['profit'] if show_profit else 0, # Hide value if starter
+            'drivers': len(schedule)
+        }
+    stats = SimpleLazyObject(compute_stats)
     # Pass show_profit to template so we can blur/lock it
     return render(request, 'dashboard.html', {'stats': stats, 'company': c, 'schedule': schedule, 'show_profit': show_profit})
 
 @login_required
+@replica_reads
+@tenant_required
+def lane_analytics(request):
+    t = request.tenant
+    if not t.is_active: return render(request, 'payment_pending.html')
+    report = lanes.for_company(t.company_id)
+    return render(request, 'lane_analytics.html', {
+        'lanes': report['lanes'][:LANE_ROWS], 'brokers': report['brokers'][:LANE_ROWS], 'loads': report['loads'],
+        'days': lanes.HISTORY_DAYS, 'show_profit': t.entitlements.show_profit,
+    })
+
+@login_required
+@replica_reads
+@tenant_required
 def manage_loads(request):
-    c = request.user.userprofile.company
+    c = request.tenant.company
     if not c.is_active: return render(request, 'payment_pending.html')
-    loads = Load.objects.filter(company=c).exclude(status='paid').order_by('-pickup_date')
-    if request.method == 'POST':
-        l = get_object_or_404(Load, id=request.POST.get('load_id'), company=c)
-        l.status = request.POST.get('new_status'); l.save(); return redirect('manage_loads')
-    return render(request, 'manage_loads.html', {'loads': loads})
+    filters = LoadBoardFilterForm(c, request.GET or None)
+
+    def board_page():  # evaluated only when the board fragment misses
+        loads = filters.apply(Load.objects.filter(company=c).exclude(status='paid').select_related('driver'))
+        paginator = KeysetPaginator(loads, ('-pickup_date', '-id'), per_page=BOARD_PAGE_SIZE)
+        try: return paginator.page(request.GET.get('cursor'))
+        except InvalidCursor: return paginator.page()
+    page = SimpleLazyObject(board_page)
+    return render(request, 'manage_loads.html', {'loads': page, 'page': page, 'filters': filters, 'query': _query_without(request, 'cursor'),
+                                                 'live_statuses': ('booked', 'active', 'delivered')})
+
+async def load_events(request):
+    # async so an idle board holds no worker thread; needs the ASGI app (config.asgi)
+    tenant = request.tenant
+    if tenant is None or not tenant.is_active: return HttpResponseForbidden()
+    # under WSGI (sync gunicorn workers) the stream would pin a thread for good; 204 stops EventSource reconnecting
+    if not isinstance(request, ASGIRequest): return HttpResponse(status=204)
+    response = StreamingHttpResponse(events.stream(events.channel(tenant.company_id)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: flush each event instead of buffering the response
+    return response
 
 @login_required
+@tenant_required
+def transition_loads(request):
+    c = request.tenant.company
+    if request.method != 'POST' or not c.is_active: return redirect('manage_loads')
+    ids = [i for i in request.POST.getlist('load_ids') if LOAD_ID.fullmatch(i)]
+    target = request.POST.get('new_status')
+    try: results = transitions.transition(c, ids, target)
+    except transitions.InvalidTransition as e: results, error = {}, str(e)
+    else: error = None
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'status': target, 'error': error, 'results': [{'id': i, 'ok': r is None, 'error': r} for i, r in results.items()]},
+                            status=400 if error else 200)
+    moved = sum(r is None for r in results.values())
+    if moved: messages.success(request, f"Moved {moved} load{'s' if moved != 1 else ''} to {target}.")
+    for i, r in results.items():
+        if r: messages.error(request, f"Load #{i}: {r}")
+    if error: messages.error(request, error)
+    return redirect(f"{reverse('manage_loads')}?{request.POST.get('query', '')}")
+
+@login_required
+@tenant_required
 def manage_fleet(request):
-    c = request.user.userprofile.company
+    c = request.tenant.company
     if not c.is_active: return render(request, 'payment_pending.html')
     drivers = Driver.objects.filter(company=c)
     
     # --- FLEET LIMIT LOGIC ---
     if request.method == 'POST':
-        plan = str(c.plan_type).lower()
-        limit = 3 # Starter
-        if 'pro' in plan: limit = 10
-        elif 'enterprise' in plan: limit = 9999
-        
-        if drivers.count() >= limit:
-            messages.error(request, f"Plan Limit Reached! Your plan allows {limit} trucks.")
-        else:
-            d = Driver(company=c)
-            d.name = request.POST.get('name')
-            d.truck_number = request.POST.get('truck_number')
-            if request.FILES.get('cdl_file'): d.cdl_file = request.FILES['cdl_file']
-            d.status = 'available'
-            d.save()
+        try:
+            with entitlements.reserve(c, 'drivers'):
+                d = Driver(company=c)
+                d.name = request.POST.get('name')
+                d.truck_number = request.POST.get('truck_number')
+                if request.FILES.get('cdl_file'): d.cdl_file = request.FILES['cdl_file']
+                d.status = 'available'
+                d._quota_reserved = True
+                d.save()
             messages.success(request, "Unit Added Successfully.")
+        except entitlements.QuotaExceeded as e:
+            messages.error(request, f"Plan Limit Reached! Your plan allows {e.limit} trucks.")
         return redirect('manage_fleet')
     return render(request, 'manage_fleet.html', {'drivers': drivers})
 
 @login_required
+@tenant_required
 def add_load(request):
-    c = request.user.userprofile.company
+    c = request.tenant.company
     if not c.is_active: return render(request, 'payment_pending.html')
     if request.method == 'POST':
         form = LoadForm(c, request.POST, request.FILES)
@@ -161,64 +249,203 @@ def add_load(request):
     return render(request, 'add_load.html', {'form': LoadForm(c)})
 
 @login_required
+@tenant_required
+def import_loads(request):
+    c = request.tenant.company
+    if not c.is_active: return render(request, 'payment_pending.html')
+    form, result = LoadImportUploadForm(request.POST or None, request.FILES or None), None
+    if request.method == 'POST' and form.is_valid():
+        result = importer.import_loads(c, importer.open_csv(form.cleaned_data['csv_file']))
+        if result.created: messages.success(request, f"Imported {result.created} loads.")
+    return render(request, 'import_loads.html', {'form': form, 'result': result, 'columns': importer.COLUMNS})
+
+@login_required
+@tenant_required
 def edit_load(request, load_id):
-    l = get_object_or_404(Load, id=load_id, company=request.user.userprofile.company)
-    form = LoadForm(l.company, request.POST or None, request.FILES or None, instance=l)
+    l = get_object_or_404(Load, id=load_id, company_id=request.tenant.company_id)
+    form = LoadForm(request.tenant.company, request.POST or None, request.FILES or None, instance=l)
     if form.is_valid(): form.save(); return redirect('manage_loads')
     return render(request, 'edit_load.html', {'form': form})
 
 @login_required
+@tenant_required
 def complete_load(request, load_id):
-    l = get_object_or_404(Load, id=load_id, company=request.user.userprofile.company); l.status='delivered'; l.save(); return redirect('manage_loads')
+    # same checked, rollup-aware path as the board's bulk actions (active -> delivered only)
+    if request.method != 'POST': return HttpResponseNotAllowed(['POST'])
+    error = transitions.transition(request.tenant.company, [load_id], 'delivered')[load_id]
+    if error == transitions.NOT_FOUND: raise Http404
+    if error: messages.error(request, f"Load #{load_id}: {error}")
+    return redirect('manage_loads')
 
 @login_required
+@tenant_required
 def generate_invoice(request, load_id):
-    l = get_object_or_404(Load, id=load_id, company=request.user.userprofile.company); return render(request, 'invoice.html', {'load': l, 'company': l.company})
+    c = Company.objects.get(pk=request.tenant.company_id)  # an invoice carries the company's current details
+    l = get_object_or_404(Load, id=load_id, company=c)
+    receivables = rollups.totals(c, statuses=['delivered'])
+    return render(request, 'invoice.html', {'load': l, 'company': c, 'receivables': receivables})
+
+@login_required
+@tenant_required
+def invoice_pdf(request, load_id):
+    c = Company.objects.get(pk=request.tenant.company_id)
+    l = get_object_or_404(Load, id=load_id, company=c)
+    return FileResponse(default_storage.open(invoices.cached_path(l, c)), content_type='application/pdf', filename=invoices.filename(l))
+
+@login_required
+@tenant_required
+def invoice_batch(request):
+    c = Company.objects.get(pk=request.tenant.company_id)
+    if not c.is_active: return render(request, 'payment_pending.html')
+    delivered = Load.objects.filter(company=c, status='delivered').order_by('delivery_date', 'id')
+    response = StreamingHttpResponse(invoices.stream_zip(delivered.iterator(chunk_size=500), c), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="invoices-{timezone.localdate():%Y-%m-%d}.zip"'
+    return response
+
+@login_required
+@tenant_required
+def export_loads(request):
+    c = request.tenant.company
+    if not c.is_active: return render(request, 'payment_pending.html')
+    form = LoadExportForm(request.GET)
+    if not form.is_valid(): return HttpResponseBadRequest(form.errors.as_text())
+    fmt = form.cleaned_data['format'] or 'csv'
+    response = StreamingHttpResponse(exports.stream(form.apply(exports.loads_for(c)), fmt), content_type=exports.CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="loads-{timezone.localdate():%Y-%m-%d}.{fmt}"'
+    return response
+
+@login_required
+def serve_media(request, path):
+    if not media.authorized(request, path): raise Http404
+    try: full = dedup_storage.path(path)
+    except SuspiciousFileOperation: raise Http404
+    if not os.path.isfile(full): raise Http404
+    return media.serve(request, path, full, mimetypes.guess_type(path)[0] or 'application/octet-stream')
 
 @login_required
+@tenant_required
 def company_settings(request):
-    c = request.user.userprofile.company; form = CompanyDocForm(request.POST or None, instance=c)
+    c = Company.objects.get(pk=request.tenant.company_id); form = CompanyDocForm(request.POST or None, instance=c)
     if form.is_valid(): form.save(); return redirect('dashboard')
     return render(request, 'company_settings.html', {'form': form})
 
 @login_required
+@replica_reads
+@tenant_required
 def document_center(request):
-    c = request.user.userprofile.company
+    c = request.tenant.company
     if not c.is_active: return render(request, 'payment_pending.html')
-    return render(request, 'document_center.html', {'company': c, 'drivers': Driver.objects.filter(company=c), 'loads': Load.objects.filter(company=c)})
+    filters = DocumentFilterForm(request.GET or None)
+
+    def document_page():  # evaluated only when the documents fragment misses
+        paginator = KeysetPaginator(filters.apply(Document.objects.filter(company=c)), ('-uploaded_at', '-id'), per_page=DOCUMENT_PAGE_SIZE)
+        try: return paginator.page(request.GET.get('cursor'))
+        except InvalidCursor: return paginator.page()
+    page = SimpleLazyObject(document_page)
+    return render(request, 'document_center.html', {'company': c, 'documents': page, 'page': page, 'filters': filters,
+                                                    'query': _query_without(request, 'cursor')})
 
 @login_required
+@tenant_required
 def manage_clients(request):
-    c = request.user.userprofile.company
+    c = request.tenant.company
     
     # --- OWNER LOGIN LIMIT LOGIC ---
     if request.method == 'POST':
-        plan = str(c.plan_type).lower()
-        # Define limits: Starter=0 extra, Pro=3 extra, Enterprise=Unlimited
-        limit = 0 
-        if 'pro' in plan: limit = 3
-        elif 'enterprise' in plan: limit = 999
-        
-        current_logins = UserProfile.objects.filter(company=c, role='owner').count()
-        
-        if current_logins >= limit:
-            messages.error(request, f"Login Limit Reached! Your plan allows {limit} extra accounts.")
-        else:
-            u_name = request.POST.get('username')
-            u_pass = request.POST.get('password')
+        # Limits live in core.entitlements: Starter=0 extra, Pro=3 extra, Enterprise=Unlimited
+        u_name = request.POST.get('username')
+        u_pass = request.POST.get('password')
+        try:
             if User.objects.filter(username=u_name).exists():
                 messages.error(request, "Username taken.")
             else:
-                u = User.objects.create_user(username=u_name, password=u_pass)
-                UserProfile.objects.create(user=u, company=c, role='owner')
+                with entitlements.reserve(c, 'owner_logins'):
+                    u = User.objects.create_user(username=u_name, password=u_pass)
+                    p = UserProfile(user=u, company=c, role='owner'); p._quota_reserved = True; p.save()
                 messages.success(request, f"Owner login created: {u_name}")
             return redirect('manage_clients')
+        except entitlements.QuotaExceeded as e:
+            messages.error(request, f"Login Limit Reached! Your plan allows {e.limit} extra accounts.")
 
     return render(request, 'manage_clients.html', {'owners': UserProfile.objects.filter(company=c, role='owner')})
 
 @login_required
 def client_dashboard(request): return render(request, 'client_dashboard.html')
 
+# --- JSON API ---
+@csrf_exempt
+def api_token(request):
+    """POST a username and password for a bearer key (mobile app, TMS integrations); DELETE with that key revokes it."""
+    if request.method == 'DELETE':
+        key = api.bearer_key(request)
+        revoked = key is not None and ApiToken.objects.filter(digest=api.digest(key)).delete()[0]
+        return HttpResponse(status=204) if revoked else api.error(401, "Invalid API token.")
+    if request.method != 'POST': return HttpResponseNotAllowed(['POST', 'DELETE'])
+    try: data, _ = api.payload(request)
+    except api.BadRequest as e: return api.error(e.status, str(e))
+    user = authenticate(request, username=data.get('username'), password=data.get('password'))
+    if user is None: return api.error(401, "Invalid username or password.")
+    return JsonResponse({'token': api.issue_token(user, str(data.get('name') or ''))}, status=201)
+
+@api.endpoint
+def api_loads(request):
+    c = request.tenant.company
+    if request.method == 'POST':
+        form = api.bind(LoadApiForm, request, c)
+        if not form.is_valid(): return api.invalid(form)
+        l = form.save(commit=False); l.company = c; l.save()
+        return api.saved(request, api.LOADS, l, status=201)
+    if request.method not in ('GET', 'HEAD'): return HttpResponseNotAllowed(['GET', 'HEAD', 'POST'])
+    loads = Load.objects.filter(company=c)
+    if request.GET.get('status'): loads = loads.filter(status=request.GET['status'])
+    return api.conditional_get(request, c.pk, lambda: JsonResponse(api.listing(request, api.LOADS, loads)))
+
+@api.endpoint
+def api_load(request, load_id):
+    c = request.tenant.company
+    if request.method == 'PATCH':
+        l = Load.objects.filter(id=load_id, company=c).first()
+        if l is None: return api.error(404, "Load not found.")
+        form = api.bind(LoadApiForm, request, c, instance=l)
+        if not form.is_valid(): return api.invalid(form)
+        return api.saved(request, api.LOADS, form.save())
+    if request.method not in ('GET', 'HEAD'): return HttpResponseNotAllowed(['GET', 'HEAD', 'PATCH'])
+    def build():
+        body = api.detail(request, api.LOADS, Load.objects.filter(company=c), load_id)
+        return JsonResponse(body) if body else api.error(404, "Load not found.")
+    return api.conditional_get(request, c.pk, build)
+
+@api.endpoint
+def api_drivers(request):
+    c = request.tenant.company
+    if request.method == 'POST':
+        form = api.bind(DriverForm, request)
+        if not form.is_valid(): return api.invalid(form)
+        try:
+            with entitlements.reserve(c, 'drivers'):
+                d = form.save(commit=False); d.company = c; d._quota_reserved = True; d.save()
+        except entitlements.QuotaExceeded as e:
+            return api.error(403, f"Plan limit reached: your plan allows {e.limit} trucks.")
+        return api.saved(request, api.DRIVERS, d, status=201)
+    if request.method not in ('GET', 'HEAD'): return HttpResponseNotAllowed(['GET', 'HEAD', 'POST'])
+    drivers = Driver.objects.filter(company=c)
+    return api.conditional_get(request, c.pk, lambda: JsonResponse(api.listing(request, api.DRIVERS, drivers)))
+
+@api.endpoint
+def api_driver(request, driver_id):
+    c = request.tenant.company
+    if request.method == 'PATCH':
+        d = Driver.objects.filter(id=driver_id, company=c).first()
+        if d is None: return api.error(404, "Driver not found.")
+        form = api.bind(DriverForm, request, instance=d)
+        if not form.is_valid(): return api.invalid(form)
+        return api.saved(request, api.DRIVERS, form.save())
+    if request.method not in ('GET', 'HEAD'): return HttpResponseNotAllowed(['GET', 'HEAD', 'PATCH'])
+    def build():
+        body = api.detail(request, api.DRIVERS, Driver.objects.filter(company=c), driver_id)
+        return JsonResponse(body) if body else api.error(404, "Driver not found.")
+    return api.conditional_get(request, c.pk, build)
+
 # --- PUBLIC ---
 def home(request): return render(request, 'home.html')
 def portal_choice(request): return render(request, 'portal_choice.html')
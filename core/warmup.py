@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+# --- PROCESS WARM-UP ---
+# Work each worker would otherwise repeat on its first requests: compiling every
+# template into the cached loader and building the URL resolver (which also imports
+# the views and everything they pull in). gunicorn.conf.py runs it in the master once
+# the app is preloaded, so forked workers inherit the result copy-on-write.
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def template_names(engine):
+    """Relative names of every template file the engine's loaders can see."""
+    names = set()
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                for root, _, files in os.walk(directory):
+                    names.update(os.path.relpath(os.path.join(root, f), directory) for f in files if f.endswith(TEMPLATE_SUFFIXES))
+    return sorted(names)
+
+
+def warm():
+    """Compile all templates and populate the URL resolver; returns (templates compiled, seconds)."""
+    started = time.perf_counter()
+    compiled = 0
+    for backend in engines.all():
+        for name in template_names(backend.engine):
+            try: backend.get_template(name)
+            except TemplateSyntaxError: continue  # fragments meant only for {% include %} with custom context, etc.
+            compiled += 1
+    get_resolver().reverse_dict  # builds the reverse lookup tables, importing every view module
+    return compiled, time.perf_counter() - started
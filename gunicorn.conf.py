@@ -0,0 +1,67 @@
+import os
+
+# --- GUNICORN ---
+# Production server config (see Procfile). Loading it selects the production settings
+# profile unless DJANGO_ENV says otherwise. The app is imported once in the master,
+# warmed (templates compiled, URLconf built; core.warmup) and then forked, so workers
+# share that memory copy-on-write and serve their first request warm. Each value can
+# be overridden with the environment variable it reads.
+#
+# The Procfile runs it twice. `web` serves every page from 2n+1 sync (gthread) workers
+# over WSGI, where DB connections persist (DB_CONN_MAX_AGE). `events` serves only the
+# live board's SSE streams (views.load_events) from one async worker over ASGI; route
+# /manage-loads/events/ to it at the proxy. The web workers hand it their events
+# through core.events.SocketBroker. Without that route the board simply isn't live:
+# WSGI answers the stream with 204 and the browser stops asking.
+#
+# Web workers share a cache through CACHE_DIR (production default); the events process
+# runs more than one worker only with a broker that reaches every process (EVENTS_BROKER
+# with `shared = True`). A setting that breaks either falls back to one worker.
+
+os.environ.setdefault('DJANGO_ENV', 'production')
+
+
+def _cpus():
+    try: return len(os.sched_getaffinity(0))  # respects container CPU pinning
+    except AttributeError: return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+live_board = 'uvicorn' in worker_class  # the events process
+wsgi_app = 'config.asgi:application' if live_board else 'config.wsgi:application'
+# the usual 2n+1 for sync workers; one event loop holds thousands of idle streams
+workers = int(os.environ.get('WEB_CONCURRENCY', 1 if live_board else 2 * _cpus() + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers to bound slow leaks; the jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+
+def on_starting(server):
+    if server.num_workers < 2: return
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+    if live_board and not import_string(settings.EVENTS_BROKER).shared: reason = "EVENTS_BROKER only reaches boards in one process"
+    elif settings.CACHES['default']['BACKEND'].endswith('LocMemCache'): reason = "the cache is per process (set CACHE_DIR)"
+    else: return
+    server.log.warning("Running 1 worker instead of %d: %s.", server.num_workers, reason)
+    server.num_workers = 1
+
+
+def when_ready(server):
+    from core import warmup
+    compiled, seconds = warmup.warm()
+    server.log.info("Warmed %d templates and the URLconf in %.0f ms", compiled, seconds * 1000)
+
+
+def post_fork(server, worker):
+    # the master shouldn't hold database connections, but never let a child inherit one
+    from django.db import connections
+    connections.close_all()